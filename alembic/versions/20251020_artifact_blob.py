@@ -0,0 +1,27 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002_artifact_blob'
+down_revision = '0001_init_evidence'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+	op.create_table(
+		'artifact_blob',
+		sa.Column('content_hash', sa.String(length=128), primary_key=True),
+		sa.Column('format', sa.String(length=10), nullable=False),
+		sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+		sa.Column('hits', sa.Integer(), nullable=False, server_default='0'),
+		sa.Column('last_access', sa.DateTime(), nullable=False),
+		sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+		sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+	)
+	op.create_index('ix_artifact_blob_last_access', 'artifact_blob', ['last_access'])
+
+
+def downgrade():
+	op.drop_index('ix_artifact_blob_last_access', table_name='artifact_blob')
+	op.drop_table('artifact_blob')
@@ -0,0 +1,27 @@
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy.dialects.postgresql as pg
+
+
+revision = '0003_evidence_consensus'
+down_revision = '0002_artifact_blob'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+	op.create_table(
+		'evidence_consensus',
+		sa.Column('evidence_id', pg.UUID(as_uuid=True), sa.ForeignKey('evidence.id', ondelete='CASCADE'), primary_key=True),
+		sa.Column('label', sa.String(length=20), nullable=False),
+		sa.Column('prob', sa.Float(), nullable=False),
+		sa.Column('n_curators', sa.Integer(), nullable=False),
+		sa.Column('method', sa.String(length=20), nullable=False),
+		sa.Column('counts', pg.JSONB(), nullable=False),
+		sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+		sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+	)
+
+
+def downgrade():
+	op.drop_table('evidence_consensus')
@@ -0,0 +1,29 @@
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy.dialects.postgresql as pg
+
+
+revision = '0004_annotation'
+down_revision = '0003_evidence_consensus'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+	op.create_table(
+		'annotation',
+		sa.Column('id', pg.UUID(as_uuid=True), primary_key=True),
+		sa.Column('evidence_id', pg.UUID(as_uuid=True), sa.ForeignKey('evidence.id', ondelete='CASCADE'), nullable=False),
+		sa.Column('user_id', sa.String(length=100), nullable=False),
+		sa.Column('label', sa.String(length=20), nullable=False),
+		sa.Column('notes', sa.Text(), nullable=True),
+		sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+		sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+		sa.UniqueConstraint('evidence_id', 'user_id', name='uq_annotation_user')
+	)
+	op.create_index('ix_annotation_evidence_id', 'annotation', ['evidence_id'])
+
+
+def downgrade():
+	op.drop_index('ix_annotation_evidence_id', table_name='annotation')
+	op.drop_table('annotation')
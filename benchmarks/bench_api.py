@@ -0,0 +1,45 @@
+"""HTTP hot paths: SV listing, labelling and consensus reads."""
+import itertools
+import random
+
+from conftest import CHROMS
+
+LABEL = {"outcome": "True", "confidence": 4, "zygosity": "het", "evidence_flags": ["split"]}
+
+
+def test_list_sv_first_page(benchmark, client):
+    r = benchmark(client.get, "/sv/", params={"limit": 200})
+    assert r.status_code == 200
+
+
+def test_list_sv_locus_window(benchmark, client):
+    rng = random.Random(1)
+    windows = itertools.cycle([
+        f"{rng.choice(CHROMS)}:{(s := rng.randrange(0, 149_000_000))}-{s + 1_000_000}" for _ in range(100)])
+    r = benchmark(lambda: client.get("/sv/", params={"region": next(windows)}))
+    assert r.status_code == 200
+
+
+def test_list_sv_keyset_pages(benchmark, client):
+    def walk(pages=10):
+        cursor = None
+        for _ in range(pages):
+            params = {"limit": 200, **({"after": cursor} if cursor else {})}
+            r = client.get("/sv/", params=params)
+            cursor = r.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+    benchmark(walk)
+
+
+def test_create_label(benchmark, client, cohort):
+    ids = itertools.cycle(cohort.sv_ids)
+    r = benchmark(lambda: client.post(f"/sv/{next(ids)}/label", json=LABEL))
+    assert r.status_code == 200
+
+
+def test_get_sv_consensus(benchmark, client, cohort):
+    ids = itertools.cycle(cohort.sv_ids)
+    r = benchmark(lambda: client.get(f"/consensus/sv/{next(ids)}"))
+    assert r.status_code == 200
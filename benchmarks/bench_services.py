@@ -0,0 +1,57 @@
+"""Service-level hot paths: hashing, the artifact store, export and rendering."""
+import itertools
+import os
+from pathlib import Path
+
+import pytest
+
+from genomewiz.services import storage
+from genomewiz.services.utils.hashing import stable_hash
+
+PAYLOAD = {"sample_id": "samp_demo", "chrom": "chr12", "start": 25397284, "end": 25411210,
+           "support": {"split_reads": 12, "coverage_drop": 0.45}}
+DEMO_DIR = Path(__file__).resolve().parents[1] / "src" / "genomewiz" / "data"
+
+
+def test_stable_hash(benchmark):
+    benchmark(stable_hash, PAYLOAD, fmt="png", width=1200, height=600, dpi=None)
+
+
+def _write(tmp: str) -> None:
+    Path(tmp).write_bytes(b"\x89PNG" + b"\0" * 20_000)
+
+
+def test_artifact_cache_hit(benchmark):
+    h = stable_hash(PAYLOAD, fmt="png", width=None, height=None, dpi=None)
+    storage.materialize(h, "png", _write)
+    assert benchmark(storage.materialize, h, "png", _write).exists()
+
+
+def test_artifact_cache_miss(benchmark):
+    n = itertools.count()
+    benchmark(lambda: storage.materialize(
+        stable_hash({**PAYLOAD, "i": next(n)}, fmt="png", width=None, height=None, dpi=None), "png", _write))
+
+
+def test_export_dysgu(benchmark, evidence_cohort):
+    import asyncio
+    from genomewiz.routers.export import _iter_rows
+
+    async def drain():
+        return sum([1 async for _ in _iter_rows(["sv", "sv_evidence"], 1, None, None, None)])
+
+    n = benchmark.pedantic(lambda: asyncio.run(drain()), rounds=5)
+    assert 0 < n <= evidence_cohort.evidence
+
+
+def test_render_demo_png(benchmark, monkeypatch):
+    pytest.importorskip("gwplot")
+    ref = os.getenv("GW_REFERENCE", "")
+    if not os.path.isfile(ref):
+        pytest.skip("set GW_REFERENCE to a FASTA that matches samp_demo.bam")
+    monkeypatch.setenv("GW_DATA_ROOT", str(DEMO_DIR))
+    from genomewiz.services.gwplot_renderer import _render_png_sync
+
+    _render_png_sync("samp_demo", "chr12", 25397284, 25411210)  # warm the Gw pool
+    png = benchmark(_render_png_sync, "samp_demo", "chr12", 25397284, 25411210)
+    assert png[:4] == b"\x89PNG"
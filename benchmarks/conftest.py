@@ -0,0 +1,171 @@
+"""
+Benchmark fixtures: a synthetic cohort in a throwaway database.
+
+Cohort size comes from BENCH_SAMPLES / BENCH_SVS / BENCH_CURATORS /
+BENCH_LABELS (and BENCH_EVIDENCE / BENCH_ANNOTATIONS for the evidence export);
+BENCH_DATABASE_URL benchmarks against a real server instead of
+a temporary SQLite file. Run with ``make bench`` (see Makefile).
+"""
+import os
+import random
+import tempfile
+import uuid
+
+# Must happen before anything imports genomewiz (settings are read at import time).
+_TMP = tempfile.mkdtemp(prefix="gw-bench-")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{_TMP}/bench.db"
+os.environ["GW_FIGURES_DIR"] = os.path.join(_TMP, "figures")
+os.environ["AUTH_EPOCH_FILE"] = os.path.join(_TMP, "auth_epoch")
+os.environ["API_TOKEN"] = API_TOKEN = "bench"
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from genomewiz.db.base import Base, SessionLocal, engine
+from genomewiz.db import models
+from genomewiz.services import consensus
+from genomewiz.services.intervals import reg2bin, sv_span
+
+SEED = 20251017
+CHROMS = [f"chr{i}" for i in range(1, 23)] + ["chrX"]
+SVTYPES = ["DEL", "INS", "DUP", "INV", "BND"]
+BENCH_CURATOR = "bench:curator"
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+class Cohort:
+    def __init__(self) -> None:
+        self.samples = _env_int("BENCH_SAMPLES", 10)
+        self.svs = _env_int("BENCH_SVS", 50_000)
+        self.curators = _env_int("BENCH_CURATORS", 20)
+        self.labels = _env_int("BENCH_LABELS", 100_000)
+        self.evidence = _env_int("BENCH_EVIDENCE", 20_000)
+        self.annotations = _env_int("BENCH_ANNOTATIONS", 60_000)
+        self.sv_ids: list[str] = []
+        self.rng = random.Random(SEED)
+
+    def as_dict(self) -> dict:
+        return {"samples": self.samples, "svs": self.svs, "curators": self.curators,
+                "labels": self.labels, "evidence": self.evidence, "annotations": self.annotations,
+                "seed": SEED, "database": engine.url.get_backend_name()}
+
+
+def _sv_rows(c: Cohort):
+    rng = c.rng
+    for i in range(c.svs):
+        chrom = rng.choice(CHROMS)
+        svtype = rng.choice(SVTYPES)
+        pos1 = rng.randrange(10_000, 150_000_000)
+        size = int(10 ** rng.uniform(1.7, 6.5))
+        pos2 = None if svtype == "BND" else pos1 + (1 if svtype == "INS" else size)
+        start, end = sv_span(chrom, pos1, pos2, svtype)
+        yield {"id": f"sv_{i:08d}", "sample_id": f"samp_{i % c.samples:03d}", "chrom": chrom,
+               "pos1": pos1, "pos2": pos2, "svtype": svtype, "size": size,
+               "caller": rng.choice(["dysgu", "sniffles", "cutesv"]),
+               "span_end": end, "bin": reg2bin(start, end)}
+
+
+def _chunks(rows, n=5000):
+    buf = []
+    for r in rows:
+        buf.append(r)
+        if len(buf) == n:
+            yield buf
+            buf = []
+    if buf:
+        yield buf
+
+
+@pytest.fixture(scope="session")
+def cohort() -> Cohort:
+    c = Cohort()
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        db.execute(insert(models.Sample), [
+            {"id": f"samp_{i:03d}", "name": f"sample {i}", "tumor_normal": "tumor", "platform": "ONT",
+             "source": "synthetic", "license": "CC0", "consent_url": "-"} for i in range(c.samples)])
+        db.execute(insert(models.Curator), [
+            {"id": f"cur_{i:03d}", "name": f"curator {i}", "email": f"c{i}@bench", "score": 0}
+            for i in range(c.curators)] + [
+            {"id": BENCH_CURATOR, "name": "bench", "email": "bench@bench", "score": 0}])
+        for chunk in _chunks(_sv_rows(c)):
+            db.execute(insert(models.SVCandidate), chunk)
+        c.sv_ids = [f"sv_{i:08d}" for i in range(c.svs)]
+        rng = c.rng
+        outcomes = consensus.OUTCOMES
+        labels = ({"id": f"lab_{i:09d}", "sv_id": rng.choice(c.sv_ids),
+                   "curator_id": f"cur_{rng.randrange(c.curators):03d}",
+                   "outcome": rng.choices(outcomes, weights=(5, 3, 2, 1))[0],
+                   "confidence": rng.randint(1, 5)} for i in range(c.labels))
+        for chunk in _chunks(labels):
+            db.execute(insert(models.Label), chunk)
+        consensus.rebuild_sv_consensus(db)
+        db.commit()
+    finally:
+        db.close()
+    return c
+
+
+@pytest.fixture(scope="session")
+def evidence_cohort(cohort) -> Cohort:
+    """SV evidence rows with curator annotations, for the /export/dysgu path."""
+    from genomewiz.models.base import Base as EvidenceBase
+    from genomewiz.models.annotation import Annotation
+    from genomewiz.models.evidence import Evidence
+    from genomewiz.models.render_artifact import RenderArtifact  # noqa: F401  (Evidence.artifacts)
+
+    EvidenceBase.metadata.create_all(engine)
+    rng = random.Random(SEED + 1)
+    ids = [uuid.UUID(int=rng.getrandbits(128)) for _ in range(cohort.evidence)]
+
+    def evidence():
+        for ev_id in ids:
+            pos1 = rng.randrange(10_000, 150_000_000)
+            size = int(10 ** rng.uniform(1.7, 6.5))
+            yield {"id": ev_id, "etype": "sv", "created_by": "bench", "status": "new",
+                   "payload": {"chrom1": rng.choice(CHROMS), "pos1": pos1, "pos2": pos1 + size,
+                               "svtype": rng.choice(SVTYPES), "length": size,
+                               "support": {"split_reads": rng.randrange(40)}}}
+
+    # unique (evidence_id, user_id): each curator annotates a given row at most once
+    votes = {(rng.choice(ids), f"cur_{rng.randrange(cohort.curators):03d}")
+             for _ in range(cohort.annotations)}
+    annotations = ({"id": uuid.uuid4(), "evidence_id": ev_id, "user_id": user,
+                    "label": rng.choices(consensus.EVIDENCE_LABELS, weights=(5, 2, 2))[0]}
+                   for ev_id, user in sorted(votes))
+    db = SessionLocal()
+    try:
+        for chunk in _chunks(evidence()):
+            db.execute(insert(Evidence), chunk)
+        for chunk in _chunks(annotations):
+            db.execute(insert(Annotation), chunk)
+        db.commit()
+    finally:
+        db.close()
+    return cohort
+
+
+@pytest.fixture(scope="session")
+def client(cohort) -> TestClient:
+    """The DB-backed routers mounted on a bare app with curator auth stubbed out."""
+    from genomewiz.core import auth, security
+    from genomewiz.routers import consensus as consensus_router, labels, sv
+
+    app = FastAPI()
+    for r in (sv, labels, consensus_router):
+        app.include_router(r.router)
+    user = {"id": BENCH_CURATOR, "curator_id": BENCH_CURATOR, "email": "bench@bench", "roles": ["curator"]}
+    app.dependency_overrides[auth.get_current_user] = lambda: user
+    app.dependency_overrides[security.get_current_user] = lambda: user
+    with TestClient(app, headers={"Authorization": f"Bearer {API_TOKEN}"}) as c:
+        yield c
+
+
+def pytest_benchmark_update_json(config, benchmarks, output_json):
+    output_json["cohort"] = Cohort().as_dict()
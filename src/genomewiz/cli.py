@@ -5,6 +5,8 @@ from uuid import uuid4
 # ---- DB + models ----
 from genomewiz.db.base import Base, engine, SessionLocal   # <-- SessionLocal is needed
 from genomewiz.db import models
+from genomewiz.services import render_queue
+from genomewiz.core.identity_cache import IDENTITIES
 
 # -----------------------------
 # Core commands
@@ -14,6 +16,18 @@ def init_db() -> None:
     Base.metadata.create_all(bind=engine)
     print("DB ready.")
 
+def upgrade_db_main() -> None:
+    import argparse
+    from genomewiz.db import upgrade
+    p = argparse.ArgumentParser(description="Add columns/indexes missing from an existing database and backfill them")
+    p.add_argument("--batch-size", type=int, default=upgrade.BATCH_SIZE, help="SVs re-binned per transaction")
+    args = p.parse_args()
+    out = upgrade.upgrade(engine, args.batch_size)
+    for name in out["added"]:
+        print(f"  added {name}")
+    print(f"[OK] Re-binned {out['sv_bins']} SVs, stamped {out['sv_updated_at']} SVs with updated_at, "
+          f"filled counts for {out['consensus_counts']} consensus rows.")
+
 def seed_demo() -> None:
     """Seed one sample, one SV, and one curator for quick testing."""
     db = SessionLocal()
@@ -39,6 +53,8 @@ def seed_demo() -> None:
                 caller="dysgu",
             )
             db.add_all([samp, sv])
+            db.flush()
+            render_queue.enqueue_sv(db, sv)
             db.add(models.Curator(
                 id="local:demo",
                 name="Demo User",
@@ -100,6 +116,8 @@ def create_admin(email: str, name: Optional[str] = None,
         user = _get_or_create_user(db, email=email, name=name, google_sub=google_sub)
         added = _grant_role(db, user=user, role="admin")
         db.commit()
+        if added:
+            IDENTITIES.invalidate_user(user.id)
         print(f"[OK] Admin ensured for {user.email} (name='{user.name}', id='{user.id}')."
               + ("" if not added else " Role granted."))
     finally:
@@ -112,6 +130,8 @@ def grant_role(email: str, role: str) -> None:
         user = _get_or_create_user(db, email=email)
         added = _grant_role(db, user=user, role=role)
         db.commit()
+        if added:
+            IDENTITIES.invalidate_user(user.id)
         print(f"[OK] Role '{role}' "
               + ("granted" if added else "already present")
               + f" for {user.email} (id='{user.id}').")
@@ -139,3 +159,160 @@ def grant_role_main() -> None:
                    help="Role to grant")
     args = p.parse_args()
     grant_role(email=args.email, role=args.role)
+
+def render_worker_main() -> None:
+    import argparse
+    import logging
+    p = argparse.ArgumentParser(description="Run the background render worker (pre-renders queued panels)")
+    p.add_argument("--processes", type=int, default=None,
+                   help="Worker processes (default: GW_RENDER_PROCESSES or CPU count)")
+    p.add_argument("--poll", type=float, default=1.0, help="Seconds between queue polls when idle")
+    p.add_argument("--once", action="store_true", help="Exit when the queue is drained")
+    args = p.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    render_queue.run_worker(processes=args.processes, poll_s=args.poll, once=args.once)
+
+def gc_artifacts_main() -> None:
+    import argparse
+    from genomewiz.services import storage
+    p = argparse.ArgumentParser(description="Evict least recently used render artifacts over the disk budget")
+    p.add_argument("--max-bytes", type=int, default=None,
+                   help="Budget in bytes (default: GW_FIGURES_MAX_BYTES)")
+    args = p.parse_args()
+    db = SessionLocal()
+    try:
+        freed = storage.enforce_budget(db, args.max_bytes)
+        print(f"[OK] Freed {freed} bytes.")
+    finally:
+        db.close()
+
+def rebuild_consensus_main() -> None:
+    import argparse
+    from genomewiz.services import consensus
+    p = argparse.ArgumentParser(description="Rebuild the materialized consensus tables from all labels/annotations")
+    p.parse_args()
+    db = SessionLocal()
+    try:
+        n_sv, n_ev = consensus.rebuild_all(db)
+        print(f"[OK] Rebuilt consensus for {n_sv} SVs and {n_ev} evidence rows.")
+    finally:
+        db.close()
+
+def consensus_em_main() -> None:
+    import argparse
+    import os
+    from genomewiz.services import consensus
+    p = argparse.ArgumentParser(description="Run Dawid-Skene EM over all labels and update consensus")
+    p.add_argument("--state", default=os.getenv("GW_DS_STATE", "./dawid_skene_params.npz"),
+                   help="Where to keep fitted parameters for warm starts")
+    p.add_argument("--cold", action="store_true", help="Ignore saved parameters")
+    p.add_argument("--max-iter", type=int, default=100)
+    p.add_argument("--tol", type=float, default=1e-6)
+    args = p.parse_args()
+    db = SessionLocal()
+    try:
+        out = consensus.run_dawid_skene(db, state_path=args.state, warm_start=not args.cold,
+                                        max_iter=args.max_iter, tol=args.tol)
+        print(f"[OK] Dawid-Skene: {out}")
+    finally:
+        db.close()
+
+def read_summaries_main() -> None:
+    import argparse
+    import logging
+    from genomewiz.services import read_evidence
+    p = argparse.ArgumentParser(description="Compute split-read/discordant/coverage summaries for SVs from sample BAMs")
+    p.add_argument("sample_ids", nargs="*", help="Samples to process (default: every sample with SVs)")
+    p.add_argument("--processes", type=int, default=1, help="Samples processed in parallel")
+    p.add_argument("--force", action="store_true", help="Recompute summaries that are already up to date")
+    args = p.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    out = read_evidence.run_summaries(args.sample_ids or None, processes=args.processes, force=args.force)
+    print(f"[OK] Summarized {sum(out.values())} SVs across {len(out)} samples.")
+
+def export_parquet_main() -> None:
+    import argparse
+    import logging
+    from genomewiz.services import parquet_export
+    p = argparse.ArgumentParser(description="Export the training set as a partitioned Parquet dataset")
+    p.add_argument("out_dir", help="Dataset root; each run adds a snapshot directory and a manifest entry")
+    p.add_argument("--full", action="store_true", help="Export every SV, not just those changed since the last snapshot")
+    p.add_argument("--row-group", type=int, default=parquet_export.ROW_GROUP_SIZE, help="Rows per Parquet row group")
+    args = p.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        entry = parquet_export.export_dataset(db, args.out_dir, incremental=not args.full,
+                                              row_group_size=args.row_group)
+    finally:
+        db.close()
+    kind = f"changes since {entry['since']}" if entry["incremental"] else "full"
+    print(f"[OK] Exported {entry['rows']} SVs ({kind}) to {args.out_dir}/{entry['snapshot']}.")
+
+def changes_main() -> None:
+    import argparse
+    import json
+    import sys
+    from pathlib import Path
+    from genomewiz.services import changes
+    p = argparse.ArgumentParser(description="Print label/consensus changes after a cursor as NDJSON")
+    p.add_argument("--since", type=int, default=None, help="Last seq already applied (default: 0 or --cursor-file)")
+    p.add_argument("--cursor-file", default=None, help="Read the cursor from, and write the new cursor to, this file")
+    p.add_argument("--limit", type=int, default=None, help="Stop after about this many log entries")
+    p.add_argument("--prune-through", type=int, default=None,
+                   help="Instead of printing, delete log entries up to this seq (all consumers must be past it)")
+    args = p.parse_args()
+    db = SessionLocal()
+    try:
+        if args.prune_through is not None:
+            print(f"[OK] Pruned {changes.prune(db, args.prune_through)} change-log entries.", file=sys.stderr)
+            return
+        cursor_file = Path(args.cursor_file) if args.cursor_file else None
+        since = args.since
+        if since is None:
+            since = int(cursor_file.read_text()) if cursor_file and cursor_file.exists() else 0
+        cursor, n = since, 0
+        for page, cursor in changes.iter_changes(db, since, limit=args.limit):
+            for c in page:
+                sys.stdout.write(json.dumps(c) + "\n")
+            n += len(page)
+        sys.stdout.flush()
+        if cursor_file:
+            cursor_file.write_text(f"{cursor}\n")
+        print(f"[OK] {n} changes, cursor {cursor}.", file=sys.stderr)
+    finally:
+        db.close()
+
+def build_slices_main() -> None:
+    import argparse
+    import logging
+    from genomewiz.services import bam_slices
+    p = argparse.ArgumentParser(description="Prebuild the local BAM slice cache (GW_SLICE_DIR) for every SV of each sample")
+    p.add_argument("sample_ids", nargs="*", help="Samples to process (default: every sample with SVs)")
+    p.add_argument("--processes", type=int, default=1, help="Samples processed in parallel")
+    args = p.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if bam_slices.slice_root() is None:
+        raise SystemExit("[ERR] GW_SLICE_DIR is not set.")
+    out = bam_slices.run_slices(args.sample_ids or None, processes=args.processes)
+    print(f"[OK] Built {sum(out.values())} slices across {len(out)} samples.")
+
+def load_vcf_main() -> None:
+    import argparse
+    import logging
+    from genomewiz.services import vcf_loader
+    p = argparse.ArgumentParser(description="Bulk-load SV candidates from a (bgzipped) VCF; re-runs upsert")
+    p.add_argument("vcf", help="Path to .vcf or .vcf.gz")
+    p.add_argument("--sample-id", required=True, help="Existing sample id the calls belong to")
+    p.add_argument("--caller", default=None, help="Caller name (default: from ##source header)")
+    p.add_argument("--processes", type=int, default=1,
+                   help="Parse chromosomes in parallel (needs a .tbi/.csi index and pysam)")
+    p.add_argument("--batch-size", type=int, default=vcf_loader.BATCH_SIZE)
+    p.add_argument("--no-prerender", action="store_true",
+                   help="Do not queue panel renders for the loaded calls")
+    args = p.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    n = vcf_loader.load_vcf(args.vcf, args.sample_id, caller=args.caller,
+                            processes=args.processes, batch_size=args.batch_size,
+                            prerender=not args.no_prerender)
+    print(f"[OK] Loaded {n} SV candidates.")
@@ -53,7 +53,8 @@ class Settings(BaseSettings):
 
     @field_validator("API_TOKEN")
     @classmethod
-    def _no_plain_api_token_in_prod(cls, v, values):
+    def _no_plain_api_token_in_prod(cls, v, info):
+        values = info.data
         if values.get("APP_ENV") in {"staging", "prod"} and not (v or values.get("API_TOKEN_FILE")):
             raise ValueError("API_TOKEN or API_TOKEN_FILE must be set in staging/prod")
         return v
@@ -10,6 +10,7 @@ from starlette.middleware.sessions import SessionMiddleware
 from sqlalchemy.orm import Session
 
 from genomewiz.core.config import get_settings
+from genomewiz.core.identity_cache import IDENTITIES
 from genomewiz.db.base import get_db
 from genomewiz.db import models
 
@@ -88,7 +89,12 @@ async def auth_callback(request: Request, db: Session):
 def get_current_user(token: Optional[str] = None, request: Request = None, db: Session = Depends(get_db)):
     """
     Prefer Authorization: Bearer <token>. Fallback to session.
+
+    Resolved identities are memoized on ``request.state`` and cached per token
+    (core/identity_cache.py), so repeat requests skip the curator/role lookup.
     """
+    if request is not None and getattr(request.state, "user", None) is not None:
+        return request.state.user
     auth = request.headers.get("Authorization") if request else None
     if auth and auth.lower().startswith("bearer "):
         token = auth.split(" ", 1)[1].strip()
@@ -100,13 +106,18 @@ def get_current_user(token: Optional[str] = None, request: Request = None, db: S
     if not token:
         raise HTTPException(status_code=401, detail="Missing token")
 
-    claims = decode_jwt(token)
-    user = db.get(models.Curator, claims["sub"])
-    if not user:
-        raise HTTPException(status_code=401, detail="Unknown user")
-
-    roles = [r.role for r in user.roles]
-    return {"id": user.id, "email": user.email, "roles": roles}
+    ident = IDENTITIES.get(token)
+    if ident is None:
+        claims = decode_jwt(token)
+        user = db.get(models.Curator, claims["sub"])
+        if not user:
+            raise HTTPException(status_code=401, detail="Unknown user")
+        roles = [r.role for r in user.roles]
+        ident = {"id": user.id, "email": user.email, "roles": roles}
+        IDENTITIES.put(token, ident, token_exp=claims.get("exp"))
+    if request is not None:
+        request.state.user = ident
+    return ident
 
 def require_roles(*allowed: str):
     def dep(user=Depends(get_current_user)):
@@ -2,6 +2,7 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator
 from pathlib import Path
 from functools import lru_cache
+from typing import Literal
 
 def read_secret_file(path: str | None) -> str | None:
     if not path:
@@ -24,6 +25,17 @@ class Settings(BaseSettings):
     DB_PASSWORD: str | None = None
     DB_PASSWORD_FILE: str | None = None
     DB_SSLMODE: str = "prefer"  # prod: "require"
+    ASYNC_DATABASE_URL: str | None = None  # default: DATABASE_URL with an async driver
+
+    # Connection pool (per engine, per process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800         # seconds; replace connections older than this
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # prepared statements kept per connection; 0 disables
+    DB_PREPARE_THRESHOLD: int = 5       # psycopg: executions before a statement is prepared
+    DB_PGBOUNCER: bool = False          # transaction-mode PgBouncer: no server-side prepared statements
 
     # Google OAuth + JWT (prefer *_FILE via Docker secrets)
     GOOGLE_CLIENT_ID: str | None = None
@@ -38,9 +50,26 @@ class Settings(BaseSettings):
     JWT_SECRET_FILE: str | None = None
     ALLOWED_GSUITE_DOMAIN: str | None = None
 
+    # Token -> identity cache (see core/identity_cache.py); TTL 0 disables it
+    AUTH_CACHE_TTL_S: float = 60.0
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_EPOCH_FILE: str | None = "./.auth_epoch"  # touched on role changes to flush other processes
+
+    # Log the render stage breakdown of requests slower than this (0 = off)
+    SLOW_REQUEST_MS: int = 0
+
     # Non-secret paths
     GW_REFERENCE: str = "/tmp"
     GW_FIGURES_DIR: str = "./figures"
+    GW_FIGURES_MAX_BYTES: int | None = None  # disk budget for the artifact store (LRU eviction)
+
+    # Artifact downloads: "x-accel" (nginx) or "x-sendfile" (Apache/lighttpd) hand
+    # the file to the front-end server; GW_SENDFILE_PREFIX is the nginx internal
+    # location that maps to GW_FIGURES_DIR
+    GW_SENDFILE: Literal["", "x-accel", "x-sendfile"] = ""
+    GW_SENDFILE_PREFIX: str = "/_figures"
+    # "public" lets shared caches keep artifacts; only behind a proxy you trust
+    GW_ARTIFACT_CACHE: Literal["private", "public"] = "private"
 
     def _secret(self, val: str | None, file_path: str | None) -> str | None:
         return val or read_secret_file(file_path)
@@ -58,6 +87,21 @@ class Settings(BaseSettings):
             )
         raise RuntimeError("Database configuration is incomplete")
 
+    @property
+    def async_database_uri(self) -> str:
+        """The database URL with its async driver (aiosqlite / psycopg 3)."""
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        url = self.database_uri
+        scheme, sep, rest = url.partition("://")
+        backend = scheme.split("+", 1)[0]
+        if backend == "sqlite":
+            return f"sqlite+aiosqlite{sep}{rest}"
+        if backend in ("postgresql", "postgres") and scheme not in ("postgresql+psycopg", "postgresql+asyncpg"):
+            # psycopg 3 runs in async mode under create_async_engine and keeps libpq's sslmode
+            return f"postgresql+psycopg{sep}{rest}"
+        return url
+
     @property
     def google_client_id(self) -> str | None:
         return self._secret(self.GOOGLE_CLIENT_ID, self.GOOGLE_CLIENT_ID_FILE)
@@ -0,0 +1,94 @@
+"""
+Short-lived cache of bearer token -> resolved identity ({id, email, roles}).
+
+Entries expire after AUTH_CACHE_TTL_S (or at the token's own ``exp``,
+whichever comes first), and the cache holds at most AUTH_CACHE_SIZE tokens
+(LRU). Role changes made by another process (the CLI) are picked up through
+an epoch file: ``invalidate_user`` touches it, and every cache checks its
+mtime at most once per second and drops everything when it moved.
+"""
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from genomewiz.core.config import get_settings
+
+Identity = Dict[str, Any]
+
+
+class IdentityCache:
+    def __init__(self, ttl_s: float, max_size: int, epoch_file: str | Path | None = None) -> None:
+        self.ttl_s = ttl_s
+        self.max_size = max_size
+        self.epoch_file = Path(epoch_file) if epoch_file else None
+        self._entries: "OrderedDict[str, Tuple[float, Identity]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = self._read_epoch()
+        self._epoch_checked = time.monotonic()
+        self.hits = self.misses = 0
+
+    def _read_epoch(self) -> int:
+        try:
+            return self.epoch_file.stat().st_mtime_ns if self.epoch_file else 0
+        except FileNotFoundError:
+            return 0
+
+    def _check_epoch(self, now: float) -> None:
+        if self.epoch_file is None or now - self._epoch_checked < 1.0:
+            return
+        self._epoch_checked = now
+        epoch = self._read_epoch()
+        if epoch != self._epoch:
+            self._epoch = epoch
+            self._entries.clear()
+
+    def get(self, token: str) -> Optional[Identity]:
+        now = time.monotonic()
+        with self._lock:
+            self._check_epoch(now)
+            hit = self._entries.get(token)
+            if hit is None or hit[0] <= now:
+                if hit is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return hit[1]
+
+    def put(self, token: str, identity: Identity, token_exp: Optional[float] = None) -> None:
+        if self.ttl_s <= 0 or self.max_size <= 0:
+            return
+        now = time.monotonic()
+        expires = now + self.ttl_s
+        if token_exp is not None:
+            expires = min(expires, now + (token_exp - time.time()))
+        with self._lock:
+            self._entries[token] = (expires, identity)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop ``user_id``'s tokens here and tell other processes to flush."""
+        with self._lock:
+            for token in [t for t, (_, ident) in self._entries.items() if ident.get("id") == user_id]:
+                del self._entries[token]
+        if self.epoch_file is not None:
+            self.epoch_file.parent.mkdir(parents=True, exist_ok=True)
+            self.epoch_file.touch()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_s = get_settings()
+IDENTITIES = IdentityCache(_s.AUTH_CACHE_TTL_S, _s.AUTH_CACHE_SIZE, _s.AUTH_EPOCH_FILE)
@@ -0,0 +1,171 @@
+"""
+In-process metrics in the Prometheus text format (no client library or
+push gateway needed; scrape GET /metrics).
+
+Counters and histograms are updated inline. Gauges that describe other
+components (DB pool, render queue, Gw pool) are read by collectors at scrape
+time. ``stage()`` times one step of a render: it feeds the
+``gw_render_stage_seconds`` histogram and, when a request trace is active,
+the per-request breakdown used by the slow-request log.
+"""
+from __future__ import annotations
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+Labels = Tuple[str, ...]
+Sample = Tuple[Dict[str, str], float]
+# (name, type, help, samples); histogram collectors pass pre-rendered lines instead
+Family = Tuple[str, str, str, List[Sample]]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _fmt_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                    for k, v in labels.items())
+    return "{" + body + "}"
+
+
+def _fmt_value(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def lines(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for labels, v in items:
+            yield f"{self.name}{_fmt_labels(dict(zip(self.labelnames, labels)))} {_fmt_value(v)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, List[float]] = {}  # per-bucket counts..., +Inf, sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = next((i for i, b in enumerate(self.buckets) if value <= b), len(self.buckets))
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            s[i] += 1
+            s[-1] += value
+
+    def lines(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for labels, s in items:
+            yield from histogram_lines(self.name, dict(zip(self.labelnames, labels)),
+                                       self.buckets, s[:-1], s[-1])
+
+
+def histogram_lines(name: str, labels: Dict[str, str], buckets: Sequence[float],
+                    counts: Sequence[float], total: float) -> Iterator[str]:
+    """Exposition lines for one histogram series from non-cumulative bucket counts
+    (the last count being the +Inf overflow)."""
+    acc = 0.0
+    for b, n in zip([*map(_fmt_value, buckets), "+Inf"], counts):
+        acc += n
+        yield f"{name}_bucket{_fmt_labels({**labels, 'le': b})} {_fmt_value(acc)}"
+    yield f"{name}_sum{_fmt_labels(labels)} {_fmt_value(total)}"
+    yield f"{name}_count{_fmt_labels(labels)} {_fmt_value(acc)}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Callable[[], Iterable]) -> Callable[[], Iterable]:
+        """``fn`` yields Family tuples (gauges) or raw exposition lines (str)."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        out: List[str] = []
+        for m in self._metrics:
+            out.extend(m.lines())
+        for fn in self._collectors:
+            try:
+                items = list(fn())
+            except Exception as e:  # a broken collector must not break the scrape
+                out.append(f"# collector {getattr(fn, '__name__', fn)} failed: {e!r}".replace("\n", " "))
+                continue
+            for item in items:
+                if isinstance(item, str):
+                    out.append(item)
+                    continue
+                name, kind, help, samples = item
+                out.append(f"# HELP {name} {help}")
+                out.append(f"# TYPE {name} {kind}")
+                out.extend(f"{name}{_fmt_labels(l)} {_fmt_value(v)}" for l, v in samples)
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "gw_http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status")))
+RENDER_STAGE = REGISTRY.register(Histogram(
+    "gw_render_stage_seconds", "Time spent in each render stage.", ("stage",)))
+ARTIFACT_CACHE = REGISTRY.register(Counter(
+    "gw_artifact_cache_total", "Artifact lookups: db = RenderArtifact rows, store = blob files.",
+    ("layer", "result")))
+
+# -----------------------------
+# Per-request traces
+# -----------------------------
+_TRACE: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "gw_trace", default=None)
+
+
+def start_trace() -> contextvars.Token:
+    return _TRACE.set([])
+
+
+def end_trace(token: contextvars.Token) -> List[Tuple[str, float]]:
+    stages = _TRACE.get() or []
+    _TRACE.reset(token)
+    return stages
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time one render stage. Trace lists are shared by reference, so stages run
+    on executor threads (which copy the context) land in the request's trace."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        RENDER_STAGE.observe(dt, name)
+        trace = _TRACE.get()
+        if trace is not None:
+            trace.append((name, dt))
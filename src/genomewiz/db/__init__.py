@@ -0,0 +1 @@
+from genomewiz.db.base import Base, SessionLocal, engine, get_db, get_async_db
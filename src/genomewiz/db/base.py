@@ -1,11 +1,127 @@
+import threading
+import time
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 from sqlalchemy import create_engine
-from genomewiz.core.config import get_settings
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from genomewiz.core.config import Settings, get_settings
 
 class Base(DeclarativeBase): pass
 
 settings = get_settings()
-engine = create_engine(settings.database_url, echo=False, future=True)
+
+# -----------------------------
+# Pool instrumentation
+# -----------------------------
+class PoolStats:
+    """Checkout wait times for one pool (seconds)."""
+    BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.buckets = [0] * (len(self.BUCKETS) + 1)
+
+    def observe(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_sum += waited
+            self.wait_max = max(self.wait_max, waited)
+            i = next((i for i, b in enumerate(self.BUCKETS) if waited <= b), len(self.BUCKETS))
+            self.buckets[i] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_sum": self.wait_sum,
+                "wait_seconds_max": self.wait_max,
+                "wait_seconds_buckets": dict(zip([*map(str, self.BUCKETS), "+Inf"], self.buckets)),
+            }
+
+class _TimedPool:
+    """Time how long each checkout waits for a free connection."""
+    stats: PoolStats
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeout:
+            self.stats.observe(time.perf_counter() - t0, timed_out=True)
+            raise
+        self.stats.observe(time.perf_counter() - t0)
+        return conn
+
+    def recreate(self):
+        new = super().recreate()
+        new.stats = self.stats
+        return new
+
+class TimedQueuePool(_TimedPool, QueuePool): pass
+class TimedAsyncQueuePool(_TimedPool, AsyncAdaptedQueuePool): pass
+
+# -----------------------------
+# Engine factory
+# -----------------------------
+def _connect_args(url: str, cfg: Settings) -> dict:
+    """Server-side prepared statements. PgBouncer in transaction mode cannot
+    keep them across transactions, so DB_PGBOUNCER turns them off."""
+    n = 0 if cfg.DB_PGBOUNCER else cfg.DB_STATEMENT_CACHE_SIZE
+    if url.startswith("postgresql+asyncpg"):
+        return {"prepared_statement_cache_size": n, **({"statement_cache_size": 0} if not n else {})}
+    if url.startswith("postgresql+psycopg:") or url.startswith("postgresql+psycopg_async"):
+        # psycopg 3 prepares a statement server-side once it has run prepare_threshold times
+        return {"prepare_threshold": cfg.DB_PREPARE_THRESHOLD if n else None}
+    return {}
+
+def engine_kwargs(url: str, cfg: Settings, *, is_async: bool) -> dict:
+    if url.startswith("sqlite"):
+        return {}  # SQLAlchemy picks the right pool for file/memory databases
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": cfg.DB_POOL_SIZE,
+        "max_overflow": cfg.DB_MAX_OVERFLOW,
+        "pool_timeout": cfg.DB_POOL_TIMEOUT,
+        "pool_recycle": cfg.DB_POOL_RECYCLE,
+        "pool_pre_ping": cfg.DB_POOL_PRE_PING,
+        "connect_args": _connect_args(url, cfg),
+    }
+
+def make_engine(url: str | None = None, cfg: Settings | None = None, *, is_async: bool = False):
+    """The one place engines are created, so every pool gets the same settings."""
+    cfg = cfg or settings
+    url = url or (cfg.async_database_uri if is_async else cfg.database_uri)
+    eng = (create_async_engine if is_async else create_engine)(
+        url, echo=False, **engine_kwargs(url, cfg, is_async=is_async))
+    pool = (eng.sync_engine if is_async else eng).pool
+    if isinstance(pool, _TimedPool):
+        pool.stats = PoolStats()
+    return eng
+
+def pool_stats(eng: Engine | AsyncEngine) -> dict:
+    """In-use/idle/overflow counts plus checkout wait times for an engine's pool."""
+    pool = eng.sync_engine.pool if isinstance(eng, AsyncEngine) else eng.pool
+    out = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, name, None)
+        if callable(fn):
+            out[name] = fn()
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        out.update(stats.snapshot())
+    return out
+
+engine = make_engine()
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
 def get_db():
@@ -14,3 +130,25 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def dialect_insert(dialect: str):
+    """The ``insert`` construct with ON CONFLICT support for this dialect."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Upsert not supported for dialect {dialect!r}")
+    return insert
+
+# -----------------------------
+# Async engine (used by the API routers)
+# -----------------------------
+async_engine = make_engine(is_async=True)
+# expire_on_commit=False: handlers return ORM rows after commit, and an
+# expired attribute cannot be lazy-loaded outside the greenlet
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
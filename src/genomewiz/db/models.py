@@ -1,7 +1,8 @@
-from sqlalchemy import String, Integer, Text, JSON, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import String, Integer, BigInteger, Float, Text, JSON, LargeBinary, ForeignKey, DateTime, UniqueConstraint, Index, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from genomewiz.db.base import Base
+from genomewiz.services.intervals import reg2bin, sv_span
 
 class Sample(Base):
     __tablename__ = "samples"
@@ -25,9 +26,28 @@ class SVCandidate(Base):
     caller: Mapped[str | None] = mapped_column(String, nullable=True)
     features_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     evidence_paths: Mapped[dict | None] = mapped_column(JSON, nullable=True)  # {"png": "...", "svg": "..."}
+    # derived from chrom/pos1/pos2/svtype on flush (see services/intervals.py)
+    span_end: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    bin: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # incremental training-set exports (services/parquet_export.py)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime, default=datetime.utcnow,
+                                                        onupdate=datetime.utcnow, nullable=True, index=True)
 
     sample: Mapped["Sample"] = relationship("Sample")
 
+    __table_args__ = (
+        Index("ix_sv_chrom_bin_pos1", "chrom", "bin", "pos1"),  # region overlap
+        Index("ix_sv_chrom_pos1_id", "chrom", "pos1", "id"),    # keyset order
+        Index("ix_sv_size", "size"),
+    )
+
+@event.listens_for(SVCandidate, "before_insert")
+@event.listens_for(SVCandidate, "before_update")
+def _sv_bin(mapper, connection, sv: SVCandidate) -> None:
+    start, end = sv_span(sv.chrom, sv.pos1, sv.pos2, sv.svtype)
+    sv.span_end = end
+    sv.bin = reg2bin(start, end)
+
 class Curator(Base):
     __tablename__ = "curators"
     id: Mapped[str] = mapped_column(String, primary_key=True)  # internal UUID or Google sub
@@ -68,4 +88,53 @@ class Consensus(Base):
     prob: Mapped[float] = mapped_column()
     n_curators: Mapped[int] = mapped_column(Integer)
     method: Mapped[str] = mapped_column(String)  # "dawid-skene" ...
+    counts_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)  # {"True": 3, "Artifact": 1}
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class RenderJob(Base):
+    __tablename__ = "render_jobs"
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    kind: Mapped[str] = mapped_column(String)  # "sv" | "evidence"
+    target_id: Mapped[str] = mapped_column(String, index=True)
+    format: Mapped[str] = mapped_column(String)  # png | svg
+    content_hash: Mapped[str] = mapped_column(String, index=True)
+    params_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)  # width/height/dpi
+    status: Mapped[str] = mapped_column(String, default="queued", index=True)  # queued|running|done|failed
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    result_path: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SVReadSummary(Base):
+    """Read evidence around an SV, computed from the BAM (services/read_evidence.py)."""
+    __tablename__ = "sv_read_summaries"
+    sv_id: Mapped[str] = mapped_column(ForeignKey("sv_candidates.id", ondelete="CASCADE"), primary_key=True)
+    split_reads: Mapped[int] = mapped_column(Integer)
+    discordant_pairs: Mapped[int] = mapped_column(Integer)
+    mean_depth: Mapped[float] = mapped_column(Float)
+    coverage_drop: Mapped[float | None] = mapped_column(Float, nullable=True)  # 1 - inside/flanks; <0 for gains
+    panels_json: Mapped[list] = mapped_column(JSON)  # [[chrom, start, end], ...] the scanned windows
+    bin_size: Mapped[int] = mapped_column(Integer)
+    coverage: Mapped[bytes] = mapped_column(LargeBinary)  # per-bin mean depth, uint16 LE, panels concatenated
+    bam_mtime: Mapped[float] = mapped_column(Float)  # recomputed when the BAM changes
+    computed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class QueueLease(Base):
+    """An SV handed to a curator by the curation queue, until labelled or expired.
+    The primary key is what stops two API processes assigning the same SV."""
+    __tablename__ = "queue_leases"
+    sv_id: Mapped[str] = mapped_column(ForeignKey("sv_candidates.id", ondelete="CASCADE"), primary_key=True)
+    curator_id: Mapped[str] = mapped_column(String, index=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+class ChangeLog(Base):
+    """One entry per written Label/Consensus row, in commit order (services/changes.py)."""
+    __tablename__ = "change_log"
+    seq: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    table: Mapped[str] = mapped_column(String)  # "labels" | "consensus" | "annotation" | "evidence_consensus"
+    row_id: Mapped[str] = mapped_column(String)
+    op: Mapped[str] = mapped_column(String, default="upsert")  # upsert | delete
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # SQLite would otherwise reuse the seqs of pruned entries
+    __table_args__ = {"sqlite_autoincrement": True}
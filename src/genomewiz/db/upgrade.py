@@ -0,0 +1,117 @@
+"""
+Bring an existing database up to the current models.
+
+``create_all`` only creates missing tables, so columns added to existing tables
+(``sv_candidates.span_end``/``bin``/``updated_at``, ``consensus.counts_json``)
+never reach databases created before them. ``upgrade`` adds any missing
+columns and indexes with ALTER TABLE, then backfills the derived values that
+old rows lack. Safe to re-run.
+"""
+from __future__ import annotations
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import bindparam, func, inspect, or_, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+from genomewiz.db.base import Base
+from genomewiz.db import models
+from genomewiz.services.intervals import reg2bin, sv_span
+
+BATCH_SIZE = 10_000
+
+
+def add_missing_columns(eng: Engine) -> List[str]:
+    """Create missing tables, then ALTER TABLE ADD COLUMN / CREATE INDEX for
+    anything the models have and the database lacks. Returns what was added."""
+    Base.metadata.create_all(bind=eng)
+    added = []
+    with eng.begin() as conn:
+        insp = inspect(conn)
+        q = conn.dialect.identifier_preparer.quote
+        for table in Base.metadata.sorted_tables:
+            have = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in have:
+                    continue
+                # new columns are nullable; NOT NULL ones are filled by the backfill
+                ddl = col.type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {q(table.name)} ADD COLUMN {q(col.name)} {ddl}"))
+                added.append(f"{table.name}.{col.name}")
+            indexes = {i["name"] for i in insp.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    conn.execute(CreateIndex(index))
+                    added.append(f"{table.name}:{index.name}")
+    return added
+
+
+def backfill_sv_bins(db: Session, batch_size: int = BATCH_SIZE) -> int:
+    """Recompute span_end/bin for SVs loaded before they existed. Commits per batch."""
+    sv = models.SVCandidate.__table__
+    stmt = (update(sv).where(sv.c.id == bindparam("_id"))
+            .values(span_end=bindparam("_end"), bin=bindparam("_bin")))
+    n = 0
+    after = ""
+    while True:
+        rows = db.execute(
+            select(sv.c.id, sv.c.chrom, sv.c.pos1, sv.c.pos2, sv.c.svtype)
+            .where(or_(sv.c.bin.is_(None), sv.c.span_end.is_(None)), sv.c.id > after)
+            .order_by(sv.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return n
+        params = []
+        for r in rows:
+            start, end = sv_span(r.chrom, r.pos1, r.pos2, r.svtype)
+            params.append({"_id": r.id, "_end": end, "_bin": reg2bin(start, end)})
+        db.connection().execute(stmt, params)
+        db.commit()
+        n += len(rows)
+        after = rows[-1].id
+
+
+def backfill_updated_at(db: Session) -> int:
+    """Stamp SVs without updated_at, so the next incremental export includes them. Commits."""
+    sv = models.SVCandidate.__table__
+    n = db.execute(update(sv).where(sv.c.updated_at.is_(None)).values(updated_at=datetime.utcnow())).rowcount
+    db.commit()
+    return n
+
+
+def backfill_consensus_counts(db: Session) -> int:
+    """Fill consensus.counts_json from the labels, keeping label/prob/method. Commits."""
+    cons = models.Consensus.__table__
+    missing = set(db.scalars(select(cons.c.sv_id).where(cons.c.counts_json.is_(None))))
+    if not missing:
+        return 0
+    counts: Dict[str, Dict[str, int]] = {sv_id: {} for sv_id in missing}
+    for sv_id, outcome, k in db.execute(
+        select(models.Label.sv_id, models.Label.outcome, func.count())
+        .group_by(models.Label.sv_id, models.Label.outcome)
+    ):
+        if sv_id in counts:
+            counts[sv_id][outcome] = k
+    db.connection().execute(
+        update(cons).where(cons.c.sv_id == bindparam("_id")).values(counts_json=bindparam("_counts")),
+        [{"_id": sv_id, "_counts": c} for sv_id, c in counts.items()],
+    )
+    db.commit()
+    return len(counts)
+
+
+def upgrade(eng: Engine, batch_size: int = BATCH_SIZE) -> Dict[str, object]:
+    """Add missing columns/indexes and backfill them."""
+    added = add_missing_columns(eng)
+    db = Session(eng)
+    try:
+        return {
+            "added": added,
+            "sv_updated_at": backfill_updated_at(db),
+            "sv_bins": backfill_sv_bins(db, batch_size),
+            "consensus_counts": backfill_consensus_counts(db),
+        }
+    finally:
+        db.close()
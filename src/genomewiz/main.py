@@ -1,7 +1,13 @@
-from fastapi import FastAPI, Depends
+import logging
+import time
+from fastapi import FastAPI, Depends, Request
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.sessions import SessionMiddleware
 
-from .db.base import Base, engine
+from .db.base import Base, PoolStats, SessionLocal, engine, async_engine, pool_stats
+from .db import models
 from .core.config import get_settings
 from .core.auth import require_curator_or_admin, require_admin
 from .routers import sv as sv_router
@@ -9,8 +15,19 @@ from .routers import labels as labels_router
 from .routers import consensus  as consensus_router
 from .routers import auth as auth_router
 from .routers import evidence as evidence_router
+from .routers import annotation as annotation_router
+from .routers import export as export_router
+from .routers import tiles as tiles_router
+from .routers import queue as queue_router
+from .routers import training as training_router
+from .routers import changes as changes_router
 
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from .services.render_executor import RenderBusy, get_executor
+from .services.singleflight import FLIGHT
+from .services.curation_queue import QUEUE
+from .core import metrics
+from .core.identity_cache import IDENTITIES
 
 from starlette.middleware.sessions import SessionMiddleware
 from .core.config import get_settings
@@ -32,19 +49,121 @@ Base.metadata.create_all(bind=engine)
 s = get_settings()
 app.add_middleware(SessionMiddleware, secret_key=s.session_secret, https_only=False)
 
+log = logging.getLogger("genomewiz.requests")
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    token = metrics.start_trace()
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        dt = time.perf_counter() - t0
+        stages = metrics.end_trace(token)
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        metrics.HTTP_LATENCY.observe(dt, request.method, route, str(status))
+        if settings.SLOW_REQUEST_MS and dt * 1000 >= settings.SLOW_REQUEST_MS:
+            log.warning("slow request %s %s -> %s in %.0f ms; stages: %s", request.method,
+                        request.url.path, status, dt * 1000,
+                        ", ".join(f"{name}={t * 1000:.1f}ms" for name, t in stages) or "none")
+
+@metrics.REGISTRY.collector
+def _runtime_metrics():
+    pools = {name: pool_stats(eng) for name, eng in (("sync", engine), ("async", async_engine))}
+    yield ("gw_db_pool_connections", "gauge", "Pooled DB connections by state.",
+           [({"engine": name, "state": state}, max(0, p.get(key, 0)))
+            for name, p in pools.items()
+            for state, key in (("in_use", "checkedout"), ("idle", "checkedin"), ("overflow", "overflow"))])
+    timed = {name: p for name, p in pools.items() if "checkouts" in p}
+    if timed:
+        yield ("gw_db_pool_timeouts_total", "counter", "Checkouts that hit pool_timeout.",
+               [({"engine": name}, p["timeouts"]) for name, p in timed.items()])
+        yield "# HELP gw_db_pool_wait_seconds Time spent waiting for a pooled connection."
+        yield "# TYPE gw_db_pool_wait_seconds histogram"
+        for name, p in timed.items():
+            yield from metrics.histogram_lines("gw_db_pool_wait_seconds", {"engine": name}, PoolStats.BUCKETS,
+                                               list(p["wait_seconds_buckets"].values()),
+                                               p["wait_seconds_sum"])
+    ex = get_executor().stats()
+    yield ("gw_render_executor_pending", "gauge", "Renders running or waiting in this process.",
+           [({}, ex["pending"])])
+    yield ("gw_render_executor_workers", "gauge", "Concurrent render slots.", [({}, ex["workers"])])
+    db = SessionLocal()
+    try:
+        depth = dict(db.query(models.RenderJob.status, func.count()).group_by(models.RenderJob.status))
+    finally:
+        db.close()
+    yield ("gw_render_jobs", "gauge", "Background render jobs by status.",
+           [({"status": s}, n) for s, n in depth.items()])
+    yield ("gw_singleflight_total", "counter", "Render single-flight outcomes.",
+           [({"outcome": k}, v) for k, v in FLIGHT.stats().items() if k != "in_flight"])
+    ids = IDENTITIES.stats()
+    yield ("gw_identity_cache_total", "counter", "Token identity cache lookups.",
+           [({"result": "hit"}, ids["hits"]), ({"result": "miss"}, ids["misses"])])
+    try:
+        from .services.gwplot_renderer import _POOL
+    except ImportError:
+        return
+    gp = _POOL.stats()
+    yield ("gw_gwpool_checkouts_total", "counter", "Warm Gw pool checkouts.",
+           [({"result": "hit"}, gp["hits"]), ({"result": "miss"}, gp["misses"]),
+            ({"result": "invalidated"}, gp["invalidations"])])
+    yield ("gw_gwpool_idle", "gauge", "Idle warm Gw instances.", [({}, gp["idle"])])
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.exception_handler(RenderBusy)
+async def render_busy(request, exc: RenderBusy):
+    # Backpressure: shed load instead of letting renders pile up
+    return JSONResponse(status_code=503, content={"detail": str(exc)},
+                        headers={"Retry-After": str(exc.retry_after)})
+
+@app.on_event("startup")
+async def load_curation_queue():
+    # the one full scan, off the event loop; later writes arrive incrementally
+    def load():
+        db = SessionLocal()
+        try:
+            QUEUE.rebuild(db)
+        except SQLAlchemyError as e:  # e.g. tables not created yet: built on first use instead
+            logging.getLogger(__name__).warning("curation queue not loaded at startup: %s", e)
+        finally:
+            db.close()
+    await run_in_threadpool(load)
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_engine.dispose()
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/health/db-pool")
+def health_db_pool():
+    """Connection pool occupancy and checkout wait times, per engine (this process only)."""
+    return {"sync": pool_stats(engine), "async": pool_stats(async_engine)}
+
 # Public auth routes
-app.include_router(auth_router)
+app.include_router(auth_router.router)
 
 # Protected routes (example usage of role guards)
 # You can also place Depends in each handler if you prefer fine-grained control
-app.include_router(sv_router, dependencies=[Depends(require_curator_or_admin)])
-app.include_router(labels_router, dependencies=[Depends(require_curator_or_admin)])
-app.include_router(consensus_router, dependencies=[Depends(require_curator_or_admin)])
-app.include_router(evidence_router, dependencies=[Depends(require_curator_or_admin)])
+app.include_router(sv_router.router, dependencies=[Depends(require_curator_or_admin)])
+app.include_router(labels_router.router, dependencies=[Depends(require_curator_or_admin)])
+app.include_router(consensus_router.router, dependencies=[Depends(require_curator_or_admin)])
+app.include_router(evidence_router.router, dependencies=[Depends(require_curator_or_admin)])
+app.include_router(annotation_router.router, dependencies=[Depends(require_curator_or_admin)])
+app.include_router(export_router.router, dependencies=[Depends(require_curator_or_admin)])
+app.include_router(tiles_router.router, dependencies=[Depends(require_curator_or_admin)])
+app.include_router(queue_router.router, dependencies=[Depends(require_curator_or_admin)])
+app.include_router(training_router.router, dependencies=[Depends(require_curator_or_admin)])
+app.include_router(changes_router.router, dependencies=[Depends(require_curator_or_admin)])
 
 
 @app.get("/auth/signed-in", response_class=HTMLResponse)
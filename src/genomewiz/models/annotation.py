@@ -0,0 +1,23 @@
+import uuid
+from typing import Optional
+from sqlalchemy import String, Text, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base, TimestampMixin
+
+
+class Annotation(Base, TimestampMixin):
+	"""One curator's vote on an evidence row (folded into evidence_consensus)."""
+	__tablename__ = "annotation"
+
+
+	id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+	evidence_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("evidence.id", ondelete="CASCADE"), nullable=False, index=True)
+	user_id: Mapped[str] = mapped_column(String(100), nullable=False)
+	label: Mapped[str] = mapped_column(String(20), nullable=False)  # LIKELY_TRUE | UNCERTAIN | LIKELY_FALSE
+	notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+
+	__table_args__ = (
+		UniqueConstraint("evidence_id", "user_id", name="uq_annotation_user"),
+	)
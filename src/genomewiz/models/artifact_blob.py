@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy import String, Integer, BigInteger, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base, TimestampMixin
+
+
+class ArtifactBlob(Base, TimestampMixin):
+	__tablename__ = "artifact_blob"
+
+
+	content_hash: Mapped[str] = mapped_column(String(128), primary_key=True)
+	format: Mapped[str] = mapped_column(String(10), nullable=False)
+	size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+	hits: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+	last_access: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
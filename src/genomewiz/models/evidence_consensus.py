@@ -0,0 +1,18 @@
+import uuid
+from sqlalchemy import String, Integer, Float, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base, TimestampMixin
+
+
+class EvidenceConsensus(Base, TimestampMixin):
+	"""Materialized vote tally for an evidence row, updated on each Annotation."""
+	__tablename__ = "evidence_consensus"
+
+
+	evidence_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("evidence.id", ondelete="CASCADE"), primary_key=True)
+	label: Mapped[str] = mapped_column(String(20), nullable=False)
+	prob: Mapped[float] = mapped_column(Float, nullable=False)
+	n_curators: Mapped[int] = mapped_column(Integer, nullable=False)
+	method: Mapped[str] = mapped_column(String(20), nullable=False)
+	counts: Mapped[dict] = mapped_column(JSONB, nullable=False)
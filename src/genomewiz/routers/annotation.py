@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from ..db import get_db
 from ..config import settings
 from ..models.annotation import Annotation
 from ..models.evidence import Evidence
 from ..schemas.annotation import AnnotationCreate, AnnotationOut
+from ..services.changes import log_changes
+from ..services.consensus import record_annotation
 
 router = APIRouter(prefix="/annotation", tags=["annotation"])
 
@@ -23,9 +26,12 @@ def add_annotation(body: AnnotationCreate, db: Session = Depends(get_db),
     ann = Annotation(**body.model_dump())
     db.add(ann)
     try:
-        db.commit()
-    except Exception:
+        db.flush()
+    except IntegrityError:  # uq_annotation_user
         db.rollback()
         raise HTTPException(status_code=409, detail="User already annotated this evidence")
+    record_annotation(db, ann.evidence_id, ann.label)  # other failures: 500, rolled back by get_db
+    log_changes(db, "annotation", [ann.id])
+    db.commit()
     db.refresh(ann)
     return ann
@@ -0,0 +1,28 @@
+import json
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from genomewiz.db.base import SessionLocal
+from genomewiz.services import changes
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+@router.get("")
+def change_feed(since: int = Query(0, ge=0, description="Last seq already applied"),
+                limit: int = Query(changes.DEFAULT_LIMIT, ge=1, le=100_000)):
+    """
+    Label/consensus changes after ``since`` as NDJSON: one line per changed
+    row (``{"seq", "table", "op", "id", "row"}``), then a trailer
+    ``{"cursor", "more"}``. Pass ``cursor`` as the next ``since``.
+    """
+    def stream():
+        db = SessionLocal()
+        try:
+            cursor = since
+            for page, cursor in changes.iter_changes(db, since, limit=limit):
+                for c in page:
+                    yield json.dumps(c) + "\n"
+            yield json.dumps({"cursor": cursor, "more": changes.latest_seq(db) > cursor}) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
@@ -1,14 +1,13 @@
 from fastapi import APIRouter, Depends, Header, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
-from ..db import get_db
+from ..db.base import get_async_db
+from ..db import models
 from ..config import settings
-from ..models.annotation import Annotation
 from ..models.evidence import Evidence
-from collections import Counter
+from ..models.evidence_consensus import EvidenceConsensus
 
 router = APIRouter(prefix="/consensus", tags=["consensus"])
-LABELS = ["LIKELY_TRUE", "UNCERTAIN", "LIKELY_FALSE"]
 
 def check_auth(authorization: str | None):
     if not authorization or not authorization.startswith("Bearer "):
@@ -16,16 +15,28 @@ def check_auth(authorization: str | None):
     if authorization.split(" ", 1)[1] != (settings.api_token or ""):
         raise HTTPException(status_code=403, detail="Invalid token")
 
+@router.get("/sv/{sv_id}")
+async def get_sv_consensus(sv_id: str, db: AsyncSession = Depends(get_async_db),
+                     authorization: str | None = Header(default=None)):
+    check_auth(authorization)
+    row = await db.get(models.Consensus, sv_id)
+    if row is None:
+        if not await db.get(models.SVCandidate, sv_id):
+            raise HTTPException(status_code=404, detail="SV not found")
+        return {"sv_id": sv_id, "label": "Unclear", "prob": 0.0, "n_curators": 0,
+                "method": None, "scores": {}, "updated_at": None}
+    return {"sv_id": sv_id, "label": row.label, "prob": row.prob, "n_curators": row.n_curators,
+            "method": row.method, "scores": row.counts_json or {}, "updated_at": row.updated_at}
+
 @router.get("/{evidence_id}")
-def get_consensus(evidence_id: UUID, db: Session = Depends(get_db),
+async def get_consensus(evidence_id: UUID, db: AsyncSession = Depends(get_async_db),
                   authorization: str | None = Header(default=None)):
     check_auth(authorization)
-    if not db.get(Evidence, evidence_id):
-        raise HTTPException(status_code=404, detail="Evidence not found")
-    labels = [a.label for a in db.query(Annotation).filter(Annotation.evidence_id == evidence_id).all()]
-    counts = Counter(labels)
-    if counts:
-        label = max(LABELS, key=lambda L: (counts[L], -LABELS.index(L)))
-    else:
-        label = "UNCERTAIN"
-    return {"evidence_id": str(evidence_id), "label": label, "scores": dict(counts), "n_votes": len(labels)}
+    row = await db.get(EvidenceConsensus, evidence_id)
+    if row is None:
+        # no votes yet (or unknown evidence) - only now pay for the existence check
+        if not await db.get(Evidence, evidence_id):
+            raise HTTPException(status_code=404, detail="Evidence not found")
+        return {"evidence_id": str(evidence_id), "label": "UNCERTAIN", "scores": {}, "n_votes": 0}
+    return {"evidence_id": str(evidence_id), "label": row.label, "scores": row.counts,
+            "n_votes": sum(row.counts.values())}
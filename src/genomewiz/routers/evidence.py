@@ -1,17 +1,23 @@
 # src/genomewiz/routers/evidence.py
 
-from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Header, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from uuid import UUID
-from ..db import get_db
+from ..db.base import get_async_db
 from ..config import settings
-from ..schemas.evidence import EvidenceCreate, EvidenceOut, RenderRequest, ArtifactOut
+from ..schemas.evidence import EvidenceCreate, EvidenceOut, RenderRequest, ArtifactOut, RenderJobOut
 from ..models.evidence import Evidence
 from ..models.render_artifact import RenderArtifact
-from ..utils.hashing import stable_hash
-from ..services.storage import artifact_path
-from ..services.gwplot_renderer import render_png, render_svg_file
+from ..services.utils.hashing import stable_hash
+from ..services.render_queue import check_depth, enqueue, enqueue_evidence, evidence_region
+from ..services.storage import touch_blob
+from ..services.delivery import ARTIFACTS, MEDIA_TYPES, ArtifactRef, blob_response
+from ..services.singleflight import FLIGHT
+from ..core.metrics import ARTIFACT_CACHE
+from ..db.models import RenderJob
 
 router = APIRouter(prefix="/evidence", tags=["evidence"])
 
@@ -23,7 +29,7 @@ def check_auth(authorization: str | None):
         raise HTTPException(status_code=403, detail="Invalid token")
 
 @router.post("/", response_model=EvidenceOut)
-def create_evidence(payload: EvidenceCreate, db: Session = Depends(get_db), authorization: str | None = Header(default=None)):
+async def create_evidence(payload: EvidenceCreate, db: AsyncSession = Depends(get_async_db), authorization: str | None = Header(default=None)):
     check_auth(authorization)
     ev = Evidence(
         title=payload.title,
@@ -34,79 +40,88 @@ def create_evidence(payload: EvidenceCreate, db: Session = Depends(get_db), auth
         status="new",
     )
     db.add(ev)
-    db.commit()
-    db.refresh(ev)
+    await db.flush()
+    await db.run_sync(enqueue_evidence, ev)  # pre-render panels in the background worker
+    await db.commit()
+    await db.refresh(ev)
     return ev
 
 @router.get("/{evidence_id}", response_model=EvidenceOut)
-def get_evidence(evidence_id: UUID, db: Session = Depends(get_db), authorization: str | None = Header(default=None)):
+async def get_evidence(evidence_id: UUID, db: AsyncSession = Depends(get_async_db), authorization: str | None = Header(default=None)):
     check_auth(authorization)
-    ev = db.get(Evidence, evidence_id)
+    ev = await db.get(Evidence, evidence_id)
     if not ev:
         raise HTTPException(status_code=404, detail="Not found")
     return ev
 
-@router.post("/{evidence_id}/render", response_model=ArtifactOut)
-def render_evidence(evidence_id: UUID, req: RenderRequest, db: Session = Depends(get_db), authorization: str | None = Header(default=None)):
+@router.post("/{evidence_id}/render", response_model=ArtifactOut,
+             responses={202: {"model": RenderJobOut, "description": "Render queued"}})
+async def render_evidence(evidence_id: UUID, req: RenderRequest, db: AsyncSession = Depends(get_async_db), authorization: str | None = Header(default=None)):
+    """Return the artifact if it is already rendered; otherwise queue a render
+    job and answer 202 with its id (poll /evidence/jobs/{job_id})."""
     check_auth(authorization)
-    ev = db.get(Evidence, evidence_id)
+    ev = await db.get(Evidence, evidence_id)
     if not ev:
         raise HTTPException(status_code=404, detail="Not found")
 
     fmt = req.format.lower()
     h = stable_hash(ev.payload, fmt=fmt, width=req.width, height=req.height, dpi=req.dpi)
-    existing = (
-        db.query(RenderArtifact)
-        .filter(RenderArtifact.evidence_id == evidence_id,
-                RenderArtifact.format == fmt,
-                RenderArtifact.content_hash == h)
-        .first()
+    existing = await db.scalar(
+        select(RenderArtifact)
+        .where(RenderArtifact.evidence_id == evidence_id,
+               RenderArtifact.format == fmt,
+               RenderArtifact.content_hash == h)
+        .limit(1)
     )
     if existing:
+        ARTIFACT_CACHE.inc("db", "hit")
+        await db.run_sync(touch_blob, h); await db.commit()
         return existing
+    ARTIFACT_CACHE.inc("db", "miss")
 
-    try:
-        if fmt == "png":
-            data = render_png(ev.payload, width=req.width, height=req.height, dpi=req.dpi)
-            p = artifact_path(str(evidence_id), h, "png")
-            with open(p, "wb"): pass
-            with open(p, "wb") as f:
-                f.write(data)
-        elif fmt == "svg":
-            svg = render_svg_file(ev.payload)  # path or text
-            p = artifact_path(str(evidence_id), h, "svg")
-            if isinstance(svg, str) and svg and svg.endswith(".svg"):
-                import shutil
-                shutil.copyfile(svg, p)
-            else:
-                with open(p, "w", encoding="utf-8") as f:
-                    f.write(svg if isinstance(svg, str) else svg.decode("utf-8"))
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported format")
-    except Exception as e:
-        ev.status = "failed"
-        db.add(ev); db.commit()
-        raise HTTPException(status_code=500, detail=f"Render failed: {e}")
-
-    art = RenderArtifact(
-        evidence_id=evidence_id,
-        format=fmt,
-        width=req.width,
-        height=req.height,
-        dpi=req.dpi,
-        content_hash=h,
-        path=str(p),
+    if evidence_region(ev.payload) is None:
+        raise HTTPException(status_code=422, detail="Evidence payload has no sample_id/chrom/start to render")
+    await db.run_sync(check_depth)
+    job = await db.run_sync(enqueue, kind="evidence", target_id=str(evidence_id), fmt=fmt, content_hash=h,
+                            params={"width": req.width, "height": req.height, "dpi": req.dpi})
+    ev.status = "rendering"
+    db.add(ev); await db.commit()
+    return JSONResponse(
+        status_code=202,
+        content=RenderJobOut.model_validate(job, from_attributes=True).model_dump(mode="json"),
+        headers={"Location": f"/evidence/jobs/{job.id}"},
     )
-    ev.status = "rendered"
-    db.add_all([art, ev]); db.commit(); db.refresh(art)
-    return art
+
+@router.get("/render/stats")
+def render_stats(authorization: str | None = Header(default=None)):
+    """Single-flight counters: how many renders were coalesced onto another."""
+    check_auth(authorization)
+    return FLIGHT.stats()
+
+@router.get("/jobs/{job_id}", response_model=RenderJobOut)
+async def get_render_job(job_id: str, db: AsyncSession = Depends(get_async_db), authorization: str | None = Header(default=None)):
+    check_auth(authorization)
+    job = await db.get(RenderJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Not found")
+    return job
 
 @router.get("/{evidence_id}/artifact/{artifact_id}")
-def download_artifact(evidence_id: UUID, artifact_id: UUID, db: Session = Depends(get_db), authorization: str | None = Header(default=None)):
+async def download_artifact(evidence_id: UUID, artifact_id: UUID, request: Request, db: AsyncSession = Depends(get_async_db), authorization: str | None = Header(default=None)):
+    """Immutable download: strong ETag from the content hash, 304 on
+    If-None-Match, Range support and optional sendfile hand-off."""
     check_auth(authorization)
-    art = db.get(RenderArtifact, artifact_id)
-    if not art or str(art.evidence_id) != str(evidence_id):
+    key = str(artifact_id)
+    ref = ARTIFACTS.get(key)
+    if ref is None:
+        art = await db.get(RenderArtifact, artifact_id)
+        if not art:
+            raise HTTPException(status_code=404, detail="Not found")
+        ref = ARTIFACTS.put(key, ArtifactRef(str(art.evidence_id), art.content_hash, art.path, art.format))
+    if ref.evidence_id != str(evidence_id):
         raise HTTPException(status_code=404, detail="Not found")
-    from fastapi.responses import FileResponse
-    return FileResponse(art.path)
-    
+    try:
+        return blob_response(request, ref.path, ref.content_hash, media_type=MEDIA_TYPES.get(ref.format))
+    except FileNotFoundError:
+        ARTIFACTS.discard(key)
+        raise HTTPException(status_code=404, detail="Artifact was evicted; render it again")
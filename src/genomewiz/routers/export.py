@@ -1,44 +1,128 @@
-from fastapi import APIRouter, Depends, Header, HTTPException
-from sqlalchemy.orm import Session
-from ..db import get_db
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, func, or_, select
+from datetime import datetime
+from typing import AsyncIterator, List
+from uuid import UUID
+import csv
+import io
+import json
+from ..db.base import AsyncSessionLocal
 from ..config import settings
 from ..models.evidence import Evidence
 from ..models.annotation import Annotation
 
 router = APIRouter(prefix="/export", tags=["export"])
 
+LABELS = ["LIKELY_TRUE", "UNCERTAIN", "LIKELY_FALSE"]
+CSV_COLUMNS = ["evidence_id", "chrom1", "pos1", "chrom2", "pos2", "svtype", "length",
+               "consensus_label", "n_votes", *LABELS, "support", "provenance"]
+PAGE_SIZE = 1000
+
 def check_auth(authorization: str | None):
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing bearer token")
     if authorization.split(" ", 1)[1] != (settings.api_token or ""):
         raise HTTPException(status_code=403, detail="Invalid token")
 
+def _page_query(etypes: List[str], min_votes: int, since: datetime | None,
+                after: UUID | None, page_size: int):
+    """One page of evidence rows with their vote counts, aggregated in SQL
+    (one GROUP BY instead of a query per row), ordered by id for keyset paging.
+    Evidence without votes is kept (outer join) for ``min_votes=0``."""
+    n_votes = func.count(Annotation.id).label("n_votes")
+    q = (
+        select(
+            Evidence.id,
+            Evidence.payload,
+            *[func.sum(case((Annotation.label == L, 1), else_=0)).label(L) for L in LABELS],
+            n_votes,
+        )
+        .outerjoin(Annotation, Annotation.evidence_id == Evidence.id)
+        .where(Evidence.etype.in_(etypes))
+        .group_by(Evidence.id)
+        .having(func.count(Annotation.id) >= min_votes)
+        .order_by(Evidence.id)
+        .limit(page_size)
+    )
+    if after is not None:
+        q = q.where(Evidence.id > after)
+    if since is not None:
+        q = q.having(or_(func.max(Evidence.updated_at) >= since,
+                         func.max(Annotation.updated_at) >= since))
+    return q
+
+def _to_row(r) -> dict:
+    counts = {L: int(getattr(r, L) or 0) for L in LABELS}
+    p = r.payload or {}
+    return {
+        "evidence_id": str(r.id),
+        "chrom1": p.get("chrom1"),
+        "pos1": p.get("pos1"),
+        "chrom2": p.get("chrom2"),
+        "pos2": p.get("pos2"),
+        "svtype": p.get("svtype"),
+        "length": p.get("length"),
+        "support": p.get("support", {}),
+        "consensus_label": max(counts, key=counts.get),
+        "n_votes": int(r.n_votes),
+        **counts,
+        "provenance": p.get("provenance", {}),
+    }
+
+async def _iter_rows(etypes: List[str], min_votes: int, since: datetime | None,
+                     after: UUID | None, limit: int | None) -> AsyncIterator[dict]:
+    # A session of its own, opened when streaming starts and held for the
+    # whole response; only one page is held in memory at a time.
+    async with AsyncSessionLocal() as s:
+        sent = 0
+        while True:
+            size = PAGE_SIZE if limit is None else min(PAGE_SIZE, limit - sent)
+            if size <= 0:
+                return
+            page = (await s.execute(_page_query(etypes, min_votes, since, after, size))).all()
+            for r in page:
+                yield _to_row(r)
+            sent += len(page)
+            if len(page) < size:
+                return
+            after = page[-1].id
+            s.expunge_all()
+
+async def _ndjson(rows: AsyncIterator[dict]) -> AsyncIterator[str]:
+    async for row in rows:
+        yield json.dumps(row) + "\n"
+
+async def _csv(rows: AsyncIterator[dict]) -> AsyncIterator[str]:
+    buf = io.StringIO()
+    w = csv.DictWriter(buf, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    w.writeheader()
+    async for row in rows:
+        row["support"] = json.dumps(row["support"])
+        row["provenance"] = json.dumps(row["provenance"])
+        w.writerow(row)
+        yield buf.getvalue()
+        buf.seek(0); buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
 @router.get("/dysgu")
-def export_dysgu(min_votes: int = 2, db: Session = Depends(get_db),
+async def export_dysgu(min_votes: int = 2,
+                 format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+                 etype: List[str] = Query(["sv", "sv_evidence"]),
+                 since: datetime | None = None,
+                 after: UUID | None = None,
+                 limit: int | None = Query(None, ge=1),
                  authorization: str | None = Header(default=None)):
-    check_auth(authorization)
+    """
+    Stream labelled SV evidence as NDJSON (default) or CSV, ordered by evidence id.
 
-    rows = []
-    evs = db.query(Evidence).filter(Evidence.etype.in_(["sv", "sv_evidence"])).all()
-    for ev in evs:
-        anns = db.query(Annotation).filter(Annotation.evidence_id == ev.id).all()
-        if len(anns) < min_votes:
-            continue
-        counts = {"LIKELY_TRUE": 0, "UNCERTAIN": 0, "LIKELY_FALSE": 0}
-        for a in anns:
-            if a.label in counts: counts[a.label] += 1
-        label = max(counts, key=counts.get)
-        p = ev.payload
-        rows.append({
-            "evidence_id": str(ev.id),
-            "chrom1": p.get("chrom1"),
-            "pos1": p.get("pos1"),
-            "chrom2": p.get("chrom2"),
-            "pos2": p.get("pos2"),
-            "svtype": p.get("svtype"),
-            "length": p.get("length"),
-            "support": p.get("support", {}),
-            "consensus_label": label,
-            "provenance": p.get("provenance", {}),
-        })
-    return {"n": len(rows), "items": rows}
+    ``since`` keeps rows whose evidence or votes changed at/after that time.
+    For keyset pagination pass ``limit`` and resume with ``after=<last evidence_id>``.
+    """
+    check_auth(authorization)
+    rows = _iter_rows(etype, min_votes, since, after, limit)
+    if format == "csv":
+        return StreamingResponse(_csv(rows), media_type="text/csv",
+                                 headers={"Content-Disposition": "attachment; filename=dysgu_labels.csv"})
+    return StreamingResponse(_ndjson(rows), media_type="application/x-ndjson")
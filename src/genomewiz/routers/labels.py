@@ -1,33 +1,85 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import uuid4
 from datetime import datetime
-from genomewiz.db.base import get_db
+from genomewiz.db.base import get_async_db
 from genomewiz.db import models
-from genomewiz.schemas.label import LabelIn, LabelOut
-from genomewiz.core.security import get_current_user
+from genomewiz.schemas.label import LabelIn, LabelOut, LabelBatchIn, LabelBatchItem, LabelBatchOut, LabelBatchResult
+from genomewiz.services import changes, consensus
+from genomewiz.services.curation_queue import QUEUE, end_leases
 from genomewiz.core.auth import get_current_user, require_curator_or_admin
 
 router = APIRouter(prefix="/sv", tags=["labels"])
 
+def _label_row(sv_id: str, curator_id: str, payload: LabelIn, now: datetime) -> dict:
+    return {
+        "id": f"lab_{uuid4().hex[:12]}",
+        "sv_id": sv_id,
+        "curator_id": curator_id,
+        "outcome": payload.outcome,
+        "zygosity": payload.zygosity,
+        "clonality_bin": payload.clonality_bin,
+        "confidence": payload.confidence,
+        "evidence_flags_json": {"flags": payload.evidence_flags},
+        "notes": payload.notes,
+        "created_at": now,
+    }
+
+@router.post("/labels:batch", response_model=LabelBatchOut)
+async def create_labels(req: LabelBatchIn, db: AsyncSession = Depends(get_async_db),
+                        user=Depends(get_current_user)):
+    """
+    Submit many labels in one transaction. Items are validated individually and
+    reported by position; valid items on existing SVs are inserted together and
+    each affected SV's consensus is updated once.
+    """
+    results: list[LabelBatchResult] = []
+    valid: list[tuple[int, LabelBatchItem]] = []
+    for i, raw in enumerate(req.labels):
+        try:
+            valid.append((i, LabelBatchItem.model_validate(raw)))
+        except ValidationError as e:
+            err = e.errors()[0]
+            results.append(LabelBatchResult(index=i, sv_id=raw.get("sv_id") if isinstance(raw, dict) else None,
+                                            ok=False, error=f"{'.'.join(map(str, err['loc']))}: {err['msg']}"))
+
+    ids = {item.sv_id for _, item in valid}
+    known = set((await db.scalars(select(models.SVCandidate.id).where(models.SVCandidate.id.in_(ids)))).all()) if ids else set()
+    now = datetime.utcnow()
+    rows = []
+    for i, item in valid:
+        if item.sv_id not in known:
+            results.append(LabelBatchResult(index=i, sv_id=item.sv_id, ok=False, error="SV not found"))
+            continue
+        row = _label_row(item.sv_id, user["id"], item, now)
+        rows.append(row)
+        results.append(LabelBatchResult(index=i, sv_id=item.sv_id, ok=True, label_id=row["id"]))
+
+    if rows:
+        await db.execute(insert(models.Label), rows)
+        updated = await db.run_sync(consensus.record_labels, rows)
+        await db.run_sync(end_leases, user["id"], sorted({r["sv_id"] for r in rows}))
+        await db.run_sync(changes.log_label_writes, [r["id"] for r in rows], updated)
+        await db.commit()
+        for r in rows:
+            QUEUE.on_label(r["sv_id"], r["curator_id"], r["outcome"], updated[r["sv_id"]])
+    results.sort(key=lambda r: r.index)
+    return LabelBatchOut(created=len(rows), failed=len(results) - len(rows), results=results)
+
 @router.post("/{sv_id}/label", response_model=LabelOut)
-def create_label(sv_id: str, payload: LabelIn, db: Session = Depends(get_db),
-                 user=Depends(get_current_user)):
-    sv = db.get(models.SVCandidate, sv_id)
+async def create_label(sv_id: str, payload: LabelIn, db: AsyncSession = Depends(get_async_db),
+                       user=Depends(get_current_user)):
+    sv = await db.get(models.SVCandidate, sv_id)
     if not sv:
         raise HTTPException(404, "SV not found")
 
-    lab = models.Label(
-        id=f"lab_{uuid4().hex[:12]}",
-        sv_id=sv_id,
-        curator_id=user["curator_id"],
-        outcome=payload.outcome,
-        zygosity=payload.zygosity,
-        clonality_bin=payload.clonality_bin,
-        confidence=payload.confidence,
-        evidence_flags_json={"flags": payload.evidence_flags},
-        notes=payload.notes,
-        created_at=datetime.utcnow(),
-    )
-    db.add(lab); db.commit(); db.refresh(lab)
+    lab = models.Label(**_label_row(sv_id, user["id"], payload, datetime.utcnow()))
+    db.add(lab); await db.flush()
+    row = await db.run_sync(consensus.record_label, lab)
+    await db.run_sync(end_leases, lab.curator_id, [sv_id])
+    await db.run_sync(changes.log_label_writes, [lab.id], [sv_id])
+    await db.commit()
+    QUEUE.on_label(sv_id, lab.curator_id, lab.outcome, row)
     return lab
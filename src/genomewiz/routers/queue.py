@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from genomewiz.db.base import get_async_db
+from genomewiz.db import models
+from genomewiz.schemas.queue import QueueItem, QueueRelease
+from genomewiz.schemas.sv import SV
+from genomewiz.core.auth import get_current_user
+from genomewiz.services.curation_queue import QUEUE
+
+router = APIRouter(prefix="/queue", tags=["queue"])
+
+@router.post("/next", response_model=List[QueueItem])
+async def next_items(n: int = Query(10, ge=1, le=100), db: AsyncSession = Depends(get_async_db),
+                     user=Depends(get_current_user)):
+    """
+    Lease the ``n`` SVs whose next label helps consensus most (see
+    services/curation_queue.py). Each SV is leased to one curator at a time
+    until it is labelled, released or GW_QUEUE_LEASE_S passes.
+    """
+    picks = await db.run_sync(QUEUE.next_batch, user["id"], n)
+    if not picks:
+        return []
+    svs = {sv.id: sv for sv in await db.scalars(
+        select(models.SVCandidate).where(models.SVCandidate.id.in_([p.sv_id for p in picks])))}
+    return [QueueItem(sv=SV.model_validate(svs[p.sv_id]), priority=p.priority, votes=p.votes,
+                      prob=p.prob, lease_expires=p.lease_expires)
+            for p in picks if p.sv_id in svs]
+
+@router.post("/release", status_code=204)
+async def release_items(req: QueueRelease, db: AsyncSession = Depends(get_async_db),
+                        user=Depends(get_current_user)):
+    """Give leased SVs back without labelling them."""
+    await db.run_sync(QUEUE.give_back, user["id"], req.sv_ids)
+
+@router.get("/stats")
+def queue_stats(user=Depends(get_current_user)):
+    return QUEUE.stats()
@@ -1,24 +1,152 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from genomewiz.db.base import get_db
+import base64
+import json
+import logging
+from genomewiz.db.base import get_async_db, AsyncSessionLocal
 from genomewiz.db import models
-from genomewiz.schemas.sv import SV
+from genomewiz.schemas.sv import SV, BatchRenderRequest, ReadSummary
 from genomewiz.core.security import get_current_user
+from genomewiz.services.render_queue import panels_hash, sv_panels
+from genomewiz.services.intervals import parse_region, reg2bins
 
 router = APIRouter(prefix="/sv", tags=["sv"])
+log = logging.getLogger(__name__)
 
 @router.get("/{sv_id}", response_model=SV)
-def get_sv(sv_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    sv = db.get(models.SVCandidate, sv_id)
+async def get_sv(sv_id: str, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    sv = await db.get(models.SVCandidate, sv_id)
     if not sv:
         raise HTTPException(404, "SV not found")
     return sv
 
+@router.get("/{sv_id}/reads", response_model=ReadSummary)
+async def get_read_summary(sv_id: str, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    """Split-read / discordant-pair counts and binned coverage around the SV
+    (precomputed by genomewiz-read-summaries; no render involved)."""
+    from genomewiz.services.read_evidence import decode_coverage
+    row = await db.get(models.SVReadSummary, sv_id)
+    if not row:
+        raise HTTPException(404, "No read summary for this SV")
+    return ReadSummary(sv_id=row.sv_id, split_reads=row.split_reads, discordant_pairs=row.discordant_pairs,
+                       mean_depth=row.mean_depth, coverage_drop=row.coverage_drop,
+                       panels=row.panels_json, bin_size=row.bin_size,
+                       coverage=decode_coverage(row), computed_at=row.computed_at)
+
+def _encode_cursor(sv: models.SVCandidate) -> str:
+    raw = json.dumps([sv.chrom, sv.pos1, sv.id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str):
+    try:
+        chrom, pos1, sv_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(chrom), int(pos1), str(sv_id)
+    except Exception:
+        raise HTTPException(422, "Invalid cursor")
+
 @router.get("/", response_model=List[SV])
-def list_sv(sample_id: str | None = None, svtype: str | None = None,
-            db: Session = Depends(get_db), user=Depends(get_current_user)):
-    q = db.query(models.SVCandidate)
-    if sample_id: q = q.filter(models.SVCandidate.sample_id == sample_id)
-    if svtype: q = q.filter(models.SVCandidate.svtype == svtype)
-    return q.limit(200).all()
+async def list_sv(response: Response,
+            sample_id: str | None = None, svtype: str | None = None,
+            region: str | None = Query(None, description="chrom or chrom:start-end (0-based, half-open)"),
+            mode: str = Query("overlap", pattern="^(overlap|contained)$"),
+            min_size: int | None = None, max_size: int | None = None,
+            caller: str | None = None,
+            after: str | None = Query(None, description="X-Next-Cursor from the previous page"),
+            limit: int = Query(200, ge=1, le=1000),
+            db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    """
+    SV calls ordered by (chrom, pos1, id). ``region`` selects calls that
+    overlap (default) or lie within the window, using the binned
+    (chrom, bin, pos1) index. When more rows remain, the X-Next-Cursor
+    header holds the ``after`` value for the next page.
+    """
+    SVC = models.SVCandidate
+    q = select(SVC)
+    if sample_id: q = q.filter(SVC.sample_id == sample_id)
+    if svtype: q = q.filter(SVC.svtype == svtype)
+    if caller: q = q.filter(SVC.caller == caller)
+    if min_size is not None: q = q.filter(SVC.size >= min_size)
+    if max_size is not None: q = q.filter(SVC.size <= max_size)
+    if region:
+        try:
+            chrom, start, end = parse_region(region)
+        except ValueError as e:
+            raise HTTPException(422, str(e))
+        q = q.filter(SVC.chrom == chrom)
+        if start is not None:
+            q = q.filter(SVC.bin.in_(reg2bins(start, end)))
+            if mode == "contained":
+                q = q.filter(SVC.pos1 >= start, SVC.span_end <= end)
+            else:
+                q = q.filter(SVC.pos1 < end, SVC.span_end > start)
+    if after:
+        q = q.filter(tuple_(SVC.chrom, SVC.pos1, SVC.id) > _decode_cursor(after))
+    rows = (await db.scalars(q.order_by(SVC.chrom, SVC.pos1, SVC.id).limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1])
+    return rows
+
+@router.post("/render:batch")
+async def render_batch(req: BatchRenderRequest, db: AsyncSession = Depends(get_async_db),
+                       user=Depends(get_current_user)):
+    """
+    Render a queue of SV panels / regions. Streams one NDJSON line per item
+    as soon as it is written to the artifact store (order is completion order).
+    """
+    # gwplot is only needed here; keep the rest of the router importable without it
+    from genomewiz.services.gwplot_renderer import Region, render_batch as _render_batch
+    from genomewiz.services.storage import record_blob
+
+    regions: list[Region] = []
+    if req.sv_ids:
+        svs = (await db.scalars(select(models.SVCandidate).where(models.SVCandidate.id.in_(req.sv_ids)))).all()
+        found = {sv.id: sv for sv in svs}
+        missing = [i for i in req.sv_ids if i not in found]
+        if missing:
+            raise HTTPException(404, f"SV not found: {', '.join(missing[:20])}")
+        for sv_id in dict.fromkeys(req.sv_ids):
+            sv = found[sv_id]
+            panels = sv_panels(sv, req.pad)  # TRA/BND and very large SVs: both breakpoints
+            regions.append(Region(sv.id, sv.sample_id, *panels[0],
+                                  panels=tuple(panels) if len(panels) > 1 else None))
+    for r in req.regions:
+        if r.end <= r.start:
+            raise HTTPException(422, f"Empty region {r.chrom}:{r.start}-{r.end}")
+        regions.append(Region(f"{r.sample_id}:{r.chrom}:{r.start}-{r.end}",
+                              r.sample_id, r.chrom, r.start, r.end))
+    if not regions:
+        raise HTTPException(422, "Provide sv_ids and/or regions")
+
+    fmt = req.format
+    hashes = {r.key: panels_hash(r.sample_id, list(r.panels or [(r.chrom, r.start, r.end)]), fmt)
+              for r in regions}
+    sv_keys = set(req.sv_ids)
+
+    async def stream():
+        async with AsyncSessionLocal() as db2:
+            async for r, path, err in _render_batch(regions, fmt=fmt, content_hash=lambda r: hashes[r.key]):
+                if path:
+                    try:
+                        await db2.run_sync(record_blob, hashes[r.key], fmt, path)
+                        if r.key in sv_keys:
+                            sv = await db2.get(models.SVCandidate, r.key)
+                            sv.evidence_paths = {**(sv.evidence_paths or {}), fmt: path}
+                        await db2.commit()
+                    except Exception as e:
+                        # report it on this item; the rest of the batch still streams
+                        await db2.rollback()
+                        log.warning("Could not record batch render of %s: %s", r.key, e)
+                        path, err = None, e
+                yield json.dumps({
+                    "key": r.key, "sample_id": r.sample_id, "chrom": r.chrom,
+                    "start": r.start, "end": r.end,
+                    "panels": [list(p) for p in r.panels] if r.panels else None, "format": fmt,
+                    "content_hash": hashes[r.key], "path": path,
+                    "error": str(err) if err else None,
+                }) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+import os
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from genomewiz.core.security import get_current_user
+from genomewiz.db.base import get_async_db
+from genomewiz.services.delivery import blob_response, fresh, not_modified
+from genomewiz.services.storage import artifact_path, note_blob
+from genomewiz.services.tiles import Tile, max_zoom, neighbours, tile_hash
+
+router = APIRouter(prefix="/tiles", tags=["tiles"])
+
+# a tile URL always maps to the same bytes until the tile settings change,
+# which changes the hash (and so the ETag)
+CACHE_CONTROL = "private, max-age=86400"
+
+def _prefetch(tile: Tile, radius: int) -> None:
+    from genomewiz.services.gwplot_renderer import prefetch_tiles
+    prefetch_tiles(neighbours(tile, radius))
+
+async def _note(db: AsyncSession, h: str, path) -> None:
+    """Register/touch the tile's blob so the store budget sees it."""
+    try:
+        await db.run_sync(note_blob, h, "png", path)
+        await db.commit()
+    except IntegrityError:  # registered concurrently by another request
+        await db.rollback()
+
+@router.get("/{sample_id}/{chrom}/{zoom}/{index}.png")
+async def get_tile(sample_id: str, chrom: str, zoom: int, index: int, request: Request,
+                   background: BackgroundTasks, db: AsyncSession = Depends(get_async_db),
+                   user=Depends(get_current_user)):
+    """
+    One GW_TILE_BP * 2**zoom bp tile as PNG. Served from the artifact store
+    (rendered on first request), with a strong ETag; the neighbouring
+    GW_TILE_PREFETCH tiles on each side are rendered in the background.
+    """
+    if not 0 <= zoom <= max_zoom() or index < 0:
+        raise HTTPException(422, f"zoom must be 0..{max_zoom()} and index >= 0")
+    tile = Tile(sample_id, chrom, zoom, index)
+    h = tile_hash(tile)
+    radius = int(os.getenv("GW_TILE_PREFETCH", "2"))
+    if radius > 0:
+        background.add_task(_prefetch, tile, radius)
+    path = artifact_path(h, "png")
+    if fresh(request, h):
+        if path.exists():
+            await _note(db, h, path)
+        return not_modified(h, CACHE_CONTROL)
+
+    if not path.exists():
+        from genomewiz.services.gwplot_renderer import render_tile
+        try:
+            path = await render_tile(tile)
+        except FileNotFoundError as e:
+            raise HTTPException(404, str(e))
+    await _note(db, h, path)
+    return blob_response(request, path, h, media_type="image/png", cache_control=CACHE_CONTROL)
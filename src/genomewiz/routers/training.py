@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from genomewiz.db.base import SessionLocal
+from genomewiz.services import parquet_export
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+@router.get("/training.parquet")
+def training_parquet(since: Optional[datetime] = Query(None, description="Only SVs whose call or consensus changed after this time")):
+    """
+    The training set as one Parquet file, streamed a row group at a time (see
+    services/parquet_export.py). For the partitioned, incremental dataset use
+    ``genomewiz-export-parquet``.
+    """
+    parquet_export._pa()  # fail with a 500 before the response starts, not mid-stream
+
+    def body():
+        # own session: a request-scoped one may be closed before streaming finishes
+        db = SessionLocal()
+        try:
+            yield from parquet_export.stream_parquet(db, since=since)
+        finally:
+            db.close()
+
+    name = f"genomewiz_training{'_since_' + since.strftime('%Y%m%dT%H%M%S') if since else ''}.parquet"
+    return StreamingResponse(body(), media_type="application/vnd.apache.parquet",
+                             headers={"Content-Disposition": f'attachment; filename="{name}"'})
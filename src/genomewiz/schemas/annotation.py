@@ -0,0 +1,16 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional
+from uuid import UUID
+
+
+class AnnotationCreate(BaseModel):
+	evidence_id: UUID
+	user_id: str
+	label: str = Field(pattern='^(LIKELY_TRUE|UNCERTAIN|LIKELY_FALSE)$')
+	notes: Optional[str] = None
+
+
+class AnnotationOut(AnnotationCreate):
+	model_config = ConfigDict(from_attributes=True)
+
+	id: UUID
@@ -40,4 +40,14 @@ class EvidenceOut(BaseModel):
 
 
 class Config:
-	from_attributes = True
\ No newline at end of file
+	from_attributes = True
+
+class RenderJobOut(BaseModel):
+	id: str
+	kind: str
+	target_id: str
+	format: str
+	content_hash: str
+	status: str
+	error: Optional[str] = None
+	result_path: Optional[str] = None
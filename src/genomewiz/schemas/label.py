@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
 class LabelIn(BaseModel):
@@ -10,6 +10,25 @@ class LabelIn(BaseModel):
     evidence_flags: List[str] = []
     notes: Optional[str] = None
 
+class LabelBatchIn(BaseModel):
+    # validated one by one, so a bad item is reported instead of failing the batch
+    labels: List[Dict[str, Any]] = Field(min_length=1, max_length=1000)
+
+class LabelBatchItem(LabelIn):
+    sv_id: str
+
+class LabelBatchResult(BaseModel):
+    index: int
+    sv_id: Optional[str] = None
+    ok: bool
+    label_id: Optional[str] = None
+    error: Optional[str] = None
+
+class LabelBatchOut(BaseModel):
+    created: int
+    failed: int
+    results: List[LabelBatchResult]
+
 class LabelOut(LabelIn):
     id: str
     sv_id: str
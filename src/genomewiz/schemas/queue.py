@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import List
+from datetime import datetime
+from genomewiz.schemas.sv import SV
+
+class QueueItem(BaseModel):
+    sv: SV
+    priority: float
+    votes: int
+    prob: float
+    lease_expires: datetime
+
+class QueueRelease(BaseModel):
+    sv_ids: List[str] = Field(min_length=1, max_length=500)
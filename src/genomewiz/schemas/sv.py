@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 
 class SV(BaseModel):
     id: str
@@ -11,3 +12,26 @@ class SV(BaseModel):
     size: Optional[int] = None
     caller: Optional[str] = None
     class Config: from_attributes = True
+
+class ReadSummary(BaseModel):
+    sv_id: str
+    split_reads: int
+    discordant_pairs: int
+    mean_depth: float
+    coverage_drop: Optional[float] = None
+    panels: List[Tuple[str, int, int]]
+    bin_size: int
+    coverage: List[List[int]]  # per panel, mean depth per bin_size bp
+    computed_at: datetime
+
+class RegionIn(BaseModel):
+    sample_id: str
+    chrom: str
+    start: int = Field(ge=0)
+    end: int = Field(ge=1)
+
+class BatchRenderRequest(BaseModel):
+    sv_ids: List[str] = []
+    regions: List[RegionIn] = []
+    format: str = Field(default="png", pattern="^(png|svg)$")
+    pad: int = Field(default=1000, ge=0)  # bp added around each SV
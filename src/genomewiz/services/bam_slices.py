@@ -0,0 +1,399 @@
+# src/genomewiz/services/bam_slices.py
+"""
+Local cache of small BAM slices around SVs.
+
+Sample BAMs can be hundreds of GB on slow network storage, and a render reads
+them at scattered offsets. With GW_SLICE_DIR set, renders are served from
+mini-BAMs instead: the reads overlapping a padded window, pulled once through
+the source index and written (sorted, indexed) under
+
+    <GW_SLICE_DIR>/<sample_id>/<source signature>/<chrom>_<start>_<end>.bam
+
+Windows are widened to multiples of GW_SLICE_ALIGN bp, so neighbouring SVs
+share a slice and window edges fall on the index's linear bins. The source
+signature (path, size, mtime) changes when the BAM is replaced, which retires
+its old slices. Composite renders (both breakpoints of a translocation) get a
+slice merged locally from the per-window slices.
+
+Slices are evicted least-recently-used (file mtime, bumped on each use) once
+the cache exceeds GW_SLICE_MAX_BYTES. Slices used in the last GW_SLICE_GRACE_S
+seconds are kept, since a render may have been handed the path and not opened
+it yet. ``build_sample_slices`` prebuilds every
+SV window of a sample in one forward pass over the BAM: overlapping windows
+are fetched together and each read is written to every window it overlaps.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+from sqlalchemy import select
+
+from genomewiz.db.base import SessionLocal, engine
+from genomewiz.db import models
+from genomewiz.services.render_queue import Panel, sv_panels
+from genomewiz.services.samples import sample_paths
+from genomewiz.services.singleflight import FLIGHT, file_lock
+
+log = logging.getLogger(__name__)
+
+
+def slice_root() -> Optional[Path]:
+    d = os.getenv("GW_SLICE_DIR")
+    return Path(d) if d else None
+
+
+def _align() -> int:
+    return int(os.getenv("GW_SLICE_ALIGN", "16384"))
+
+
+def _max_bp() -> int:
+    return int(os.getenv("GW_SLICE_MAX_BP", "2000000"))
+
+
+def budget_bytes() -> Optional[int]:
+    v = os.getenv("GW_SLICE_MAX_BYTES")
+    return int(v) if v else None
+
+
+def _grace_s() -> float:
+    return float(os.getenv("GW_SLICE_GRACE_S", "60"))
+
+
+def window(chrom: str, start: int, end: int) -> Panel:
+    """``(chrom, start, end)`` widened to GW_SLICE_ALIGN boundaries."""
+    a = _align()
+    return chrom, max(0, start // a * a), -(-end // a) * a
+
+
+def source_signature(bam_path: str) -> str:
+    st = os.stat(bam_path)
+    return hashlib.sha1(f"{os.path.abspath(bam_path)}:{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()[:12]
+
+
+def slice_path(sample_id: str, sig: str, windows: Sequence[Panel]) -> Path:
+    d = slice_root() / sample_id / sig
+    if len(windows) == 1:
+        chrom, start, end = windows[0]
+        return d / f"{chrom}_{start}_{end}.bam"
+    key = ";".join(f"{c}:{s}-{e}" for c, s, e in windows)
+    return d / f"multi_{hashlib.sha1(key.encode()).hexdigest()[:16]}.bam"
+
+
+def _merged(windows: Iterable[Panel]) -> List[Panel]:
+    """Windows sorted by (chrom, start), overlapping ones joined."""
+    out: List[Panel] = []
+    for chrom, start, end in sorted(set(windows)):
+        if out and out[-1][0] == chrom and start <= out[-1][2]:
+            out[-1] = (chrom, out[-1][1], max(out[-1][2], end))
+        else:
+            out.append((chrom, start, end))
+    return out
+
+
+def _copy(out, parts: Iterable[Tuple[object, Panel]]) -> int:
+    """Write the reads of each (AlignmentFile, window) to ``out``. Windows come
+    in BAM (tid) order and do not overlap; a read spanning two windows on the same
+    chrom was already written with the first, so it is skipped the second time."""
+    n = 0
+    prev: Optional[Panel] = None
+    for bam, (chrom, start, end) in parts:
+        if chrom not in bam.references:
+            continue
+        for r in bam.fetch(chrom, start, end):
+            if prev and prev[0] == chrom and r.reference_start < prev[2]:
+                continue
+            out.write(r)
+            n += 1
+        prev = (chrom, start, end)
+    return n
+
+
+def _tmp_for(dest: Path) -> str:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix=".part")
+    os.close(fd)
+    return tmp
+
+
+def _finish(tmp: str, dest: Path) -> None:
+    """Index ``tmp`` and move the index, then the BAM, into place (readers
+    check for the BAM, so they never find it without its index)."""
+    import pysam
+
+    pysam.index(tmp, tmp + ".bai")
+    os.replace(tmp + ".bai", str(dest) + ".bai")
+    os.replace(tmp, dest)
+
+
+def _discard(tmp: str) -> None:
+    for f in (tmp, tmp + ".bai"):
+        if os.path.exists(f):
+            os.unlink(f)
+
+
+def _build(dest: Path, write: Callable[[str], None]) -> Path:
+    """Build ``dest`` once, however many threads/processes ask for it."""
+    def lead() -> Path:
+        lock = hashlib.sha1(str(dest).encode()).hexdigest()[:16]
+        with file_lock(slice_root() / "locks" / f"{lock}.lock", remove=True):
+            if dest.exists():
+                return dest
+            tmp = _tmp_for(dest)
+            try:
+                write(tmp)
+                _finish(tmp, dest)
+            finally:
+                _discard(tmp)
+        return dest
+
+    return FLIGHT.do(f"slice:{dest}", lead)
+
+
+def ensure_slice(sample_id: str, panels: Sequence[Panel]) -> Optional[Path]:
+    """
+    Path of a mini-BAM covering ``panels``, built from the sample BAM if
+    missing. None when slicing is off or a window exceeds GW_SLICE_MAX_BP
+    (render from the full BAM).
+    """
+    import pysam
+
+    if slice_root() is None:
+        return None
+    windows = [window(*p) for p in panels]
+    if any(e - s > _max_bp() for _c, s, e in windows):
+        return None
+    src = sample_paths(sample_id)["bam"]
+    sig = source_signature(src)
+    windows = _merged(windows)
+    built = False
+
+    def one(w: Panel) -> Path:
+        nonlocal built
+        dest = slice_path(sample_id, sig, [w])
+        if dest.exists():
+            return dest
+
+        def write(tmp: str) -> None:
+            nonlocal built
+            with pysam.AlignmentFile(src, "rb") as bam, pysam.AlignmentFile(tmp, "wb", template=bam) as out:
+                _copy(out, [(bam, w)])
+            built = True
+        return _build(dest, write)
+
+    if len(windows) == 1:
+        path = one(windows[0])
+    else:
+        parts = [one(w) for w in windows]
+        path = slice_path(sample_id, sig, windows)
+        if not path.exists():
+            def write(tmp: str) -> None:
+                nonlocal built
+                files = [pysam.AlignmentFile(str(p), "rb") for p in parts]
+                try:
+                    tid = files[0].get_tid  # slices keep the source header
+                    order = sorted(range(len(windows)), key=lambda i: (tid(windows[i][0]), windows[i][1]))
+                    with pysam.AlignmentFile(tmp, "wb", template=files[0]) as out:
+                        _copy(out, [(files[i], windows[i]) for i in order])
+                finally:
+                    for f in files:
+                        f.close()
+                built = True
+            _build(path, write)
+    _touch(path)
+    if built:
+        enforce_budget()
+    return path
+
+
+def _touch(path: Path) -> None:
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def render_paths(sample_id: str, panels: Sequence[Panel]) -> Dict[str, str]:
+    """sample_paths() with the BAM swapped for a cached slice when possible.
+    A failed slice build is logged and the full BAM used instead."""
+    paths = sample_paths(sample_id)
+    if slice_root() is None or not os.path.exists(paths["bam"]):
+        return paths
+    try:
+        path = ensure_slice(sample_id, panels)
+    except (OSError, ValueError) as e:
+        log.warning("BAM slice for %s failed, rendering from the full BAM: %s", sample_id, e)
+        return paths
+    if path is not None:
+        paths["bam"] = str(path)
+    return paths
+
+
+# -----------------------------
+# Eviction
+# -----------------------------
+def enforce_budget(max_bytes: Optional[int] = None) -> int:
+    """Delete least recently used slices until the cache fits in ``max_bytes``
+    (default GW_SLICE_MAX_BYTES; unset = unbounded), sparing those used within
+    GW_SLICE_GRACE_S. Returns bytes freed."""
+    max_bytes = budget_bytes() if max_bytes is None else max_bytes
+    root = slice_root()
+    if not max_bytes or root is None or not root.exists():
+        return 0
+    entries = []
+    total = 0
+    for p in root.rglob("*.bam"):
+        try:
+            st = p.stat()
+            size = st.st_size + (p.with_name(p.name + ".bai").stat().st_size
+                                 if p.with_name(p.name + ".bai").exists() else 0)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, size, p))
+        total += size
+    freed = 0
+    recent = time.time() - _grace_s()
+    for mtime, size, p in sorted(entries, key=lambda e: e[0]):
+        if total - freed <= max_bytes or mtime > recent:
+            break
+        for f in (p, p.with_name(p.name + ".bai")):
+            try:
+                f.unlink()
+            except FileNotFoundError:
+                pass
+        freed += size
+    if freed:
+        log.info("Evicted %d bytes of BAM slices", freed)
+    return freed
+
+
+# -----------------------------
+# Bulk build
+# -----------------------------
+def _sweep(bam, chrom: str, windows: List[Panel], dest: Callable[[Panel], Path]) -> int:
+    """Write every window of ``chrom`` (sorted by start) in one forward pass:
+    overlapping windows are fetched once as a cluster and each read goes to
+    every window it overlaps."""
+    import pysam
+
+    clusters: List[List[Panel]] = []
+    reach = -1
+    for w in windows:
+        if w[1] <= reach:
+            clusters[-1].append(w)
+        else:
+            clusters.append([w])
+        reach = max(reach, w[2])
+
+    def open_(w: Panel):
+        tmp = _tmp_for(dest(w))
+        return w, pysam.AlignmentFile(tmp, "wb", template=bam), tmp
+
+    done = 0
+    for cluster in clusters:
+        start, end = cluster[0][1], max(w[2] for w in cluster)
+        pending = list(cluster)
+        active: List[Tuple[Panel, object, str]] = []
+        try:
+            for r in bam.fetch(chrom, start, end):
+                r_end = r.reference_end or r.reference_start + 1  # placed unmapped mates
+                while pending and pending[0][1] < r_end:
+                    active.append(open_(pending.pop(0)))
+                keep = []
+                for w, out, tmp in active:
+                    if w[2] <= r.reference_start:  # later reads start further right
+                        out.close()
+                        _finish(tmp, dest(w))
+                        done += 1
+                        continue
+                    if r.reference_start < w[2] and r_end > w[1]:
+                        out.write(r)
+                    keep.append((w, out, tmp))
+                active = keep
+            # windows no read reached are written empty, so they are not rebuilt
+            active += [open_(w) for w in pending]
+            while active:
+                w, out, tmp = active[-1]
+                out.close()
+                _finish(tmp, dest(w))
+                active.pop()
+                done += 1
+        finally:
+            for _w, out, tmp in active:
+                out.close()
+                _discard(tmp)
+    return done
+
+
+def build_sample_slices(sample_id: str, *, pad: Optional[int] = None) -> int:
+    """Build the missing slices for every SVCandidate window of the sample in
+    one pass over its BAM. Composite slices are merged later, on first render.
+    Returns the number of slices written."""
+    import pysam
+
+    if slice_root() is None:
+        raise ValueError("GW_SLICE_DIR is not set")
+    src = sample_paths(sample_id)["bam"]
+    sig = source_signature(src)
+    db = SessionLocal()
+    try:
+        sv = models.SVCandidate
+        rows = db.execute(
+            select(sv.id, sv.chrom, sv.pos1, sv.pos2, sv.svtype, sv.features_json)
+            .where(sv.sample_id == sample_id)
+        ).all()
+    finally:
+        db.close()
+    max_bp = _max_bp()
+    windows = {window(*p) for row in rows for p in sv_panels(row, pad)}
+    windows = {w for w in windows if w[2] - w[1] <= max_bp
+               and not slice_path(sample_id, sig, [w]).exists()}
+    n = 0
+    with pysam.AlignmentFile(src, "rb") as bam:
+        contigs = set(bam.references)
+        by_chrom: Dict[str, List[Panel]] = {}
+        for w in windows:
+            if w[0] in contigs:
+                by_chrom.setdefault(w[0], []).append(w)
+        for chrom in sorted(by_chrom, key=bam.get_tid):
+            # no lock: a render building the same slice meanwhile writes identical bytes
+            n += _sweep(bam, chrom, sorted(by_chrom[chrom], key=lambda w: (w[1], w[2])),
+                        lambda w: slice_path(sample_id, sig, [w]))
+            enforce_budget()
+    return n
+
+
+def _init_worker() -> None:
+    engine.dispose(close=False)
+
+
+def run_slices(sample_ids: Optional[Iterable[str]] = None, *, processes: int = 1) -> Dict[str, int]:
+    """Prebuild slices for every sample with SVs (or just ``sample_ids``), one
+    sample per worker process. Samples whose BAM is missing are logged and skipped."""
+    if sample_ids is None:
+        db = SessionLocal()
+        try:
+            sample_ids = db.scalars(select(models.SVCandidate.sample_id).distinct()).all()
+        finally:
+            db.close()
+    sample_ids = list(sample_ids)
+    if processes <= 1:
+        return {s: _run_one(s) for s in sample_ids}
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+        futs = {s: pool.submit(_run_one, s) for s in sample_ids}
+        return {s: fut.result() for s, fut in futs.items()}
+
+
+def _run_one(sample_id: str) -> int:
+    try:
+        n = build_sample_slices(sample_id)
+    except FileNotFoundError as e:
+        log.warning("Skipping %s: %s", sample_id, e)
+        return 0
+    log.info("Built %d BAM slices for %s", n, sample_id)
+    return n
@@ -0,0 +1,144 @@
+# src/genomewiz/services/changes.py
+"""
+Change feed for downstream consumers.
+
+Every write to ``labels``, ``consensus``, ``annotation`` or
+``evidence_consensus`` appends a ``change_log`` entry (table, row id, op) in
+the same transaction, with a monotonically increasing ``seq``. Consumers keep the last ``seq`` they applied
+and ask for everything after it; ``read_changes`` returns the current state of
+each changed row (newest entry per row in the window), so replaying a window
+twice is harmless.
+
+On PostgreSQL ``log_changes`` takes a transaction-scoped advisory lock before
+drawing sequence numbers. Writers therefore commit in ``seq`` order, and a
+reader can never see seq N+1 while N is still uncommitted (which would make a
+consumer skip N). Call it as the last statement before commit so the lock is
+held briefly. SQLite serializes writers already.
+"""
+from __future__ import annotations
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import uuid
+
+from sqlalchemy import delete, func, insert, inspect, select, text
+from sqlalchemy.orm import Session
+
+from genomewiz.db import models
+
+LOCK_KEY = 0x67776368616E6765  # pg_advisory_xact_lock key for change_log writers ("gwchange")
+DEFAULT_LIMIT = 10_000
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+
+def _models() -> Dict[str, Tuple[Any, Any]]:
+    """table name -> (model, primary key column)."""
+    from genomewiz.models.annotation import Annotation
+    from genomewiz.models.evidence_consensus import EvidenceConsensus
+    return {
+        "labels": (models.Label, models.Label.id),
+        "consensus": (models.Consensus, models.Consensus.sv_id),
+        "annotation": (Annotation, Annotation.id),
+        "evidence_consensus": (EvidenceConsensus, EvidenceConsensus.evidence_id),
+    }
+
+UUID_KEYED = ("annotation", "evidence_consensus")
+
+
+def log_changes(db: Session, table: str, row_ids: Iterable[Any], op: str = UPSERT) -> None:
+    """Append change_log entries for ``row_ids`` of ``table``. Caller commits."""
+    now = datetime.utcnow()
+    rows = [{"table": table, "row_id": str(i), "op": op, "created_at": now} for i in row_ids]
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": LOCK_KEY})
+    db.execute(insert(models.ChangeLog), rows)
+
+
+def log_label_writes(db: Session, label_ids: Iterable[str], sv_ids: Iterable[str]) -> None:
+    """New labels and the consensus rows they updated. Caller commits."""
+    log_changes(db, "labels", label_ids)
+    log_changes(db, "consensus", sorted(set(sv_ids)))
+
+
+def latest_seq(db: Session) -> int:
+    return db.scalar(select(func.max(models.ChangeLog.seq))) or 0
+
+
+def _row_dict(obj) -> Dict[str, Any]:
+    out = {}
+    for attr in inspect(obj).mapper.column_attrs:
+        v = getattr(obj, attr.key)
+        if isinstance(v, datetime):
+            v = v.isoformat()
+        elif isinstance(v, uuid.UUID):
+            v = str(v)
+        out[attr.key] = v
+    return out
+
+
+def _fetch(db: Session, table: str, row_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    model, pk = _models()[table]
+    keys = [uuid.UUID(i) for i in row_ids] if table in UUID_KEYED else row_ids
+    return {str(getattr(o, pk.key)): _row_dict(o) for o in db.scalars(select(model).where(pk.in_(keys)))}
+
+
+def read_changes(db: Session, since: int = 0, limit: int = DEFAULT_LIMIT) -> Tuple[List[dict], int, bool]:
+    """
+    Changes after ``since``: ``(changes, cursor, more)``. Each change is
+    ``{"seq", "table", "op", "id", "row"}`` with the row's current columns
+    (``row`` is None once deleted); a row changed several times in the window
+    appears once, at its latest seq. Pass ``cursor`` as the next ``since``;
+    ``more`` means the window was full.
+    """
+    entries = db.execute(
+        select(models.ChangeLog.seq, models.ChangeLog.table, models.ChangeLog.row_id)
+        .where(models.ChangeLog.seq > since)
+        .order_by(models.ChangeLog.seq)
+        .limit(limit)
+    ).all()
+    if not entries:
+        return [], since, False
+    latest: Dict[Tuple[str, str], int] = {}
+    for seq, table, row_id in entries:
+        latest[(table, row_id)] = seq
+    by_table: Dict[str, List[str]] = {}
+    for table, row_id in latest:
+        by_table.setdefault(table, []).append(row_id)
+    current = {table: _fetch(db, table, ids) for table, ids in by_table.items()}
+
+    out = []
+    for (table, row_id), seq in sorted(latest.items(), key=lambda kv: kv[1]):
+        row = current[table].get(row_id)
+        out.append({"seq": seq, "table": table, "op": UPSERT if row is not None else DELETE,
+                    "id": row_id, "row": row})
+    return out, entries[-1].seq, len(entries) == limit
+
+
+def iter_changes(db: Session, since: int = 0, *, limit: Optional[int] = None,
+                 page_size: int = DEFAULT_LIMIT) -> Iterator[Tuple[List[dict], int]]:
+    """``read_changes`` pages until caught up (or about ``limit`` log entries
+    were read): yields ``(changes, cursor)`` per page."""
+    seen = 0
+    while True:
+        n = page_size if limit is None else min(page_size, limit - seen)
+        if n <= 0:
+            return
+        changes, cursor, more = read_changes(db, since, n)
+        if cursor == since:
+            return
+        yield changes, cursor
+        seen += n
+        since = cursor
+        if not more:
+            return
+
+
+def prune(db: Session, through_seq: int) -> int:
+    """Drop entries up to and including ``through_seq`` (every consumer must be
+    past it). Commits."""
+    n = db.execute(delete(models.ChangeLog).where(models.ChangeLog.seq <= through_seq)).rowcount
+    db.commit()
+    return n
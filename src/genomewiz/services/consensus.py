@@ -0,0 +1,253 @@
+# src/genomewiz/services/consensus.py
+"""
+Materialized consensus.
+
+``consensus`` (per SV, from Labels) and ``evidence_consensus`` (per evidence
+row, from Annotations) keep the running vote counts, so each new vote is an
+O(1) update of one row and reads are a primary-key lookup. ``rebuild_all``
+recomputes both tables from scratch.
+
+``run_dawid_skene`` replaces the SV majority vote with Dawid-Skene posteriors
+in one batch (method="dawid-skene"). Votes arriving afterwards are folded in by
+majority until the next EM run.
+
+Every consensus write is also recorded in ``change_log`` (services/changes.py).
+"""
+from __future__ import annotations
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Tuple
+import uuid
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from genomewiz.db import models
+from genomewiz.models.evidence_consensus import EvidenceConsensus
+from genomewiz.services.changes import DELETE, log_changes
+
+# Ties go to the earlier entry.
+OUTCOMES = ["True", "Likely", "Unclear", "Artifact"]
+EVIDENCE_LABELS = ["LIKELY_TRUE", "UNCERTAIN", "LIKELY_FALSE"]
+METHOD = "majority"
+
+
+def majority(counts: Mapping[str, int], order: list[str], default: str) -> Tuple[str, float]:
+    total = sum(counts.values())
+    if not total:
+        return default, 0.0
+    label = max(order, key=lambda L: (counts.get(L, 0), -order.index(L)))
+    return label, counts.get(label, 0) / total
+
+
+def _locked(db: Session, model, pk, make):
+    """Fetch a row FOR UPDATE, inserting it first if it does not exist yet."""
+    row = db.get(model, pk, with_for_update=True)
+    if row is not None:
+        return row
+    try:
+        with db.begin_nested():
+            row = make()
+            db.add(row)
+        return row
+    except IntegrityError:
+        # created concurrently by another transaction
+        return db.get(model, pk, with_for_update=True, populate_existing=True)
+
+
+# -----------------------------
+# SV labels -> consensus
+# -----------------------------
+def add_label_votes(db: Session, sv_id: str, votes: Mapping[str, int], new_curators: int) -> models.Consensus:
+    """Fold ``votes`` (outcome -> count) into the SV's consensus row. Caller commits."""
+    row = _locked(db, models.Consensus, sv_id, lambda: models.Consensus(
+        sv_id=sv_id, label="Unclear", prob=0.0, n_curators=0, method=METHOD, counts_json={}))
+    counts = dict(row.counts_json or {})
+    for outcome, n in votes.items():
+        counts[outcome] = counts.get(outcome, 0) + n
+    row.label, row.prob = majority(counts, OUTCOMES, "Unclear")
+    row.counts_json = counts
+    row.n_curators = (row.n_curators or 0) + new_curators
+    row.method = METHOD
+    row.updated_at = datetime.utcnow()
+    return row
+
+
+def record_label(db: Session, lab: models.Label) -> models.Consensus:
+    """Incremental update for one freshly flushed Label. Caller commits."""
+    seen_before = (
+        db.query(models.Label.id)
+        .filter(models.Label.sv_id == lab.sv_id,
+                models.Label.curator_id == lab.curator_id,
+                models.Label.id != lab.id)
+        .first()
+    )
+    return add_label_votes(db, lab.sv_id, {lab.outcome: 1}, 0 if seen_before else 1)
+
+
+def record_labels(db: Session, labels: Iterable[Mapping[str, Any]]) -> Dict[str, models.Consensus]:
+    """
+    Incremental update for a batch of freshly inserted labels (dicts with id,
+    sv_id, curator_id, outcome): one consensus update per SV, however many
+    labels it received. SVs are locked in id order so concurrent batches
+    cannot deadlock. Caller commits.
+    """
+    labels = list(labels)
+    if not labels:
+        return {}
+    votes: Dict[str, Dict[str, int]] = {}
+    curators: Dict[str, set] = {}
+    for lab in labels:
+        v = votes.setdefault(lab["sv_id"], {})
+        v[lab["outcome"]] = v.get(lab["outcome"], 0) + 1
+        curators.setdefault(lab["sv_id"], set()).add(lab["curator_id"])
+    seen = set(db.execute(
+        select(models.Label.sv_id, models.Label.curator_id)
+        .where(models.Label.sv_id.in_(list(votes)),
+               models.Label.id.not_in([lab["id"] for lab in labels]))
+        .distinct()
+    ).tuples())
+    return {
+        sv_id: add_label_votes(db, sv_id, votes[sv_id],
+                               sum(1 for c in curators[sv_id] if (sv_id, c) not in seen))
+        for sv_id in sorted(votes)
+    }
+
+
+# -----------------------------
+# Evidence annotations -> evidence_consensus
+# -----------------------------
+def record_annotation(db: Session, evidence_id: uuid.UUID, label: str) -> EvidenceConsensus:
+    """Incremental update for one new Annotation (one per curator). Caller commits."""
+    row = _locked(db, EvidenceConsensus, evidence_id, lambda: EvidenceConsensus(
+        evidence_id=evidence_id, label="UNCERTAIN", prob=0.0, n_curators=0, method=METHOD, counts={}))
+    counts = dict(row.counts or {})
+    counts[label] = counts.get(label, 0) + 1
+    row.label, row.prob = majority(counts, EVIDENCE_LABELS, "UNCERTAIN")
+    row.counts = counts
+    row.n_curators = (row.n_curators or 0) + 1
+    row.method = METHOD
+    log_changes(db, "evidence_consensus", [evidence_id])
+    return row
+
+
+# -----------------------------
+# Full rebuild
+# -----------------------------
+def _grouped(rows: Iterable[Tuple]) -> Dict:
+    out: Dict = {}
+    for key, label, n in rows:
+        out.setdefault(key, {})[label] = n
+    return out
+
+
+def rebuild_sv_consensus(db: Session) -> int:
+    counts = _grouped(
+        db.query(models.Label.sv_id, models.Label.outcome, func.count())
+        .group_by(models.Label.sv_id, models.Label.outcome)
+    )
+    curators = dict(
+        db.query(models.Label.sv_id, func.count(func.distinct(models.Label.curator_id)))
+        .group_by(models.Label.sv_id)
+    )
+    now = datetime.utcnow()
+    rows = []
+    for sv_id, c in counts.items():
+        label, prob = majority(c, OUTCOMES, "Unclear")
+        rows.append({"sv_id": sv_id, "label": label, "prob": prob, "n_curators": curators.get(sv_id, 0),
+                     "method": METHOD, "counts_json": c, "updated_at": now})
+    gone = set(db.scalars(select(models.Consensus.sv_id))) - counts.keys()
+    db.execute(delete(models.Consensus))
+    if rows:
+        db.execute(insert(models.Consensus), rows)
+    log_changes(db, "consensus", sorted(gone), DELETE)
+    log_changes(db, "consensus", sorted(counts))
+    return len(rows)
+
+
+def rebuild_evidence_consensus(db: Session) -> int:
+    from genomewiz.models.annotation import Annotation
+
+    counts = _grouped(
+        db.query(Annotation.evidence_id, Annotation.label, func.count())
+        .group_by(Annotation.evidence_id, Annotation.label)
+    )
+    rows = []
+    for evidence_id, c in counts.items():
+        label, prob = majority(c, EVIDENCE_LABELS, "UNCERTAIN")
+        rows.append({"evidence_id": evidence_id, "label": label, "prob": prob,
+                     "n_curators": sum(c.values()), "method": METHOD, "counts": c})
+    gone = set(db.scalars(select(EvidenceConsensus.evidence_id))) - counts.keys()
+    db.execute(delete(EvidenceConsensus))
+    if rows:
+        db.execute(insert(EvidenceConsensus), rows)
+    log_changes(db, "evidence_consensus", sorted(gone, key=str), DELETE)
+    log_changes(db, "evidence_consensus", sorted(counts, key=str))
+    return len(rows)
+
+
+def rebuild_all(db: Session) -> Tuple[int, int]:
+    """Recompute both consensus tables in one transaction. Commits."""
+    n_sv = rebuild_sv_consensus(db)
+    n_ev = rebuild_evidence_consensus(db)
+    db.commit()
+    return n_sv, n_ev
+
+
+# -----------------------------
+# Dawid-Skene batch run
+# -----------------------------
+def run_dawid_skene(db: Session, *, state_path: str | Path | None = None, warm_start: bool = True,
+                    max_iter: int = 100, tol: float = 1e-6, chunk: int = 10_000) -> Dict[str, Any]:
+    """
+    Fit Dawid-Skene over every SV label and bulk-write the posteriors to
+    ``consensus``. Parameters are saved to ``state_path`` and, with
+    ``warm_start``, used to initialise the next run. Commits.
+    """
+    import pandas as pd
+    from genomewiz.services.dawid_skene import DSParams, fit
+
+    rows = db.execute(
+        select(models.Label.sv_id, models.Label.curator_id, models.Label.outcome)
+        .where(models.Label.outcome.in_(OUTCOMES))
+    ).all()
+    if not rows:
+        return {"labels": 0, "items": 0}
+    df = pd.DataFrame(rows, columns=["sv_id", "curator_id", "outcome"])
+    item_codes, item_ids = pd.factorize(df["sv_id"])
+    cur_codes, cur_ids = pd.factorize(df["curator_id"])
+    lab_codes = pd.Categorical(df["outcome"], categories=OUTCOMES).codes
+
+    init = None
+    if warm_start and state_path and Path(state_path).exists():
+        init = DSParams.load(state_path).aligned(list(cur_ids), OUTCOMES)
+    res = fit(item_codes, cur_codes, lab_codes, n_items=len(item_ids), curator_ids=list(cur_ids),
+              classes=OUTCOMES, init=init, max_iter=max_iter, tol=tol)
+    if state_path:
+        res.params.save(state_path)
+
+    best = res.posterior.argmax(axis=1)
+    prob = res.posterior.max(axis=1)
+    n_curators = df.drop_duplicates(["sv_id", "curator_id"]).groupby("sv_id").size().to_dict()
+    counts: Dict[str, Dict[str, int]] = {}
+    for (sv_id, outcome), n in df.groupby(["sv_id", "outcome"]).size().items():
+        counts.setdefault(sv_id, {})[outcome] = int(n)
+
+    existing = set(db.scalars(select(models.Consensus.sv_id)))
+    now = datetime.utcnow()
+    upd, ins = [], []
+    for i, sv_id in enumerate(item_ids):
+        row = {"sv_id": sv_id, "label": OUTCOMES[best[i]], "prob": float(prob[i]),
+               "n_curators": int(n_curators[sv_id]), "method": "dawid-skene",
+               "counts_json": counts[sv_id], "updated_at": now}
+        (upd if sv_id in existing else ins).append(row)
+    for i in range(0, len(upd), chunk):
+        db.execute(update(models.Consensus), upd[i:i + chunk])
+    for i in range(0, len(ins), chunk):
+        db.execute(insert(models.Consensus), ins[i:i + chunk])
+    log_changes(db, "consensus", list(item_ids))
+    db.commit()
+    return {"labels": len(df), "items": len(item_ids), "curators": len(cur_ids),
+            "iterations": res.iterations, "converged": res.converged,
+            "warm_start": init is not None, "log_likelihood": res.log_likelihood}
@@ -0,0 +1,361 @@
+# src/genomewiz/services/curation_queue.py
+"""
+Curation queue: hands curators the SVs whose next label is worth the most.
+
+Priority of an SV is how unsettled its consensus is, smoothed by vote count
+(``1 - (top votes + 1) / (votes + K)``, so an unlabelled SV and a split vote
+both rank high and a unanimous one sinks as votes accumulate), boosted by
+GW_QUEUE_RENDER_BONUS when a pre-rendered panel is ready. SVs with at least
+GW_QUEUE_TARGET_VOTES votes and consensus prob >= GW_QUEUE_SETTLED_PROB are
+retired.
+
+SVs live in two max-heaps: "fresh" (fewer than two votes) and "contested"
+(two or more, still unsettled). A pick compares the two tops, weighting the
+contested one by the curator's agreement with past consensus, so reliable
+curators are steered to the tie-breaks and everyone else to first votes.
+Heap entries are invalidated lazily (a version per SV), so updates and picks
+are O(log n). Labels and SVs written through this process update the heaps
+directly; writes made elsewhere (other API processes, the VCF loader, the
+render worker, the Dawid-Skene batch) are pulled every GW_QUEUE_REFRESH_S by
+``updated_at``. The full rebuild only runs at startup.
+
+Picked SVs are leased for GW_QUEUE_LEASE_S. The ``queue_leases`` primary key
+arbitrates between API processes, so an SV is never out with two curators.
+"""
+from __future__ import annotations
+import heapq
+import itertools
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, delete, func, select
+from sqlalchemy.orm import Session
+
+from genomewiz.db.base import dialect_insert
+from genomewiz.db import models
+from genomewiz.services.consensus import OUTCOMES
+
+FRESH, CONTESTED = "fresh", "contested"
+
+
+def _env(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+@dataclass
+class ItemState:
+    votes: int = 0          # labels so far
+    prob: float = 0.0       # consensus probability of the leading outcome
+    rendered: bool = False  # a pre-rendered panel exists
+    version: int = 0
+
+
+@dataclass
+class Pick:
+    sv_id: str
+    priority: float
+    votes: int
+    prob: float
+    lease_expires: datetime
+
+
+class CurationQueue:
+    def __init__(self, *, target_votes: Optional[int] = None, settled_prob: Optional[float] = None,
+                 lease_s: Optional[float] = None, render_bonus: Optional[float] = None,
+                 refresh_s: Optional[float] = None) -> None:
+        self.target_votes = int(target_votes if target_votes is not None else _env("GW_QUEUE_TARGET_VOTES", 5))
+        self.settled_prob = settled_prob if settled_prob is not None else _env("GW_QUEUE_SETTLED_PROB", 0.9)
+        self.lease_s = lease_s if lease_s is not None else _env("GW_QUEUE_LEASE_S", 900)
+        self.render_bonus = render_bonus if render_bonus is not None else _env("GW_QUEUE_RENDER_BONUS", 0.25)
+        self.refresh_s = refresh_s if refresh_s is not None else _env("GW_QUEUE_REFRESH_S", 5)
+        self._lock = threading.Lock()
+        self._items: Dict[str, ItemState] = {}
+        self._heaps: Dict[str, List[Tuple[float, int, str, int]]] = {FRESH: [], CONTESTED: []}
+        self._leases: Dict[str, Tuple[str, float]] = {}  # sv_id -> (curator_id, expires epoch s)
+        self._expiry: List[Tuple[float, str]] = []
+        self._voted: Dict[str, Set[str]] = {}  # curator_id -> sv_ids already labelled
+        self._agree: Dict[str, List[int]] = {}  # curator_id -> [agreeing labels, labels]
+        self._seq = itertools.count()
+        self._built_at = 0.0
+        self._refreshed_at = 0.0
+        self._consensus_mark: Optional[datetime] = None
+        self._label_mark: Optional[datetime] = None
+        self._sv_mark: Optional[datetime] = None
+
+    # -----------------------------
+    # Scoring
+    # -----------------------------
+    def priority(self, s: ItemState) -> Optional[Tuple[str, float]]:
+        """(heap, score) for an SV, or None once it is settled."""
+        if s.votes >= self.target_votes and s.prob >= self.settled_prob:
+            return None
+        top = s.prob * s.votes
+        score = 1.0 - (top + 1.0) / (s.votes + len(OUTCOMES))
+        if s.rendered:
+            score *= 1.0 + self.render_bonus
+        tier = CONTESTED if s.votes >= 2 and s.prob < self.settled_prob else FRESH
+        return tier, score
+
+    def agreement(self, curator_id: str) -> float:
+        """Share of the curator's labels that match consensus (Laplace-smoothed, 0.5 for newcomers)."""
+        agree, total = self._agree.get(curator_id, (0, 0))
+        return (agree + 1.0) / (total + 2.0)
+
+    def _push(self, sv_id: str) -> None:
+        s = self._items[sv_id]
+        s.version += 1
+        p = self.priority(s)
+        if p is not None:
+            heapq.heappush(self._heaps[p[0]], (-p[1], next(self._seq), sv_id, s.version))
+
+    def _top(self, tier: str) -> Optional[Tuple[float, int, str, int]]:
+        """Best live entry of a heap; stale and leased entries are dropped on the way
+        (a leased SV is pushed again when its lease ends)."""
+        h = self._heaps[tier]
+        while h:
+            _neg, _seq, sv_id, version = h[0]
+            s = self._items.get(sv_id)
+            if s is None or s.version != version or sv_id in self._leases:
+                heapq.heappop(h)
+                continue
+            return h[0]
+        return None
+
+    # -----------------------------
+    # Loading
+    # -----------------------------
+    def rebuild(self, db: Session) -> int:
+        """Reload every SV, vote and live lease. Returns the number of queued SVs."""
+        now = datetime.utcnow()
+        items: Dict[str, ItemState] = {}
+        for sv_id, paths, counts, prob in db.execute(
+            select(models.SVCandidate.id, models.SVCandidate.evidence_paths,
+                   models.Consensus.counts_json, models.Consensus.prob)
+            .outerjoin(models.Consensus, models.Consensus.sv_id == models.SVCandidate.id)
+        ):
+            items[sv_id] = ItemState(votes=sum((counts or {}).values()), prob=prob or 0.0, rendered=bool(paths))
+        voted: Dict[str, Set[str]] = {}
+        for sv_id, curator_id in db.execute(select(models.Label.sv_id, models.Label.curator_id).distinct()):
+            voted.setdefault(curator_id, set()).add(sv_id)
+        agree = {
+            c: [int(a or 0), int(n)] for c, a, n in db.execute(
+                select(models.Label.curator_id,
+                       func.sum(case((models.Label.outcome == models.Consensus.label, 1), else_=0)),
+                       func.count())
+                .join(models.Consensus, models.Consensus.sv_id == models.Label.sv_id)
+                .group_by(models.Label.curator_id))
+        }
+        leases = db.execute(select(models.QueueLease.sv_id, models.QueueLease.curator_id,
+                                   models.QueueLease.expires_at)
+                            .where(models.QueueLease.expires_at > now)).all()
+        sv_mark = db.scalar(select(func.max(models.SVCandidate.updated_at)))
+        label_mark = db.scalar(select(func.max(models.Label.created_at)))
+        consensus_mark = db.scalar(select(func.max(models.Consensus.updated_at)))
+
+        heaps: Dict[str, List] = {FRESH: [], CONTESTED: []}
+        seq = itertools.count()
+        for sv_id, s in items.items():
+            p = self.priority(s)
+            if p is not None:
+                heaps[p[0]].append((-p[1], next(seq), sv_id, s.version))
+        for h in heaps.values():
+            heapq.heapify(h)
+        with self._lock:
+            self._items, self._heaps, self._voted, self._agree, self._seq = items, heaps, voted, agree, seq
+            self._leases = {sv_id: (c, _epoch(exp)) for sv_id, c, exp in leases}
+            self._expiry = [(e, sv_id) for sv_id, (_c, e) in self._leases.items()]
+            heapq.heapify(self._expiry)
+            self._sv_mark, self._label_mark, self._consensus_mark = sv_mark, label_mark, consensus_mark
+            self._built_at = self._refreshed_at = time.time()
+            return sum(len(h) for h in heaps.values())
+
+    def refresh(self, db: Session) -> int:
+        """Fold in SVs, consensus rows and labels written since the last load. Returns rows applied."""
+        sq = select(models.SVCandidate.id, models.SVCandidate.evidence_paths, models.SVCandidate.updated_at)
+        if self._sv_mark is not None:
+            sq = sq.where(models.SVCandidate.updated_at > self._sv_mark)
+        svs = db.execute(sq).all()
+        q = select(models.Consensus.sv_id, models.Consensus.counts_json, models.Consensus.prob,
+                   models.Consensus.label, models.Consensus.updated_at)
+        if self._consensus_mark is not None:
+            q = q.where(models.Consensus.updated_at > self._consensus_mark)
+        rows = db.execute(q).all()
+        lq = select(models.Label.sv_id, models.Label.curator_id, models.Label.created_at)
+        if self._label_mark is not None:
+            lq = lq.where(models.Label.created_at > self._label_mark)
+        labels = db.execute(lq).all()
+        with self._lock:
+            for sv_id, paths, updated in svs:
+                self._put_sv(sv_id, bool(paths))
+                if updated is not None:
+                    self._sv_mark = max(self._sv_mark or updated, updated)
+            for sv_id, curator_id, created in labels:
+                self._voted.setdefault(curator_id, set()).add(sv_id)
+                self._label_mark = max(self._label_mark or created, created)
+            for sv_id, counts, prob, _label, updated in rows:
+                s = self._items.setdefault(sv_id, ItemState())
+                s.votes, s.prob = sum((counts or {}).values()), prob or 0.0
+                self._push(sv_id)
+                self._consensus_mark = max(self._consensus_mark or updated, updated)
+            self._refreshed_at = time.time()
+        return len(svs) + len(rows) + len(labels)
+
+    def ensure_fresh(self, db: Session) -> None:
+        if not self._built_at:
+            self.rebuild(db)
+        elif time.time() - self._refreshed_at >= self.refresh_s:
+            self.refresh(db)
+
+    # -----------------------------
+    # Assignment
+    # -----------------------------
+    def _expire(self, now: float) -> None:
+        while self._expiry and self._expiry[0][0] <= now:
+            expires, sv_id = heapq.heappop(self._expiry)
+            lease = self._leases.get(sv_id)
+            if lease is not None and lease[1] == expires:
+                del self._leases[sv_id]
+                if sv_id in self._items:
+                    self._push(sv_id)
+
+    def _lease(self, sv_id: str, curator_id: str, expires: float) -> None:
+        self._leases[sv_id] = (curator_id, expires)
+        heapq.heappush(self._expiry, (expires, sv_id))
+
+    def pick(self, curator_id: str, n: int, *, max_scan: int = 1000) -> List[Pick]:
+        """Lease up to ``n`` SVs to ``curator_id`` in this process (no DB access)."""
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            expires = now + self.lease_s
+            voted = self._voted.get(curator_id, set())
+            weight = 2.0 * self.agreement(curator_id)  # 1.0 for an average curator
+            out: List[Pick] = []
+            skipped: List[Tuple[str, Tuple]] = []
+            for _ in range(max_scan):
+                if len(out) >= n:
+                    break
+                f, c = self._top(FRESH), self._top(CONTESTED)
+                if f is None and c is None:
+                    break
+                tier = CONTESTED if f is None or (c is not None and -c[0] * weight > -f[0]) else FRESH
+                entry = heapq.heappop(self._heaps[tier])
+                sv_id = entry[2]
+                if sv_id in voted:
+                    skipped.append((tier, entry))
+                    continue
+                self._lease(sv_id, curator_id, expires)
+                s = self._items[sv_id]
+                out.append(Pick(sv_id, -entry[0], s.votes, s.prob, datetime.utcfromtimestamp(expires)))
+            for tier, entry in skipped:
+                heapq.heappush(self._heaps[tier], entry)
+            return out
+
+    def release(self, sv_ids: Iterable[str], curator_id: Optional[str] = None) -> None:
+        """End leases (held by ``curator_id``, if given) and requeue the SVs."""
+        with self._lock:
+            for sv_id in sv_ids:
+                lease = self._leases.get(sv_id)
+                if lease is None or (curator_id is not None and lease[0] != curator_id):
+                    continue
+                del self._leases[sv_id]
+                if sv_id in self._items:
+                    self._push(sv_id)
+
+    def _put_sv(self, sv_id: str, rendered: Optional[bool]) -> None:
+        s = self._items.get(sv_id)
+        if s is None:
+            self._items[sv_id] = ItemState(rendered=bool(rendered))
+        elif rendered is None or s.rendered == rendered:
+            return
+        else:
+            s.rendered = rendered
+        self._push(sv_id)
+
+    def on_svs(self, sv_ids: Iterable[str], rendered: Optional[bool] = None) -> None:
+        """SVs were committed: queue new ones (and set the panel flag, if given)."""
+        with self._lock:
+            for sv_id in sv_ids:
+                self._put_sv(sv_id, rendered)
+
+    def on_label(self, sv_id: str, curator_id: str, outcome: str, consensus: models.Consensus) -> None:
+        """A label was committed: update the SV's priority and the curator's record."""
+        with self._lock:
+            self._voted.setdefault(curator_id, set()).add(sv_id)
+            rec = self._agree.setdefault(curator_id, [0, 0])
+            rec[0] += int(outcome == consensus.label)
+            rec[1] += 1
+            self._leases.pop(sv_id, None)
+            s = self._items.setdefault(sv_id, ItemState())
+            s.votes, s.prob = sum((consensus.counts_json or {}).values()), consensus.prob or 0.0
+            self._push(sv_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "svs": len(self._items),
+                "fresh": len(self._heaps[FRESH]),
+                "contested": len(self._heaps[CONTESTED]),
+                "leased": len(self._leases),
+                "built_at": self._built_at,
+            }
+
+    # -----------------------------
+    # DB-backed entry points (run via AsyncSession.run_sync)
+    # -----------------------------
+    def next_batch(self, db: Session, curator_id: str, n: int) -> List[Pick]:
+        """Pick ``n`` SVs and claim their leases in the DB. SVs another process
+        already holds stay marked as leased here and are replaced. Commits."""
+        self.ensure_fresh(db)
+        out: List[Pick] = []
+        for _ in range(3):
+            picks = self.pick(curator_id, n - len(out))
+            if not picks:
+                break
+            got = claim(db, curator_id, [p.sv_id for p in picks], self.lease_s)
+            out.extend(p for p in picks if p.sv_id in got)
+            if len(out) >= n:
+                break
+        return out
+
+    def give_back(self, db: Session, curator_id: str, sv_ids: List[str]) -> None:
+        """Return unlabelled SVs to the queue. Commits."""
+        db.execute(delete(models.QueueLease).where(models.QueueLease.sv_id.in_(sv_ids),
+                                                   models.QueueLease.curator_id == curator_id))
+        db.commit()
+        self.release(sv_ids, curator_id)
+
+
+def _epoch(dt: datetime) -> float:
+    return (dt - datetime(1970, 1, 1)).total_seconds()
+
+
+def claim(db: Session, curator_id: str, sv_ids: List[str], lease_s: float) -> Set[str]:
+    """Insert leases for ``sv_ids``; returns the ids this call won. Commits."""
+    now = datetime.utcnow()
+    db.execute(delete(models.QueueLease).where(models.QueueLease.sv_id.in_(sv_ids),
+                                               models.QueueLease.expires_at <= now))
+    insert = dialect_insert(db.get_bind().dialect.name)
+    expires = now + timedelta(seconds=lease_s)
+    stmt = (
+        insert(models.QueueLease)
+        .values([{"sv_id": s, "curator_id": curator_id, "expires_at": expires} for s in sv_ids])
+        .on_conflict_do_nothing(index_elements=[models.QueueLease.sv_id])
+        .returning(models.QueueLease.sv_id)
+    )
+    got = set(db.scalars(stmt).all())
+    db.commit()
+    return got
+
+
+def end_leases(db: Session, curator_id: str, sv_ids: List[str]) -> None:
+    """Drop the curator's leases on SVs they just labelled. Caller commits."""
+    db.execute(delete(models.QueueLease).where(and_(models.QueueLease.sv_id.in_(sv_ids),
+                                                    models.QueueLease.curator_id == curator_id)))
+
+
+QUEUE = CurationQueue()
@@ -0,0 +1,129 @@
+# src/genomewiz/services/dawid_skene.py
+"""
+Vectorized Dawid-Skene EM over a sparse item x (curator, observed label) count matrix.
+
+All per-label work is sparse matrix products, so a fit over ~1M labels is a
+few dozen sparse mat-muls. Parameters can be saved and used to warm-start the
+next run (new curators get a default confusion matrix).
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+import json
+
+import numpy as np
+from scipy import sparse
+from scipy.special import logsumexp
+
+
+@dataclass
+class DSParams:
+    classes: List[str]
+    curators: List[str]
+    priors: np.ndarray       # (K,)
+    confusion: np.ndarray    # (C, K_true, K_observed), rows sum to 1
+
+    def save(self, path: str | Path) -> None:
+        np.savez_compressed(path, priors=self.priors, confusion=self.confusion,
+                            meta=np.array(json.dumps({"classes": self.classes,
+                                                      "curators": self.curators})))
+
+    @classmethod
+    def load(cls, path: str | Path) -> "DSParams":
+        with np.load(path) as z:
+            meta = json.loads(str(z["meta"]))
+            return cls(meta["classes"], meta["curators"], z["priors"], z["confusion"])
+
+    def aligned(self, curators: Sequence[str], classes: Sequence[str],
+                default_accuracy: float = 0.7) -> Optional["DSParams"]:
+        """Re-index to a new curator list; unknown curators get a default matrix.
+        Returns None if the class set changed (cold start instead)."""
+        if list(classes) != self.classes:
+            return None
+        K = len(classes)
+        conf = np.repeat(default_confusion(K, default_accuracy)[None], len(curators), axis=0)
+        pos = {c: i for i, c in enumerate(self.curators)}
+        known = [(j, pos[c]) for j, c in enumerate(curators) if c in pos]
+        if known:
+            new_idx, old_idx = map(np.array, zip(*known))
+            conf[new_idx] = self.confusion[old_idx]
+        return DSParams(list(classes), list(curators), self.priors.copy(), conf)
+
+
+@dataclass
+class DSResult:
+    posterior: np.ndarray    # (N, K)
+    params: DSParams
+    iterations: int
+    converged: bool
+    log_likelihood: float
+
+
+def default_confusion(K: int, accuracy: float) -> np.ndarray:
+    off = (1.0 - accuracy) / max(K - 1, 1)
+    m = np.full((K, K), off)
+    np.fill_diagonal(m, accuracy)
+    return m
+
+
+def count_matrix(items: np.ndarray, curators: np.ndarray, labels: np.ndarray,
+                 n_items: int, n_curators: int, K: int) -> sparse.csr_matrix:
+    """N x (C*K) matrix: entry (i, c*K + l) = times curator c gave label l to item i."""
+    data = np.ones(len(items), dtype=np.float64)
+    return sparse.csr_matrix((data, (items, curators * K + labels)),
+                             shape=(n_items, n_curators * K))
+
+
+def _e_step(A: sparse.csr_matrix, priors: np.ndarray, confusion: np.ndarray):
+    C, K, _ = confusion.shape
+    # (C, K_true, K_obs) -> rows indexed by c*K + observed, columns by true class
+    log_pi = np.log(confusion).transpose(0, 2, 1).reshape(C * K, K)
+    log_t = A @ log_pi + np.log(priors)[None, :]
+    norm = logsumexp(log_t, axis=1, keepdims=True)
+    return np.exp(log_t - norm), float(norm.sum())
+
+
+def _m_step(A: sparse.csr_matrix, T: np.ndarray, C: int, K: int, smoothing: float):
+    priors = T.sum(axis=0) + smoothing
+    priors /= priors.sum()
+    # (C*K_obs, K_true) -> (C, K_true, K_obs)
+    counts = np.asarray(A.T @ T).reshape(C, K, K).transpose(0, 2, 1) + smoothing
+    confusion = counts / counts.sum(axis=2, keepdims=True)
+    return priors, confusion
+
+
+def fit(items: np.ndarray, curators: np.ndarray, labels: np.ndarray, *,
+        n_items: int, curator_ids: Sequence[str], classes: Sequence[str],
+        init: Optional[DSParams] = None, max_iter: int = 100, tol: float = 1e-6,
+        smoothing: float = 0.01) -> DSResult:
+    """
+    Fit Dawid-Skene. ``items``, ``curators`` and ``labels`` are parallel integer
+    arrays (one entry per label). With ``init`` (already aligned to
+    ``curator_ids``) EM starts from those parameters, otherwise from the
+    per-item vote shares.
+    """
+    C, K = len(curator_ids), len(classes)
+    A = count_matrix(items, curators, labels, n_items, C, K)
+
+    if init is not None:
+        T, ll = _e_step(A, init.priors, init.confusion)
+    else:
+        votes = (A @ sparse.vstack([sparse.identity(K, format="csr")] * C, format="csr")).toarray()
+        votes += 1e-9
+        T = votes / votes.sum(axis=1, keepdims=True)
+        ll = -np.inf
+
+    converged = False
+    it = 0
+    for it in range(1, max_iter + 1):
+        priors, confusion = _m_step(A, T, C, K, smoothing)
+        T, new_ll = _e_step(A, priors, confusion)
+        if np.isfinite(ll) and abs(new_ll - ll) <= tol * max(1.0, abs(new_ll)):
+            ll = new_ll
+            converged = True
+            break
+        ll = new_ll
+
+    params = DSParams(list(classes), list(curator_ids), priors, confusion)
+    return DSResult(T, params, it, converged, ll)
@@ -0,0 +1,116 @@
+"""
+HTTP delivery of artifact store blobs.
+
+Blobs are content-addressed, so the content hash is a strong ETag and an
+artifact URL never changes meaning: responses are marked immutable, and a
+matching If-None-Match is answered with 304 without opening the file.
+FileResponse serves Range requests (large SVGs). With GW_SENDFILE set, the
+response only names the file and nginx/Apache streams the bytes instead.
+"""
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple, Optional
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+from ..core.config import get_settings
+from .storage import BASE
+
+
+settings = get_settings()
+
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+
+
+def immutable() -> str:
+	return f"{settings.GW_ARTIFACT_CACHE}, max-age=31536000, immutable"
+
+
+def etag(content_hash: str) -> str:
+	return f'"{content_hash}"'
+
+
+def fresh(request: Request, content_hash: str) -> bool:
+	"""True if the client already holds this blob (If-None-Match)."""
+	header = request.headers.get("if-none-match")
+	if not header:
+		return False
+	tag = etag(content_hash)
+	tags = [t.strip() for t in header.split(",")]
+	return "*" in tags or tag in tags or f"W/{tag}" in tags
+
+
+def not_modified(content_hash: str, cache_control: Optional[str] = None) -> Response:
+	return Response(status_code=304, headers={"ETag": etag(content_hash),
+	                                          "Cache-Control": cache_control or immutable()})
+
+
+def blob_response(request: Request, path: str | Path, content_hash: str, *,
+                  media_type: Optional[str] = None, cache_control: Optional[str] = None) -> Response:
+	"""
+	304, a sendfile hand-off, or the file itself. Raises FileNotFoundError if
+	the blob is gone (evicted by enforce_budget).
+	"""
+	if fresh(request, content_hash):
+		return not_modified(content_hash, cache_control)
+	path = Path(path)
+	if not path.is_file():
+		raise FileNotFoundError(str(path))
+	media_type = media_type or MEDIA_TYPES.get(path.suffix.lstrip("."), "application/octet-stream")
+	headers = {"ETag": etag(content_hash), "Cache-Control": cache_control or immutable()}
+	if settings.GW_SENDFILE == "x-accel":
+		rel = path.resolve().relative_to(BASE.resolve()).as_posix()
+		headers["X-Accel-Redirect"] = f"{settings.GW_SENDFILE_PREFIX.rstrip('/')}/{rel}"
+		return Response(media_type=media_type, headers=headers)
+	if settings.GW_SENDFILE == "x-sendfile":
+		headers["X-Sendfile"] = str(path.resolve())
+		return Response(media_type=media_type, headers=headers)
+	return FileResponse(path, media_type=media_type, headers=headers)
+
+
+# -----------------------------
+# artifact id -> blob index
+# -----------------------------
+class ArtifactRef(NamedTuple):
+	evidence_id: str
+	content_hash: str
+	path: str
+	format: str
+
+
+class ArtifactIndex:
+	"""
+	LRU of RenderArtifact rows needed to serve downloads, so repeat downloads
+	skip the DB. Rows are never updated, only deleted with their blob, so
+	entries need no TTL: a stale one shows up as a missing file and is dropped.
+	"""
+
+	def __init__(self, max_size: int = 10000) -> None:
+		self.max_size = max_size
+		self._items: "OrderedDict[str, ArtifactRef]" = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, artifact_id: str) -> Optional[ArtifactRef]:
+		with self._lock:
+			ref = self._items.get(artifact_id)
+			if ref is not None:
+				self._items.move_to_end(artifact_id)
+			return ref
+
+	def put(self, artifact_id: str, ref: ArtifactRef) -> ArtifactRef:
+		with self._lock:
+			self._items[artifact_id] = ref
+			self._items.move_to_end(artifact_id)
+			while len(self._items) > self.max_size:
+				self._items.popitem(last=False)
+		return ref
+
+	def discard(self, artifact_id: str) -> None:
+		with self._lock:
+			self._items.pop(artifact_id, None)
+
+	def __len__(self) -> int:
+		return len(self._items)
+
+
+ARTIFACTS = ArtifactIndex()
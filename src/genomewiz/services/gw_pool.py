@@ -0,0 +1,97 @@
+# src/genomewiz/services/gw_pool.py
+from __future__ import annotations
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+import logging
+
+log = logging.getLogger(__name__)
+
+Signature = Tuple[Tuple[str, int], ...]
+
+
+def file_signature(paths: Sequence[str]) -> Signature:
+    """(path, mtime_ns) for every path that exists; missing paths are skipped
+    so genome tags (e.g. 'hg38') can be used as references."""
+    sig = []
+    for p in paths:
+        try:
+            sig.append((p, os.stat(p).st_mtime_ns))
+        except OSError:
+            continue
+    return tuple(sig)
+
+
+class GwPool:
+    """
+    Bounded LRU pool of warm renderer instances.
+
+    Instances are checked out exclusively (a Gw object is not safe to share
+    between threads) and returned to the pool afterwards. Idle instances are
+    keyed by the caller's key; ``max_idle`` caps the total number of idle
+    instances across keys and the least recently used one is dropped first.
+    An idle instance is discarded on checkout if any of its files changed on
+    disk since it was built.
+    """
+
+    def __init__(self, factory: Callable[[Hashable], Any], max_idle: int = 8):
+        self._factory = factory
+        self._max_idle = max_idle
+        self._idle: "OrderedDict[Tuple[Hashable, int], Tuple[Any, Signature]]" = OrderedDict()
+        self._seq = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _take(self, key: Hashable, sig: Signature) -> Optional[Any]:
+        with self._lock:
+            # most recently returned instance for this key first
+            for slot in reversed(self._idle):
+                if slot[0] != key:
+                    continue
+                inst, inst_sig = self._idle.pop(slot)
+                if inst_sig != sig:
+                    self.invalidations += 1
+                    log.info("GwPool: files changed for %s, dropping warm instance", key)
+                    continue
+                self.hits += 1
+                return inst
+            self.misses += 1
+            return None
+
+    def _give_back(self, key: Hashable, inst: Any, sig: Signature) -> None:
+        if self._max_idle <= 0:
+            return
+        with self._lock:
+            self._seq += 1
+            self._idle[(key, self._seq)] = (inst, sig)
+            while len(self._idle) > self._max_idle:
+                self._idle.popitem(last=False)
+
+    @contextmanager
+    def checkout(self, key: Hashable, files: Sequence[str] = ()) -> Iterator[Any]:
+        """Borrow an instance for ``key``; ``files`` are watched for mtime changes.
+        An instance whose render raised is not returned to the pool."""
+        sig = file_signature(files)
+        inst = self._take(key, sig)
+        if inst is None:
+            inst = self._factory(key)
+        yield inst
+        self._give_back(key, inst, sig)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._idle.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            idle = len(self._idle)
+        return {"idle": idle, "max_idle": self._max_idle, "hits": self.hits,
+                "misses": self.misses, "invalidations": self.invalidations}
+
+    def idle_keys(self) -> List[Hashable]:
+        with self._lock:
+            return [slot[0] for slot in self._idle]
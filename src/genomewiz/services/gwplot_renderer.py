@@ -1,9 +1,11 @@
 # src/genomewiz/services/gwplot_renderer.py
 from __future__ import annotations
 import os
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Optional, Dict
-import anyio
+from typing import AsyncIterator, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from concurrent.futures import Future
+import asyncio
 import logging
 
 log = logging.getLogger(__name__)
@@ -14,32 +16,50 @@ except ImportError as e:
     raise ImportError("gwplot is not installed. Install it or add to pyproject: "
                       "'gwplot @ git+https://github.com/kcleal/gwplot.git'") from e
 
-def _sample_paths(sample_id: str) -> Dict[str, str]:
-    root = Path(os.getenv("GW_DATA_ROOT", "./data")).resolve()
-    bam = root / sample_id / f"{sample_id}.bam"
-    vcf = root / sample_id / f"{sample_id}.vcf.gz"
-    bed = root / sample_id / f"{sample_id}.bed"
-    out = {"bam": str(bam)}
-    if vcf.exists(): out["vcf"] = str(vcf)
-    if bed.exists(): out["bed"] = str(bed)
-    return out
-
-def _build_gw(reference: str) -> Gw:
+from ..core.metrics import stage
+from .gw_pool import GwPool
+from .render_executor import RenderBusy, get_executor, gw_threads
+from .bam_slices import render_paths as _render_paths
+from .storage import artifact_path, materialize
+from .tiles import Tile, tile_hash, tile_region, tile_size
+
+def _build_gw(reference: str, theme: Optional[str] = None,
+              canvas_width: Optional[int] = None, canvas_height: Optional[int] = None) -> Gw:
     return Gw(
         reference,
-        theme=os.getenv("GW_THEME", "dark"),
-        canvas_width=int(os.getenv("GW_CANVAS_W", "1000")),
-        canvas_height=int(os.getenv("GW_CANVAS_H", "420")),
+        theme=theme or os.getenv("GW_THEME", "dark"),
+        canvas_width=canvas_width or int(os.getenv("GW_CANVAS_W", "1000")),
+        canvas_height=canvas_height or int(os.getenv("GW_CANVAS_H", "420")),
         sv_arcs=True,
-        threads=4,
+        threads=gw_threads(),
     )
 
-def _render_png_sync(sample_id: str, chrom: str, start: int, end: int, sv_id: Optional[str] = None) -> bytes:
-    ref = os.getenv("GW_REFERENCE", "hg38")
-    paths = _sample_paths(sample_id)
-    log.info("GWPlot render start: ref=%s bam=%s vcf=%s bed=%s region=%s:%s-%s",
-             ref, paths.get("bam"), paths.get("vcf"), paths.get("bed"), chrom, start, end)
+# Key: (reference, sample_id, tracks, theme, canvas_width, canvas_height)
+PoolKey = Tuple[str, str, Tuple[str, ...], str, int, int]
+
+def _load_gw(key: PoolKey) -> Gw:
+    ref, _sample_id, tracks, theme, width, height = key
+    gw = _build_gw(ref, theme=theme, canvas_width=width, canvas_height=height)
+    gw.add_bam(tracks[0])
+    for t in tracks[1:]:
+        gw.add_track(t)
+    return gw
+
+_POOL = GwPool(_load_gw, max_idle=int(os.getenv("GW_POOL_SIZE", "8")))
 
+def _pool_key(ref: str, sample_id: str, paths: Dict[str, str],
+              width: Optional[int] = None, height: Optional[int] = None) -> PoolKey:
+    tracks = tuple(paths[k] for k in ("bam", "vcf", "bed") if k in paths)
+    return (ref, sample_id, tracks,
+            os.getenv("GW_THEME", "dark"),
+            width or int(os.getenv("GW_CANVAS_W", "1000")),
+            height or int(os.getenv("GW_CANVAS_H", "420")))
+
+def _watched_files(ref: str, paths: Dict[str, str]) -> List[str]:
+    bam = paths["bam"]
+    return [ref, bam, bam + ".bai", bam + ".csi", *(paths[k] for k in ("vcf", "bed") if k in paths)]
+
+def _check_inputs(ref: str, paths: Dict[str, str]) -> None:
     if not os.path.exists(ref):
         raise FileNotFoundError(f"GW_REFERENCE not found: {ref}")
     if not os.path.exists(paths["bam"]):
@@ -49,34 +69,249 @@ def _render_png_sync(sample_id: str, chrom: str, start: int, end: int, sv_id: Op
     if not (os.path.exists(bai) or os.path.exists(csi)):
         raise FileNotFoundError(f"BAM index not found (.bai/.csi): {bai} / {csi}")
 
-    gw = _build_gw(ref)
-    gw.add_bam(paths["bam"])
-    if "vcf" in paths: gw.add_track(paths["vcf"])
-    if "bed" in paths: gw.add_track(paths["bed"])
+# (chrom, start, end); several panels are drawn side by side on one canvas
+Panel = Tuple[str, int, int]
+
+def _render_png_sync(sample_id: str, chrom: str, start: int, end: int, sv_id: Optional[str] = None) -> bytes:
+    return _render_panels_png_sync(sample_id, [(chrom, start, end)])
+
+def _render_panels_png_sync(sample_id: str, panels: Sequence[Panel]) -> bytes:
+    ref = os.getenv("GW_REFERENCE", "hg38")
+    paths = _render_paths(sample_id, panels)  # a cached BAM slice when GW_SLICE_DIR is set
+    log.info("GWPlot render start: ref=%s bam=%s vcf=%s bed=%s regions=%s",
+             ref, paths.get("bam"), paths.get("vcf"), paths.get("bed"),
+             ",".join(f"{c}:{s}-{e}" for c, s, e in panels))
+    _check_inputs(ref, paths)
+
+    with ExitStack() as es:
+        with stage("open"):  # warm instance, or a fresh Gw + BAM/track load on a pool miss
+            gw = es.enter_context(_POOL.checkout(_pool_key(ref, sample_id, paths), _watched_files(ref, paths)))
+        return _draw_png(gw, panels)
+
+def _view(gw: Gw, panels: Sequence[Panel]) -> None:
+    """Point ``gw`` at one region, or at several for a composite panel
+    (e.g. both breakpoints of a translocation, read from the same open BAM)."""
+    with stage("view_region"):
+        if len(panels) == 1:
+            gw.view_region(*panels[0])
+        else:
+            gw.clear_regions()
+            for chrom, start, end in panels:
+                gw.add_region(chrom, start, end)
 
-    gw.view_region(chrom, start, end)
-    gw.draw(clear_buffer=True)
-    return gw.encode_as_png()
+def _draw_png(gw: Gw, panels: Sequence[Panel]) -> bytes:
+    _view(gw, panels)
+    with stage("draw"):
+        gw.draw(clear_buffer=True)
+    with stage("encode"):
+        return gw.encode_as_png()
+
+def _draw_svg(gw: Gw, panels: Sequence[Panel], out_svg: str) -> str:
+    _view(gw, panels)
+    with stage("draw"):
+        gw.draw(clear_buffer=True)
+    with stage("encode"):
+        gw.save_svg(out_svg)
+    return out_svg
 
 
 async def render_png(sample_id: str, chrom: str, start: int, end: int,
                      sv_id: Optional[str] = None) -> bytes:
-    return await anyio.to_thread.run_sync(_render_png_sync, sample_id, chrom, start, end, sv_id)
+    return await get_executor().run(_render_png_sync, sample_id, chrom, start, end, sv_id)
+
+async def render_composite_png(sample_id: str, panels: Sequence[Panel]) -> bytes:
+    return await get_executor().run(_render_panels_png_sync, sample_id, list(panels))
 
 def _render_svg_file_sync(sample_id: str, chrom: str, start: int, end: int,
                           out_svg: str) -> str:
+    return _render_panels_svg_sync(sample_id, [(chrom, start, end)], out_svg)
+
+def _render_panels_svg_sync(sample_id: str, panels: Sequence[Panel], out_svg: str) -> str:
     ref = os.getenv("GW_REFERENCE", "hg38")
-    paths = _sample_paths(sample_id)
+    paths = _render_paths(sample_id, panels)
     Path(out_svg).parent.mkdir(parents=True, exist_ok=True)
-    gw = _build_gw(ref)
-    gw.add_bam(paths["bam"])
-    if "vcf" in paths: gw.add_track(paths["vcf"])
-    if "bed" in paths: gw.add_track(paths["bed"])
-    gw.view_region(chrom, start, end)
-    gw.draw(clear_buffer=True)
-    gw.save_svg(out_svg)
-    return out_svg
+    with ExitStack() as es:
+        with stage("open"):
+            gw = es.enter_context(_POOL.checkout(_pool_key(ref, sample_id, paths), _watched_files(ref, paths)))
+        return _draw_svg(gw, panels, out_svg)
 
 async def render_svg_file(sample_id: str, chrom: str, start: int, end: int,
                           out_svg: str) -> str:
-    return await anyio.to_thread.run_sync(_render_svg_file_sync, sample_id, chrom, start, end, out_svg)
+    return await get_executor().run(_render_svg_file_sync, sample_id, chrom, start, end, out_svg)
+
+
+# -----------------------------
+# Batch rendering
+# -----------------------------
+class Region(NamedTuple):
+    key: str          # caller's identifier, e.g. an sv_id
+    sample_id: str
+    chrom: str
+    start: int
+    end: int
+    panels: Optional[Tuple[Panel, ...]] = None  # composite render; chrom/start/end is the first panel
+
+BatchResult = Tuple[Region, Optional[str], Optional[Exception]]
+
+def _render_region_file(sample_id: str, chrom: str, start: int, end: int,
+                        fmt: str, content_hash: str) -> str:
+    return _render_panels_file(sample_id, [(chrom, start, end)], fmt, content_hash)
+
+def _render_panels_file(sample_id: str, panels: Sequence[Panel], fmt: str, content_hash: str) -> str:
+    """Render one region (or a composite of several) into the artifact store
+    under ``content_hash`` (no-op if the blob exists; coalesced with concurrent
+    renders of the same hash). Module-level so it can run on the process backend."""
+    def produce(tmp: str) -> None:
+        if fmt == "png":
+            png = _render_panels_png_sync(sample_id, panels)
+            with stage("write"), open(tmp, "wb") as f:
+                f.write(png)
+        else:
+            _render_panels_svg_sync(sample_id, panels, tmp)
+    return str(materialize(content_hash, fmt, produce))
+
+# -----------------------------
+# Tiles
+# -----------------------------
+def _render_tile_file(tile: Tile) -> str:
+    """Render one tile into the artifact store (no-op if already there).
+    Tiles use their own pool key, since the canvas is tile-sized."""
+    ref = os.getenv("GW_REFERENCE", "hg38")
+    start, end = tile_region(tile)
+    paths = _render_paths(tile.sample_id, [(tile.chrom, start, end)])
+    _check_inputs(ref, paths)
+    width, height = tile_size()
+
+    def produce(tmp: str) -> None:
+        with ExitStack() as es:
+            with stage("open"):
+                gw = es.enter_context(_POOL.checkout(_pool_key(ref, tile.sample_id, paths, width, height),
+                                                     _watched_files(ref, paths)))
+            png = _draw_png(gw, [(tile.chrom, start, end)])
+        with stage("write"), open(tmp, "wb") as f:
+            f.write(png)
+    return str(materialize(tile_hash(tile), "png", produce))
+
+async def render_tile(tile: Tile) -> str:
+    return await get_executor().run(_render_tile_file, tile)
+
+def prefetch_tiles(tiles: Iterable[Tile]) -> int:
+    """Queue renders for tiles not yet in the store, without waiting for them.
+    Only uses idle render slots, so prefetching never causes a 503 for real requests."""
+    ex = get_executor()
+    queued = 0
+    for t in tiles:
+        if ex.depth >= ex.workers:
+            break
+        if artifact_path(tile_hash(t), "png").exists():
+            continue
+        try:
+            ex.submit(_render_tile_file, t).add_done_callback(_prefetched)
+        except RenderBusy:
+            break
+        queued += 1
+    return queued
+
+def _prefetched(f: Future) -> None:
+    """Register a prefetched tile's blob, so the store budget can evict it."""
+    if f.exception() is not None:
+        log.debug("Tile prefetch failed: %s", f.exception())
+        return
+    from genomewiz.db.base import SessionLocal
+    from genomewiz.services.storage import note_blob
+    path = Path(f.result())
+    db = SessionLocal()
+    try:
+        note_blob(db, path.stem, "png", path)
+        db.commit()
+    except Exception as e:  # e.g. registered concurrently; the next request touches it
+        db.rollback()
+        log.debug("Could not register prefetched tile %s: %s", path.name, e)
+    finally:
+        db.close()
+
+async def render_batch(regions: Iterable[Region], *, fmt: str = "png",
+                       content_hash: Callable[[Region], str],
+                       workers: Optional[int] = None) -> AsyncIterator[BatchResult]:
+    """
+    Render many regions and yield ``(region, path, error)`` as each finishes.
+
+    Regions are grouped by sample and each group is rendered sequentially, so a
+    render worker keeps reusing the same warm Gw instance (the BAM is opened
+    once per group). Up to ``workers`` groups (default: the executor's worker
+    count) run in parallel on the render executor. Outputs go to the artifact
+    store under ``content_hash(region)``; an existing blob is reported without
+    re-rendering.
+    """
+    if fmt not in ("png", "svg"):
+        raise ValueError(f"Unsupported format: {fmt}")
+    groups: Dict[str, List[Region]] = {}
+    for r in regions:
+        groups.setdefault(r.sample_id, []).append(r)
+    pending = list(groups.values())
+    total = sum(len(g) for g in pending)
+    if not total:
+        return
+
+    ex = get_executor()
+    loop = asyncio.get_running_loop()
+    results: "asyncio.Queue[BatchResult]" = asyncio.Queue()
+
+    def emit(item: BatchResult) -> None:
+        loop.call_soon_threadsafe(results.put_nowait, item)
+
+    def fail(r: Region, err: BaseException) -> None:
+        log.warning("GWPlot batch render failed for %s: %s", r.key, err)
+        emit((r, None, err))
+
+    def finish(r: Region, f: Future) -> None:
+        err = f.exception()
+        if err:
+            fail(r, err)
+        else:
+            emit((r, f.result(), None))
+
+    def run_group(items: List[Region], i: int = 0) -> None:
+        # Iterative so already-completed futures (inline backend) don't recurse.
+        while True:
+            if i >= len(items):
+                try:
+                    items, i = pending.pop(0), 0
+                except IndexError:
+                    return
+                continue
+            r = items[i]
+            try:
+                fut = ex.submit(_render_panels_file, r.sample_id,
+                                list(r.panels or [(r.chrom, r.start, r.end)]), fmt, content_hash(r))
+            except RenderBusy as e:
+                for rest in items[i:]:
+                    emit((rest, None, e))
+                i = len(items)
+                continue
+            except Exception as e:  # e.g. content_hash(r) failed: report it, keep going
+                fail(r, e)
+                i += 1
+                continue
+            if fut.done():
+                finish(r, fut)
+                i += 1
+                continue
+
+            def done(f: Future, r: Region = r, rest: List[Region] = items, nxt: int = i + 1) -> None:
+                # an exception escaping a done-callback is only logged by
+                # concurrent.futures, and the batch would wait for this item forever
+                try:
+                    finish(r, f)
+                except Exception as e:
+                    fail(r, e)
+                finally:
+                    run_group(rest, nxt)
+
+            fut.add_done_callback(done)
+            return
+
+    for _ in range(min(workers or ex.workers, len(pending))):
+        run_group([])
+    for _ in range(total):
+        yield await results.get()
@@ -0,0 +1,62 @@
+# src/genomewiz/services/intervals.py
+"""
+UCSC-style hierarchical binning for interval overlap queries.
+
+Every interval is stored with the smallest bin that fully contains it. An
+overlap query for [start, end) only has to look at the handful of bins
+returned by ``reg2bins``, so a plain (chrom, bin, pos1) B-tree index answers
+locus-window queries on both Postgres and SQLite.
+Coordinates are 0-based half-open, as in the UCSC/BAM spec.
+"""
+from __future__ import annotations
+import re
+from typing import List, Optional, Tuple
+
+# 5 levels above the 16 kb leaves: 128 Mb, 16 Mb, 2 Mb, 256 kb, 16 kb (+ one bin for >512 Mb)
+_SHIFTS = (26, 23, 20, 17, 14)
+_OFFSETS = (1, 9, 73, 585, 4681)
+MAX_POS = 1 << 29
+
+
+def reg2bin(start: int, end: int) -> int:
+    """Smallest bin containing [start, end)."""
+    end -= 1
+    for shift, offset in zip(reversed(_SHIFTS), reversed(_OFFSETS)):
+        if start >> shift == end >> shift:
+            return offset + (start >> shift)
+    return 0
+
+
+def reg2bins(start: int, end: int) -> List[int]:
+    """Every bin that may hold an interval overlapping [start, end)."""
+    start = max(0, start)
+    end = min(max(end, start + 1), MAX_POS) - 1
+    bins = [0]
+    for shift, offset in zip(_SHIFTS, _OFFSETS):
+        bins.extend(range(offset + (start >> shift), offset + (end >> shift) + 1))
+    return bins
+
+
+def sv_span(chrom: str, pos1: int, pos2: Optional[int], svtype: str,
+            chrom2: Optional[str] = None) -> Tuple[int, int]:
+    """Reference span [start, end) of a call. Translocations/BNDs (and anything
+    whose second breakpoint is on another chromosome) only occupy pos1."""
+    if svtype in ("TRA", "BND") or (chrom2 and chrom2 != chrom) or not pos2 or pos2 <= pos1:
+        return pos1, pos1 + 1
+    return pos1, pos2
+
+
+_REGION = re.compile(r"^(?P<chrom>[^:\s]+)(?::(?P<start>[\d,]+)-(?P<end>[\d,]+))?$")
+
+
+def parse_region(region: str) -> Tuple[str, Optional[int], Optional[int]]:
+    """Parse ``chrom`` or ``chrom:start-end`` (commas allowed). Raises ValueError."""
+    m = _REGION.match(region.strip())
+    if not m:
+        raise ValueError(f"Bad region {region!r}; expected chrom or chrom:start-end")
+    if m["start"] is None:
+        return m["chrom"], None, None
+    start, end = int(m["start"].replace(",", "")), int(m["end"].replace(",", ""))
+    if end <= start:
+        raise ValueError(f"Empty region {region!r}")
+    return m["chrom"], start, end
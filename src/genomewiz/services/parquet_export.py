@@ -0,0 +1,295 @@
+# src/genomewiz/services/parquet_export.py
+"""
+Columnar training-set export (Parquet, via pyarrow).
+
+One row per SVCandidate: coordinates, every ``features_json`` key as its own
+column (``feat_<key>``), the consensus label and probability, and the
+individual votes as a list of (curator_id, outcome, confidence, created_at)
+structs. Rows are read in keyset pages of ``row_group_size`` and each page is
+written as Parquet row groups, so memory stays flat however large the cohort.
+
+``export_dataset`` writes a hive-partitioned dataset
+(``<out>/<snapshot>/sample_id=<s>/chrom=<c>/part-0.parquet``). A manifest in
+``<out>`` records each snapshot and its watermark; with ``incremental`` only
+SVs whose call or consensus changed since the last snapshot are written,
+so readers take the newest row per ``sv_id`` across snapshots.
+``stream_parquet`` yields a single Parquet file in chunks for HTTP downloads.
+"""
+from __future__ import annotations
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+import logging
+
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from genomewiz.db import models
+
+log = logging.getLogger(__name__)
+
+ROW_GROUP_SIZE = 50_000
+MANIFEST = "_genomewiz_export.json"
+# changes committed while a snapshot is being read can carry slightly older
+# timestamps; re-exporting that overlap is harmless (newest row per sv_id wins)
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+SV_COLUMNS = ("id", "sample_id", "chrom", "pos1", "pos2", "span_end", "svtype", "size", "caller")
+
+
+def _pa():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export needs pyarrow: pip install 'genomewiz[parquet]'") from e
+    return pa, pq
+
+
+# -----------------------------
+# Schema
+# -----------------------------
+def _changed_filter(since: Optional[datetime]):
+    if since is None:
+        return None
+    return or_(models.SVCandidate.updated_at > since, models.Consensus.updated_at > since)
+
+
+def _base_query(since: Optional[datetime]):
+    q = (
+        select(*(getattr(models.SVCandidate, c) for c in SV_COLUMNS), models.SVCandidate.features_json,
+               models.Consensus.label, models.Consensus.prob, models.Consensus.n_curators,
+               models.Consensus.method)
+        .outerjoin(models.Consensus, models.Consensus.sv_id == models.SVCandidate.id)
+    )
+    changed = _changed_filter(since)
+    return q.where(changed) if changed is not None else q
+
+
+def feature_types(db: Session, since: Optional[datetime] = None) -> Dict[str, str]:
+    """Scan features_json once and pick one column type per key: "bool", "int",
+    "float" or "string" (anything else is stored as JSON text)."""
+    seen: Dict[str, set] = {}
+    q = select(models.SVCandidate.features_json).outerjoin(
+        models.Consensus, models.Consensus.sv_id == models.SVCandidate.id)
+    changed = _changed_filter(since)
+    if changed is not None:
+        q = q.where(changed)
+    for (features,) in db.execute(q.execution_options(yield_per=ROW_GROUP_SIZE)):
+        for k, v in (features or {}).items():
+            if v is not None:
+                seen.setdefault(k, set()).add(type(v))
+    out = {}
+    for k, types in sorted(seen.items()):
+        if types == {bool}:
+            out[k] = "bool"
+        elif types <= {int}:
+            out[k] = "int"
+        elif types <= {int, float}:
+            out[k] = "float"
+        else:
+            out[k] = "string"
+    return out
+
+
+def arrow_schema(features: Dict[str, str]):
+    pa, _ = _pa()
+    kinds = {"bool": pa.bool_(), "int": pa.int64(), "float": pa.float64(), "string": pa.string()}
+    vote = pa.struct([("curator_id", pa.string()), ("outcome", pa.string()),
+                      ("confidence", pa.int8()), ("created_at", pa.timestamp("us"))])
+    return pa.schema([
+        ("sv_id", pa.string()), ("sample_id", pa.string()), ("chrom", pa.string()),
+        ("pos1", pa.int64()), ("pos2", pa.int64()), ("span_end", pa.int64()),
+        ("svtype", pa.string()), ("size", pa.int64()), ("caller", pa.string()),
+        *((f"feat_{k}", kinds[t]) for k, t in features.items()),
+        ("consensus_label", pa.string()), ("consensus_prob", pa.float64()),
+        ("n_curators", pa.int32()), ("consensus_method", pa.string()),
+        ("votes", pa.list_(vote)),
+    ])
+
+
+# -----------------------------
+# Rows
+# -----------------------------
+def _feature_value(v: Any, kind: str) -> Any:
+    if v is None:
+        return None
+    if kind == "string" and not isinstance(v, str):
+        return json.dumps(v)
+    if kind == "float":
+        return float(v)
+    return v
+
+
+def _votes(db: Session, sv_ids: List[str]) -> Dict[str, List[dict]]:
+    out: Dict[str, List[dict]] = {}
+    for sv_id, curator_id, outcome, confidence, created in db.execute(
+        select(models.Label.sv_id, models.Label.curator_id, models.Label.outcome,
+               models.Label.confidence, models.Label.created_at)
+        .where(models.Label.sv_id.in_(sv_ids))
+        .order_by(models.Label.sv_id, models.Label.created_at)
+    ):
+        out.setdefault(sv_id, []).append({"curator_id": curator_id, "outcome": outcome,
+                                          "confidence": confidence, "created_at": created})
+    return out
+
+
+def iter_pages(db: Session, *, since: Optional[datetime] = None,
+               page_size: int = ROW_GROUP_SIZE) -> Iterator[List]:
+    """Rows in (sample_id, chrom, pos1, id) order, one keyset page at a time."""
+    sv = models.SVCandidate
+    after: Optional[Tuple] = None
+    while True:
+        q = _base_query(since).order_by(sv.sample_id, sv.chrom, sv.pos1, sv.id).limit(page_size)
+        if after is not None:
+            q = q.where(tuple_(sv.sample_id, sv.chrom, sv.pos1, sv.id) > after)
+        page = db.execute(q).all()
+        if not page:
+            return
+        yield page
+        last = page[-1]
+        after = (last.sample_id, last.chrom, last.pos1, last.id)
+        if len(page) < page_size:
+            return
+
+
+def to_table(db: Session, page: List, features: Dict[str, str], schema):
+    """One page of query rows as an Arrow table (votes fetched with one IN query)."""
+    pa, _ = _pa()
+    votes = _votes(db, [r.id for r in page])
+    cols: Dict[str, list] = {name: [] for name in schema.names}
+    for r in page:
+        f = r.features_json or {}
+        cols["sv_id"].append(r.id)
+        for c in SV_COLUMNS[1:]:
+            cols[c].append(getattr(r, c))
+        for k, kind in features.items():
+            cols[f"feat_{k}"].append(_feature_value(f.get(k), kind))
+        cols["consensus_label"].append(r.label)
+        cols["consensus_prob"].append(r.prob)
+        cols["n_curators"].append(r.n_curators)
+        cols["consensus_method"].append(r.method)
+        cols["votes"].append(votes.get(r.id, []))
+    return pa.table(cols, schema=schema)
+
+
+# -----------------------------
+# Partitioned dataset
+# -----------------------------
+def read_manifest(out_dir: str | Path) -> dict:
+    p = Path(out_dir) / MANIFEST
+    return json.loads(p.read_text()) if p.exists() else {"snapshots": []}
+
+
+def _write_manifest(out_dir: Path, manifest: dict) -> None:
+    tmp = out_dir / f".{MANIFEST}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2))
+    tmp.replace(out_dir / MANIFEST)
+
+
+def export_dataset(db: Session, out_dir: str | Path, *, incremental: bool = True,
+                   row_group_size: int = ROW_GROUP_SIZE) -> dict:
+    """
+    Write one snapshot of the training set under ``out_dir`` and record it in
+    the manifest. With ``incremental`` (and an earlier snapshot) only changed
+    SVs are written. Returns the manifest entry.
+    """
+    _, pq = _pa()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(out_dir)
+    previous = manifest["snapshots"][-1] if manifest["snapshots"] else None
+    since = datetime.fromisoformat(previous["watermark"]) if incremental and previous else None
+    started = datetime.utcnow()
+    snapshot = started.strftime("%Y%m%dT%H%M%S%fZ")
+
+    features = feature_types(db, since)
+    schema = arrow_schema(features)
+    writer = None
+    key = None
+    rows = files = 0
+    try:
+        for page in iter_pages(db, since=since, page_size=row_group_size):
+            table = to_table(db, page, features, schema)
+            # pages are ordered by partition, so each partition's writer is opened once
+            start = 0
+            parts = list(zip(table.column("sample_id").to_pylist(), table.column("chrom").to_pylist()))
+            while start < len(parts):
+                end = start
+                while end < len(parts) and parts[end] == parts[start]:
+                    end += 1
+                if parts[start] != key:
+                    if writer is not None:
+                        writer.close()
+                    key = parts[start]
+                    d = out_dir / snapshot / f"sample_id={quote(key[0], safe='')}" / f"chrom={quote(key[1], safe='')}"
+                    d.mkdir(parents=True, exist_ok=True)
+                    writer = pq.ParquetWriter(d / "part-0.parquet", schema, compression="zstd")
+                    files += 1
+                writer.write_table(table.slice(start, end - start), row_group_size=row_group_size)
+                start = end
+            rows += len(page)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    entry = {"snapshot": snapshot, "incremental": since is not None,
+             "since": since.isoformat() if since else None,
+             "watermark": (started - WATERMARK_OVERLAP).isoformat(),
+             "rows": rows, "files": files, "features": features}
+    manifest["snapshots"].append(entry)
+    _write_manifest(out_dir, manifest)
+    log.info("Exported %d SVs to %s/%s (%d files)", rows, out_dir, snapshot, files)
+    return entry
+
+
+# -----------------------------
+# Streaming (HTTP download)
+# -----------------------------
+class _Chunks:
+    """Write-only file object that collects what pyarrow writes, to be drained."""
+
+    def __init__(self) -> None:
+        self.parts: List[bytes] = []
+        self.pos = 0
+        self.closed = False
+
+    def write(self, b) -> int:
+        b = bytes(b)
+        self.parts.append(b)
+        self.pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self.pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out = b"".join(self.parts)
+        self.parts.clear()
+        return out
+
+
+def stream_parquet(db: Session, *, since: Optional[datetime] = None,
+                   row_group_size: int = ROW_GROUP_SIZE) -> Iterator[bytes]:
+    """One Parquet file (unpartitioned), yielded as each row group is written."""
+    pa, pq = _pa()
+    features = feature_types(db, since)
+    schema = arrow_schema(features)
+    sink = _Chunks()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd") as writer:
+        for page in iter_pages(db, since=since, page_size=row_group_size):
+            writer.write_table(to_table(db, page, features, schema), row_group_size=row_group_size)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    tail = sink.drain()
+    if tail:
+        yield tail
@@ -0,0 +1,254 @@
+# src/genomewiz/services/read_evidence.py
+"""
+Read-evidence summaries for SV triage, computed from the sample BAM with pysam.
+
+Each SVCandidate's panel windows (the regions a render would show, see
+render_queue.sv_panels) are scanned once and reduced to split-read and
+discordant-pair counts, the depth change between the SV and its flanks, and a
+binned coverage profile stored as a compact uint16 array. Curators can triage
+on these numbers and only open a gwplot render for the hard cases.
+
+Samples are independent, so ``run_summaries`` gives each sample to its own
+worker process; within a sample, SVs are visited in coordinate order over one
+open BAM.
+"""
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from genomewiz.db.base import SessionLocal, dialect_insert, engine
+from genomewiz.db import models
+from genomewiz.services.render_queue import Panel, sv_panels
+from genomewiz.services.samples import sample_paths
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+_UPSERT_COLS = ("split_reads", "discordant_pairs", "mean_depth", "coverage_drop", "panels_json",
+                "bin_size", "coverage", "bam_mtime", "computed_at")
+
+# (chrom, start, end) -> reads overlapping the window (pysam AlignmentFile.fetch)
+Fetch = Callable[[str, int, int], Iterable]
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _pad() -> int:
+    return _env_int("GW_READSUM_PAD", _env_int("GW_SV_PAD", 1000))
+
+
+def _bin_size() -> int:
+    return _env_int("GW_READSUM_BIN", 50)
+
+
+def _slop() -> int:
+    return _env_int("GW_READSUM_SLOP", 50)
+
+
+def _min_mapq() -> int:
+    return _env_int("GW_READSUM_MIN_MAPQ", 20)
+
+
+def breakpoints(sv: models.SVCandidate) -> List[Tuple[str, int]]:
+    out = [(sv.chrom, sv.pos1)]
+    if sv.pos2 is not None:
+        out.append(((sv.features_json or {}).get("chr2") or sv.chrom, sv.pos2))
+    return out
+
+
+def _clip_positions(read) -> List[int]:
+    """Reference positions where ``read`` is soft/hard clipped."""
+    cig = read.cigartuples or []
+    out = []
+    if cig and cig[0][0] in (4, 5):
+        out.append(read.reference_start)
+    if cig and cig[-1][0] in (4, 5):
+        out.append(read.reference_end)
+    return out
+
+
+def _bin_means(depth: np.ndarray, bin_size: int) -> np.ndarray:
+    if not len(depth):
+        return np.zeros(0)
+    idx = np.arange(0, len(depth), bin_size)
+    return np.add.reduceat(depth, idx) / np.diff(np.append(idx, len(depth)))
+
+
+def summarize(fetch: Fetch, sv: models.SVCandidate, *, pad: Optional[int] = None,
+              bin_size: Optional[int] = None, slop: Optional[int] = None,
+              min_mapq: Optional[int] = None) -> dict:
+    """Scan the windows around ``sv`` and return a SVReadSummary row (as a dict,
+    without ``bam_mtime``). Reads are counted once per name across windows."""
+    pad = _pad() if pad is None else pad
+    bin_size = bin_size or _bin_size()
+    slop = _slop() if slop is None else slop
+    min_mapq = _min_mapq() if min_mapq is None else min_mapq
+    panels = sv_panels(sv, pad)
+    bps = breakpoints(sv)
+    split, discordant = set(), set()
+    depths, bins = [], []
+    for chrom, start, end in panels:
+        near = [p for c, p in bps if c == chrom]
+        diff = np.zeros(end - start + 1, dtype=np.int32)
+        for r in fetch(chrom, start, end):
+            if (r.is_unmapped or r.is_secondary or r.is_duplicate or r.is_qcfail
+                    or r.mapping_quality < min_mapq):
+                continue
+            s, e = max(r.reference_start, start) - start, min(r.reference_end, end) - start
+            if e > s:
+                diff[s] += 1
+                diff[e] -= 1
+            if r.has_tag("SA") and any(abs(c - p) <= slop for c in _clip_positions(r) for p in near):
+                split.add(r.query_name)
+            if r.is_paired and not r.is_proper_pair and not r.mate_is_unmapped:
+                discordant.add(r.query_name)
+        depth = np.cumsum(diff[:-1])
+        depths.append(depth)
+        bins.append(_bin_means(depth, bin_size))
+
+    all_depth = np.concatenate(depths) if depths else np.zeros(0)
+    return {
+        "sv_id": sv.id,
+        "split_reads": len(split),
+        "discordant_pairs": len(discordant),
+        "mean_depth": float(all_depth.mean()) if len(all_depth) else 0.0,
+        "coverage_drop": _coverage_drop(sv, panels, depths),
+        "panels_json": [list(p) for p in panels],
+        "bin_size": bin_size,
+        "coverage": encode_coverage(np.concatenate(bins) if bins else np.zeros(0)),
+        "computed_at": datetime.utcnow(),
+    }
+
+
+def _coverage_drop(sv: models.SVCandidate, panels: Sequence[Panel],
+                   depths: Sequence[np.ndarray]) -> Optional[float]:
+    """1 - (mean depth between the breakpoints / mean depth of the flanks), for
+    calls drawn as one window; deletions come out positive, duplications negative."""
+    if len(panels) != 1 or sv.pos2 is None or sv.svtype in ("INS", "TRA", "BND"):
+        return None
+    _chrom, start, _end = panels[0]
+    lo, hi = sorted((sv.pos1 - start, sv.pos2 - start))
+    depth = depths[0]
+    inside = depth[max(lo, 0):hi]
+    flanks = np.concatenate([depth[:max(lo, 0)], depth[hi:]])
+    if not len(inside) or not len(flanks) or flanks.mean() == 0:
+        return None
+    return float(1.0 - inside.mean() / flanks.mean())
+
+
+def encode_coverage(bins: np.ndarray) -> bytes:
+    return np.clip(np.rint(bins), 0, 65535).astype("<u2").tobytes()
+
+
+def decode_coverage(row: models.SVReadSummary) -> List[List[int]]:
+    """The stored profile split back into one list of bin depths per panel."""
+    flat = np.frombuffer(row.coverage, dtype="<u2")
+    out, i = [], 0
+    for _chrom, start, end in row.panels_json:
+        n = -(-(end - start) // row.bin_size)
+        out.append(flat[i:i + n].tolist())
+        i += n
+    return out
+
+
+def upsert_batch(db: Session, rows: List[dict]) -> None:
+    """Insert-or-replace summaries. Caller commits."""
+    if not rows:
+        return
+    insert = dialect_insert(db.get_bind().dialect.name)
+    stmt = insert(models.SVReadSummary)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.SVReadSummary.sv_id],
+        set_={c: stmt.excluded[c] for c in _UPSERT_COLS},
+    )
+    db.execute(stmt, rows)
+
+
+def summarize_sample(sample_id: str, *, force: bool = False, batch_size: int = BATCH_SIZE) -> int:
+    """Compute summaries for the sample's SVs that have none yet (or that were
+    computed from an older BAM; all of them with ``force``). Returns the number written."""
+    import pysam
+
+    bam_path = sample_paths(sample_id)["bam"]
+    mtime = os.stat(bam_path).st_mtime
+    db = SessionLocal()
+    try:
+        sv = models.SVCandidate
+        q = (
+            select(sv.id, sv.chrom, sv.pos1, sv.pos2, sv.svtype, sv.features_json)
+            .outerjoin(models.SVReadSummary, models.SVReadSummary.sv_id == sv.id)
+            .where(sv.sample_id == sample_id)
+            .order_by(sv.chrom, sv.pos1)
+        )
+        if not force:
+            q = q.where(or_(models.SVReadSummary.sv_id.is_(None), models.SVReadSummary.bam_mtime != mtime))
+        n = 0
+        batch: List[dict] = []
+        with pysam.AlignmentFile(bam_path, "rb") as bam:
+            contigs = set(bam.references)
+
+            def fetch(chrom: str, start: int, end: int):
+                return bam.fetch(chrom, start, end) if chrom in contigs else ()
+
+            for row in db.execute(q).all():  # plain rows: they survive the per-batch commits
+                batch.append({**summarize(fetch, row), "bam_mtime": mtime})
+                if len(batch) >= batch_size:
+                    n += _flush(db, batch)
+        n += _flush(db, batch)
+        return n
+    finally:
+        db.close()
+
+
+def _flush(db: Session, batch: List[dict]) -> int:
+    n = len(batch)
+    upsert_batch(db, batch)
+    db.commit()
+    batch.clear()
+    return n
+
+
+def _init_worker() -> None:
+    engine.dispose(close=False)
+
+
+def run_summaries(sample_ids: Optional[Iterable[str]] = None, *, processes: int = 1,
+                  force: bool = False) -> Dict[str, int]:
+    """Summarize every sample that has SVs (or just ``sample_ids``), one sample
+    per worker process. Samples whose BAM is missing are logged and skipped."""
+    if sample_ids is None:
+        db = SessionLocal()
+        try:
+            sample_ids = db.scalars(select(models.SVCandidate.sample_id).distinct()).all()
+        finally:
+            db.close()
+    sample_ids = list(sample_ids)
+    out: Dict[str, int] = {}
+    if processes <= 1:
+        for s in sample_ids:
+            out[s] = _run_one(s, force)
+        return out
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+        futs = {s: pool.submit(_run_one, s, force) for s in sample_ids}
+        for s, fut in futs.items():
+            out[s] = fut.result()
+    return out
+
+
+def _run_one(sample_id: str, force: bool) -> int:
+    try:
+        n = summarize_sample(sample_id, force=force)
+    except FileNotFoundError as e:
+        log.warning("Skipping %s: %s", sample_id, e)
+        return 0
+    log.info("Summarized %d SVs for %s", n, sample_id)
+    return n
@@ -0,0 +1,145 @@
+# src/genomewiz/services/render_executor.py
+"""
+Where gwplot renders run.
+
+GW_RENDER_EXECUTOR selects the backend:
+  thread  - a bounded thread pool in the API process (default)
+  process - a persistent process pool; each worker keeps its own warm Gw pool
+  inline  - run in the caller (tests / debugging)
+
+GW_RENDER_WORKERS bounds concurrent renders, and the gwplot thread count per
+render is budgeted so that workers * threads stays within the available cores.
+Once GW_RENDER_QUEUE_LIMIT renders are running or waiting, new submissions
+raise RenderBusy (mapped to 503 + Retry-After by the API).
+"""
+from __future__ import annotations
+import asyncio
+import contextvars
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import logging
+
+log = logging.getLogger(__name__)
+
+MODES = ("thread", "process", "inline")
+
+
+class RenderBusy(RuntimeError):
+    """The render queue is full; retry after ``retry_after`` seconds."""
+
+    def __init__(self, retry_after: int, depth: int):
+        super().__init__(f"Render queue full ({depth} pending)")
+        self.retry_after = retry_after
+        self.depth = depth
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def render_workers() -> int:
+    return max(1, int(os.getenv("GW_RENDER_WORKERS", str(min(4, available_cpus())))))
+
+
+def gw_threads() -> int:
+    """gwplot threads per render: GW_RENDER_THREADS if set, capped so that
+    concurrent renders never ask for more threads than there are cores."""
+    budget = max(1, available_cpus() // render_workers())
+    requested = os.getenv("GW_RENDER_THREADS")
+    return max(1, min(int(requested), budget)) if requested else budget
+
+
+class RenderExecutor:
+    def __init__(self, mode: str = "thread", workers: int = 1,
+                 queue_limit: Optional[int] = None, retry_after: int = 5):
+        if mode not in MODES:
+            raise ValueError(f"GW_RENDER_EXECUTOR must be one of {MODES}, got '{mode}'")
+        self.mode = mode
+        self.workers = workers
+        self.queue_limit = queue_limit if queue_limit is not None else workers * 4
+        self.retry_after = retry_after
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool: Optional[Executor] = None
+        if mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gw-render")
+        elif mode == "process":
+            # spawn: forking a threaded server process (and gwplot's native state) is unsafe
+            self._pool = ProcessPoolExecutor(max_workers=workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+
+    @property
+    def depth(self) -> int:
+        return self._pending
+
+    def _reserve(self) -> None:
+        with self._lock:
+            if self._pending >= self.queue_limit:
+                raise RenderBusy(self.retry_after, self._pending)
+            self._pending += 1
+
+    def _release(self, _fut: Any = None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Queue ``fn(*args)``; raises RenderBusy when the queue is full.
+        ``fn`` must be a module-level function for the process backend."""
+        self._reserve()
+        if self._pool is None:
+            fut: Future = Future()
+            try:
+                fut.set_result(fn(*args))
+            except Exception as e:
+                fut.set_exception(e)
+            self._release()
+            return fut
+        try:
+            if self.mode == "thread":
+                # carry the request context (render stage trace) onto the worker thread
+                fut = self._pool.submit(contextvars.copy_context().run, fn, *args)
+            else:
+                fut = self._pool.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        fut.add_done_callback(self._release)
+        return fut
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "workers": self.workers, "queue_limit": self.queue_limit,
+                "pending": self._pending, "gw_threads": gw_threads()}
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_EXECUTOR: Optional[RenderExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_executor() -> RenderExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                workers = render_workers()
+                limit = os.getenv("GW_RENDER_QUEUE_LIMIT")
+                _EXECUTOR = RenderExecutor(
+                    mode=os.getenv("GW_RENDER_EXECUTOR", "thread").lower(),
+                    workers=workers,
+                    queue_limit=int(limit) if limit else None,
+                    retry_after=int(os.getenv("GW_RENDER_RETRY_AFTER", "5")),
+                )
+                log.info("Render executor: %s", _EXECUTOR.stats())
+    return _EXECUTOR
@@ -0,0 +1,332 @@
+# src/genomewiz/services/render_queue.py
+"""
+DB-backed render job queue.
+
+Jobs live in the ``render_jobs`` table, so no external broker is needed:
+the API enqueues rows and ``genomewiz-render-worker`` claims them and renders
+on a local process pool.
+"""
+from __future__ import annotations
+import os
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from genomewiz.db.base import SessionLocal, engine
+from genomewiz.db import models
+from genomewiz.models.evidence import Evidence
+from genomewiz.models.render_artifact import RenderArtifact
+from genomewiz.services.utils.hashing import stable_hash
+from genomewiz.services.render_executor import RenderBusy
+from genomewiz.services.singleflight import FLIGHT
+
+log = logging.getLogger(__name__)
+
+ACTIVE = ("queued", "running")
+
+def _pad() -> int:
+    return int(os.getenv("GW_SV_PAD", "1000"))
+
+def prerender_formats() -> Tuple[str, ...]:
+    return tuple(f.strip() for f in os.getenv("GW_PRERENDER_FORMATS", "png,svg").split(",") if f.strip())
+
+def _composite_min_bp() -> int:
+    return int(os.getenv("GW_COMPOSITE_MIN_BP", "100000"))
+
+# -----------------------------
+# Regions
+# -----------------------------
+Panel = Tuple[str, int, int]
+
+def breakpoint_panels(chrom: str, pos1: int, chrom2: Optional[str], pos2: Optional[int],
+                      pad: int) -> List[Panel]:
+    """
+    Regions to draw for a call with breakpoints (chrom, pos1) and (chrom2, pos2):
+    one window spanning both, or, when they are on different chromosomes or
+    GW_COMPOSITE_MIN_BP or more apart, one window per breakpoint (a composite panel).
+    """
+    chrom2 = chrom2 or chrom
+    if pos2 is None:
+        return [(chrom, max(0, pos1 - pad), pos1 + pad)]
+    if chrom2 != chrom or abs(pos2 - pos1) >= _composite_min_bp():
+        return [(chrom, max(0, pos1 - pad), pos1 + pad), (chrom2, max(0, pos2 - pad), pos2 + pad)]
+    lo, hi = sorted((pos1, pos2))
+    return [(chrom, max(0, lo - pad), hi + pad)]
+
+def sv_panels(sv: models.SVCandidate, pad: Optional[int] = None) -> List[Panel]:
+    chrom2 = (sv.features_json or {}).get("chr2")  # mate chromosome of TRA/BND calls (vcf_loader)
+    return breakpoint_panels(sv.chrom, sv.pos1, chrom2, sv.pos2, _pad() if pad is None else pad)
+
+def panels_hash(sample_id: str, panels: List[Panel], fmt: str) -> str:
+    """Single-region renders keep the plain region key, so their blobs are shared
+    with /sv/render:batch and survive the introduction of composites."""
+    if len(panels) == 1:
+        chrom, start, end = panels[0]
+        key = {"sample_id": sample_id, "chrom": chrom, "start": start, "end": end}
+    else:
+        key = {"sample_id": sample_id, "panels": [list(p) for p in panels]}
+    return stable_hash(key, fmt=fmt, width=None, height=None, dpi=None)
+
+def evidence_region(payload: dict) -> Optional[Tuple[str, str, int, int]]:
+    """Map an Evidence payload to (sample_id, chrom, start, end), or None if it
+    does not describe a locus. Accepts chrom/start/end or chrom1/pos1/chrom2/pos2."""
+    sample_id = payload.get("sample_id")
+    chrom = payload.get("chrom") or payload.get("chrom1")
+    start = payload.get("start", payload.get("pos1"))
+    if not (sample_id and chrom and start is not None):
+        return None
+    end = payload.get("end", payload.get("pos2"))
+    chrom2 = payload.get("chrom2")
+    if end is None or (chrom2 and chrom2 != chrom) or int(end) < int(start):
+        end = start
+    if "end" in payload:
+        return sample_id, chrom, int(start), int(end)
+    return sample_id, chrom, max(0, int(start) - _pad()), int(end) + _pad()
+
+def evidence_panels(payload: dict) -> Optional[Tuple[str, List[Panel]]]:
+    """Like evidence_region, but chrom1/pos1/chrom2/pos2 payloads with distant
+    breakpoints map to one panel per breakpoint."""
+    region = evidence_region(payload)
+    if region is None:
+        return None
+    sample_id, chrom, start, end = region
+    if "end" in payload or payload.get("pos2") is None:
+        return sample_id, [(chrom, start, end)]
+    return sample_id, breakpoint_panels(chrom, int(payload.get("start", payload.get("pos1"))),
+                                        payload.get("chrom2"), int(payload["pos2"]), _pad())
+
+def sv_hash(sv: models.SVCandidate, fmt: str) -> str:
+    return panels_hash(sv.sample_id, sv_panels(sv), fmt)
+
+# -----------------------------
+# Enqueue
+# -----------------------------
+def enqueue(db: Session, *, kind: str, target_id: str, fmt: str, content_hash: str,
+            params: Optional[dict] = None) -> models.RenderJob:
+    """Add a job unless an identical one is already queued/running (returned instead).
+    The caller commits."""
+    job = (
+        db.query(models.RenderJob)
+        .filter(models.RenderJob.kind == kind,
+                models.RenderJob.target_id == target_id,
+                models.RenderJob.format == fmt,
+                models.RenderJob.content_hash == content_hash,
+                models.RenderJob.status.in_(ACTIVE))
+        .first()
+    )
+    if job:
+        FLIGHT.note("coalesced_queued")
+        return job
+    job = models.RenderJob(
+        id=f"job_{uuid.uuid4().hex[:12]}",
+        kind=kind,
+        target_id=target_id,
+        format=fmt,
+        content_hash=content_hash,
+        params_json=params,
+        status="queued",
+        attempts=0,
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+def enqueue_sv(db: Session, sv: models.SVCandidate,
+               formats: Iterable[str] | None = None) -> List[models.RenderJob]:
+    # a recorded panel may have been evicted from the store since (storage.enforce_budget)
+    done = {fmt for fmt, p in (sv.evidence_paths or {}).items() if p and os.path.exists(p)}
+    return [enqueue(db, kind="sv", target_id=sv.id, fmt=fmt, content_hash=sv_hash(sv, fmt))
+            for fmt in (formats or prerender_formats()) if fmt not in done]
+
+def enqueue_svs(db: Session, svs: Iterable, formats: Iterable[str] | None = None) -> int:
+    """enqueue_sv for many SVs at once (bulk loads): one lookup of the active
+    jobs and one multi-row insert. ``svs`` are SVCandidate rows or anything with
+    the same attributes. Returns the number of jobs added; the caller commits."""
+    formats = tuple(formats or prerender_formats())
+    want: Dict[Tuple[str, str], str] = {}
+    for sv in svs:
+        done = {fmt for fmt, p in (sv.evidence_paths or {}).items() if p and os.path.exists(p)}
+        for fmt in formats:
+            if fmt not in done:
+                want[(sv.id, fmt)] = sv_hash(sv, fmt)
+    if not want:
+        return 0
+    job = models.RenderJob
+    active = set(db.execute(
+        select(job.target_id, job.format, job.content_hash)
+        .where(job.kind == "sv", job.content_hash.in_(set(want.values())), job.status.in_(ACTIVE))
+    ).all())
+    now = datetime.utcnow()
+    rows = [{"id": f"job_{uuid.uuid4().hex[:12]}", "kind": "sv", "target_id": sv_id, "format": fmt,
+             "content_hash": h, "status": "queued", "attempts": 0, "created_at": now, "updated_at": now}
+            for (sv_id, fmt), h in want.items() if (sv_id, fmt, h) not in active]
+    if rows:
+        db.execute(insert(job), rows)
+    return len(rows)
+
+def enqueue_evidence(db: Session, ev: Evidence, *, formats: Iterable[str] | None = None,
+                     width: int | None = None, height: int | None = None,
+                     dpi: int | None = None) -> List[models.RenderJob]:
+    if evidence_region(ev.payload or {}) is None:
+        return []
+    jobs = []
+    for fmt in (formats or prerender_formats()):
+        h = stable_hash(ev.payload, fmt=fmt, width=width, height=height, dpi=dpi)
+        jobs.append(enqueue(db, kind="evidence", target_id=str(ev.id), fmt=fmt, content_hash=h,
+                            params={"width": width, "height": height, "dpi": dpi}))
+    return jobs
+
+def check_depth(db: Session) -> None:
+    """Raise RenderBusy once GW_RENDER_JOB_LIMIT jobs are waiting."""
+    limit = int(os.getenv("GW_RENDER_JOB_LIMIT", "1000"))
+    depth = db.query(models.RenderJob).filter(models.RenderJob.status == "queued").count()
+    if depth >= limit:
+        raise RenderBusy(int(os.getenv("GW_RENDER_RETRY_AFTER", "5")), depth)
+
+# -----------------------------
+# Worker side
+# -----------------------------
+def claim(db: Session, limit: int) -> List[str]:
+    """Move up to ``limit`` queued jobs to running. The conditional UPDATE makes
+    concurrent workers safe: a job is only claimed by the worker whose update hit it."""
+    ids = [
+        i for (i,) in db.query(models.RenderJob.id)
+        .filter(models.RenderJob.status == "queued")
+        .order_by(models.RenderJob.created_at)
+        .limit(limit)
+    ]
+    claimed = []
+    for job_id in ids:
+        res = db.execute(
+            update(models.RenderJob)
+            .where(models.RenderJob.id == job_id, models.RenderJob.status == "queued")
+            .values(status="running", attempts=models.RenderJob.attempts + 1,
+                    updated_at=datetime.utcnow())
+        )
+        if res.rowcount:
+            claimed.append(job_id)
+    db.commit()
+    return claimed
+
+def requeue_stale(db: Session, older_than_s: int) -> int:
+    """Put jobs left 'running' by a crashed worker back in the queue."""
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than_s)
+    res = db.execute(
+        update(models.RenderJob)
+        .where(models.RenderJob.status == "running", models.RenderJob.updated_at < cutoff)
+        .values(status="queued", updated_at=datetime.utcnow())
+    )
+    db.commit()
+    return res.rowcount
+
+def _render_to(fmt: str, sample_id: str, panels: List[Panel], content_hash: str) -> Path:
+    from genomewiz.services.gwplot_renderer import _render_panels_file
+    return Path(_render_panels_file(sample_id, panels, fmt, content_hash))
+
+def run_job(job_id: str) -> str:
+    """Render one claimed job and record the result. Runs inside a worker process."""
+    from genomewiz.services.storage import enforce_budget, record_blob
+
+    db = SessionLocal()
+    try:
+        job = db.get(models.RenderJob, job_id)
+        if job is None:
+            return "missing"
+        try:
+            if job.kind == "sv":
+                sv = db.get(models.SVCandidate, job.target_id)
+                if sv is None:
+                    raise LookupError(f"SV {job.target_id} not found")
+                p = _render_to(job.format, sv.sample_id, sv_panels(sv), job.content_hash)
+                sv.evidence_paths = {**(sv.evidence_paths or {}), job.format: str(p)}
+            else:
+                ev = db.get(Evidence, uuid.UUID(job.target_id))
+                if ev is None:
+                    raise LookupError(f"Evidence {job.target_id} not found")
+                target = evidence_panels(ev.payload or {})
+                if target is None:
+                    raise ValueError("Evidence payload has no sample_id/chrom/start")
+                p = _render_to(job.format, *target, job.content_hash)
+                params = job.params_json or {}
+                try:
+                    with db.begin_nested():
+                        db.add(RenderArtifact(
+                            evidence_id=ev.id,
+                            format=job.format,
+                            width=params.get("width"),
+                            height=params.get("height"),
+                            dpi=params.get("dpi"),
+                            content_hash=job.content_hash,
+                            path=str(p),
+                        ))
+                except IntegrityError:
+                    pass  # artifact row already recorded by another path; the file is shared
+                ev.status = "rendered"
+            try:
+                with db.begin_nested():
+                    record_blob(db, job.content_hash, job.format, p)
+            except IntegrityError:
+                # registered concurrently by another worker: refresh that entry instead
+                record_blob(db, job.content_hash, job.format, p)
+            job.status = "done"
+            job.result_path = str(p)
+            job.error = None
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            log.warning("Render job %s failed: %s", job_id, e)
+            db.query(models.RenderJob).filter(models.RenderJob.id == job_id).update(
+                {"status": "failed", "error": str(e)[:2000]})
+            if job.kind == "evidence":
+                db.query(Evidence).filter(Evidence.id == uuid.UUID(job.target_id)).update(
+                    {"status": "failed"})
+            db.commit()
+        status = job.status
+        if status == "done":
+            enforce_budget(db)
+        return status
+    finally:
+        db.close()
+
+def _init_worker() -> None:
+    # forked children must not reuse the parent's pooled connections
+    engine.dispose(close=False)
+
+def run_worker(processes: int | None = None, poll_s: float = 1.0,
+               stale_after_s: int = 600, once: bool = False) -> None:
+    """Claim queued jobs and render them on a process pool until interrupted.
+    With ``once`` the loop exits when the queue is drained."""
+    processes = processes or int(os.getenv("GW_RENDER_PROCESSES", str(os.cpu_count() or 1)))
+    # children size their gwplot thread budget from this (see render_executor.gw_threads)
+    os.environ["GW_RENDER_WORKERS"] = str(processes)
+    inflight: Dict[str, Future] = {}
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+        db = SessionLocal()
+        try:
+            n = requeue_stale(db, stale_after_s)
+            if n:
+                log.info("Requeued %d stale render jobs", n)
+            while True:
+                for job_id, fut in list(inflight.items()):
+                    if fut.done():
+                        inflight.pop(job_id)
+                        if fut.exception():
+                            log.error("Render job %s crashed: %s", job_id, fut.exception())
+                free = processes * 2 - len(inflight)
+                claimed = claim(db, free) if free > 0 else []
+                for job_id in claimed:
+                    inflight[job_id] = pool.submit(run_job, job_id)
+                if once and not claimed and not inflight:
+                    return
+                if not claimed:
+                    time.sleep(poll_s)
+        finally:
+            db.close()
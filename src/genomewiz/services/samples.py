@@ -0,0 +1,19 @@
+# src/genomewiz/services/samples.py
+"""Where a sample's alignment and track files live under GW_DATA_ROOT."""
+from __future__ import annotations
+import os
+from pathlib import Path
+from typing import Dict
+
+
+def sample_paths(sample_id: str) -> Dict[str, str]:
+    """``{"bam": ...}`` plus ``vcf``/``bed`` when those files exist:
+    ``<GW_DATA_ROOT>/<sample_id>/<sample_id>.{bam,vcf.gz,bed}``."""
+    root = Path(os.getenv("GW_DATA_ROOT", "./data")).resolve()
+    bam = root / sample_id / f"{sample_id}.bam"
+    vcf = root / sample_id / f"{sample_id}.vcf.gz"
+    bed = root / sample_id / f"{sample_id}.bed"
+    out = {"bam": str(bam)}
+    if vcf.exists(): out["vcf"] = str(vcf)
+    if bed.exists(): out["bed"] = str(bed)
+    return out
@@ -0,0 +1,113 @@
+# src/genomewiz/services/singleflight.py
+"""
+Single-flight coalescing for renders keyed by content hash.
+
+Within a process, the first caller for a key (the leader) runs the work and
+concurrent callers for the same key wait for its result. Across processes,
+leaders serialise on an flock'd lock file, so a leader that waited on another
+process finds the blob already written and skips rendering.
+"""
+from __future__ import annotations
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterator
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process coalescing only
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._counts = {"leaders": 0, "coalesced_inproc": 0, "coalesced_crossproc": 0,
+                        "coalesced_queued": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run ``fn`` once per concurrent set of callers for ``key``; followers
+        get the leader's result (or its exception)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counts["leaders"] += 1
+            else:
+                self._counts["coalesced_inproc"] += 1
+        if not leader:
+            log.debug("single-flight: waiting on in-flight render %s", key)
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def note(self, counter: str) -> None:
+        with self._lock:
+            self._counts[counter] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counts, "in_flight": len(self._calls)}
+
+
+FLIGHT = SingleFlight()
+
+
+@contextmanager
+def file_lock(path: Path, *, remove: bool = False) -> Iterator[None]:
+    """Exclusive advisory lock shared by every process on this host. With
+    ``remove`` the lock file is deleted on release, for per-key locks that
+    would otherwise accumulate; a waiter woken on a deleted file retries."""
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            st = os.stat(path)
+            held = os.fstat(fd)
+            if (st.st_dev, st.st_ino) == (held.st_dev, held.st_ino):
+                break
+        except FileNotFoundError:
+            pass
+        # the previous holder removed the file we locked: lock the current one
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+    try:
+        yield
+    finally:
+        if remove:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
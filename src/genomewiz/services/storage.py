@@ -1,5 +1,17 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
-from ..config import get_settings
+from typing import Callable, Iterator
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from ..core.config import get_settings
+from ..core.metrics import ARTIFACT_CACHE
+from ..db.models import RenderJob, SVCandidate
+from ..models.artifact_blob import ArtifactBlob
+from ..models.render_artifact import RenderArtifact
+from .singleflight import FLIGHT, file_lock
 
 
 settings = get_settings()
@@ -9,7 +21,139 @@ BASE = Path(settings.GW_FIGURES_DIR)
 BASE.mkdir(parents=True, exist_ok=True)
 
 
-def artifact_path(evidence_id: str, content_hash: str, ext: str) -> Path:
-	d = BASE / str(evidence_id)
+def artifact_path(content_hash: str, ext: str) -> Path:
+	"""Content-addressed blob location. Identical payloads (same stable_hash)
+	share one file no matter which evidence row or SV asked for it."""
+	d = BASE / "blobs" / content_hash[:2]
 	d.mkdir(parents=True, exist_ok=True)
-	return d / f"{content_hash}.{ext}"
\ No newline at end of file
+	return d / f"{content_hash}.{ext}"
+
+
+@contextmanager
+def atomic_write(path: Path) -> Iterator[str]:
+	"""Yield a unique temp path next to ``path`` and rename it into place on
+	success, so concurrent writers of the same blob never see a partial file."""
+	path = Path(path)
+	path.parent.mkdir(parents=True, exist_ok=True)
+	fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+	os.close(fd)
+	try:
+		yield tmp
+		os.replace(tmp, path)
+	finally:
+		if os.path.exists(tmp):
+			os.unlink(tmp)
+
+
+def materialize(content_hash: str, ext: str, produce: Callable[[str], None]) -> Path:
+	"""
+	Return the blob for ``content_hash``, calling ``produce(tmp_path)`` to
+	create it if missing. Concurrent requests for the same hash render once:
+	threads in this process wait on the in-flight leader, and other processes
+	wait on a per-hash lock file and then find the finished blob.
+	"""
+	p = artifact_path(content_hash, ext)
+	if p.exists():
+		ARTIFACT_CACHE.inc("store", "hit")
+		return p
+	ARTIFACT_CACHE.inc("store", "miss")
+
+	def lead() -> Path:
+		with file_lock(BASE / "locks" / f"{content_hash}.lock", remove=True):
+			if p.exists():
+				FLIGHT.note("coalesced_crossproc")
+				return p
+			with atomic_write(p) as tmp:
+				produce(tmp)
+			return p
+
+	return FLIGHT.do(content_hash, lead)
+
+
+def record_blob(db: Session, content_hash: str, fmt: str, path: Path) -> ArtifactBlob:
+	"""Register a freshly written blob (or refresh an existing entry). Caller commits."""
+	blob = db.get(ArtifactBlob, content_hash)
+	now = datetime.utcnow()
+	size = Path(path).stat().st_size
+	if blob is None:
+		blob = ArtifactBlob(content_hash=content_hash, format=fmt, size_bytes=size,
+		                    hits=0, last_access=now)
+		db.add(blob)
+	else:
+		blob.size_bytes = size
+		blob.last_access = now
+	return blob
+
+
+def touch_blob(db: Session, content_hash: str) -> None:
+	"""Count a cache hit. Caller commits."""
+	db.execute(
+		update(ArtifactBlob)
+		.where(ArtifactBlob.content_hash == content_hash)
+		.values(hits=ArtifactBlob.hits + 1, last_access=datetime.utcnow())
+	)
+
+
+def note_blob(db: Session, content_hash: str, fmt: str, path: Path) -> None:
+	"""Count a hit on a blob written outside the render queue (e.g. tiles),
+	registering it on first sight so enforce_budget can evict it. Caller commits."""
+	if db.get(ArtifactBlob, content_hash) is None:
+		record_blob(db, content_hash, fmt, path)
+	else:
+		touch_blob(db, content_hash)
+
+
+def budget_bytes() -> int | None:
+	return settings.GW_FIGURES_MAX_BYTES
+
+
+def _forget_paths(db: Session, evicted: list[str]) -> None:
+	"""Drop references to evicted blobs from render jobs and SVCandidate.evidence_paths."""
+	gone = set(evicted)
+	sv_ids = {t for (t,) in db.query(RenderJob.target_id).filter(
+		RenderJob.kind == "sv", RenderJob.content_hash.in_(evicted))}
+	for sv in db.query(SVCandidate).filter(SVCandidate.id.in_(sv_ids)):
+		paths = {f: p for f, p in (sv.evidence_paths or {}).items() if Path(p).stem not in gone}
+		if paths != (sv.evidence_paths or {}):
+			sv.evidence_paths = paths or None
+	db.query(RenderJob).filter(RenderJob.content_hash.in_(evicted)).update(
+		{"result_path": None}, synchronize_session=False)
+
+
+def enforce_budget(db: Session, max_bytes: int | None = None) -> int:
+	"""Evict least recently used blobs (files, blob rows and the RenderArtifact
+	rows that point at them) until the store fits in ``max_bytes``. Render jobs
+	and pre-rendered SVs that produced an evicted blob lose their path, so
+	enqueue_sv renders them again. Returns the number of bytes freed. Commits."""
+	max_bytes = budget_bytes() if max_bytes is None else max_bytes
+	if not max_bytes:
+		return 0
+	total = db.query(func.coalesce(func.sum(ArtifactBlob.size_bytes), 0)).scalar()
+	if total <= max_bytes:
+		return 0
+
+	freed = 0
+	while total - freed > max_bytes:
+		victims = (
+			db.query(ArtifactBlob.content_hash, ArtifactBlob.format, ArtifactBlob.size_bytes)
+			.order_by(ArtifactBlob.last_access)
+			.limit(500)
+			.all()
+		)
+		if not victims:
+			break
+		evicted = []
+		for h, fmt, size in victims:
+			if total - freed <= max_bytes:
+				break
+			evicted.append(h)
+			freed += size
+			try:
+				artifact_path(h, fmt).unlink()
+			except FileNotFoundError:
+				pass
+		db.query(RenderArtifact).filter(RenderArtifact.content_hash.in_(evicted)).delete(synchronize_session=False)
+		_forget_paths(db, evicted)
+		db.query(ArtifactBlob).filter(ArtifactBlob.content_hash.in_(evicted)).delete(synchronize_session=False)
+		db.commit()
+	return freed
@@ -0,0 +1,58 @@
+# src/genomewiz/services/tiles.py
+"""
+Genomic tile addressing for pan/zoom browsing.
+
+A tile is (sample_id, chrom, zoom, index). At zoom ``z`` a tile covers
+GW_TILE_BP * 2**z bases, so tile ``index`` spans [index * width, (index + 1) * width).
+Every tile is drawn on the same GW_TILE_PX-wide canvas, which keeps tiles
+at one zoom level seamless side by side. Rendering lives in gwplot_renderer.
+"""
+from __future__ import annotations
+import os
+from typing import List, NamedTuple, Tuple
+
+from genomewiz.services.utils.hashing import stable_hash
+
+
+class Tile(NamedTuple):
+    sample_id: str
+    chrom: str
+    zoom: int
+    index: int
+
+
+def tile_bp(zoom: int) -> int:
+    return int(os.getenv("GW_TILE_BP", "2000")) << zoom
+
+
+def max_zoom() -> int:
+    return int(os.getenv("GW_TILE_MAX_ZOOM", "12"))
+
+
+def tile_size() -> Tuple[int, int]:
+    """(width, height) of a tile canvas in pixels."""
+    return int(os.getenv("GW_TILE_PX", "512")), int(os.getenv("GW_CANVAS_H", "420"))
+
+
+def tile_region(tile: Tile) -> Tuple[int, int]:
+    w = tile_bp(tile.zoom)
+    return tile.index * w, (tile.index + 1) * w
+
+
+def tile_hash(tile: Tile) -> str:
+    """Artifact store key; changes whenever the tile geometry settings change."""
+    start, end = tile_region(tile)
+    width, height = tile_size()
+    return stable_hash({"tile": list(tile), "start": start, "end": end,
+                        "theme": os.getenv("GW_THEME", "dark")},
+                       fmt="png", width=width, height=height, dpi=None)
+
+
+def neighbours(tile: Tile, radius: int) -> List[Tile]:
+    """Tiles within ``radius`` of ``tile`` on the same zoom level, nearest first."""
+    out = []
+    for d in range(1, radius + 1):
+        for i in (tile.index + d, tile.index - d):
+            if i >= 0:
+                out.append(tile._replace(index=i))
+    return out
@@ -0,0 +1,255 @@
+# src/genomewiz/services/vcf_loader.py
+"""
+Bulk SV candidate ingestion from (bgzipped) VCF.
+
+Records are parsed as a stream and upserted in large multi-row batches keyed
+by a deterministic id, so re-loading the same VCF updates rows in place
+instead of duplicating them. Each batch queues pre-render jobs for its SVs in
+the same transaction (services/render_queue.py). Indexed (.tbi/.csi) files can be split by
+chromosome across a process pool when pysam is installed.
+"""
+from __future__ import annotations
+import gzip
+import hashlib
+import os
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from genomewiz.db.base import SessionLocal, dialect_insert, engine
+from genomewiz.db import models
+from genomewiz.services import render_queue
+from genomewiz.services.curation_queue import QUEUE
+from genomewiz.services.intervals import reg2bin, sv_span
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+SVTYPES = {"DEL", "INS", "DUP", "INV", "TRA", "BND", "CNV"}
+# INFO keys that become columns; everything else lands in features_json
+_CORE_INFO = {"SVTYPE", "END", "SVLEN", "CHR2"}
+_UPSERT_COLS = ("sample_id", "chrom", "pos1", "pos2", "svtype", "size", "caller",
+                "features_json", "span_end", "bin")
+
+
+def _open(path: str | Path) -> TextIO:
+    # bgzip output is a series of gzip members, which gzip reads as one stream
+    path = str(path)
+    if path.endswith((".gz", ".bgz")):
+        return gzip.open(path, "rt")
+    return open(path, "rt")
+
+
+def _value(v: str):
+    for cast in (int, float):
+        try:
+            return cast(v)
+        except ValueError:
+            pass
+    return v
+
+
+def _info(field: str) -> Dict[str, object]:
+    out: Dict[str, object] = {}
+    if field == ".":
+        return out
+    for item in field.split(";"):
+        key, eq, v = item.partition("=")
+        if not eq:
+            out[key] = True
+        elif "," in v:
+            out[key] = [_value(x) for x in v.split(",")]
+        else:
+            out[key] = _value(v)
+    return out
+
+
+def sv_id(sample_id: str, chrom: str, pos: int, svtype: str, end: Optional[int],
+          chrom2: Optional[str], vcf_id: str) -> str:
+    key = f"{sample_id}|{chrom}|{pos}|{svtype}|{end}|{chrom2}|{vcf_id}"
+    return "sv_" + hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def parse_record(line: str, sample_id: str, caller: Optional[str]) -> Optional[dict]:
+    """One VCF data line -> an ``sv_candidates`` row dict, or None if not an SV."""
+    cols = line.rstrip("\n").split("\t")
+    if len(cols) < 8:
+        return None
+    chrom, pos, vcf_id, _ref, alt, qual, flt, info_s = cols[:8]
+    info = _info(info_s)
+    svtype = str(info.get("SVTYPE", "")).upper()
+    if svtype not in SVTYPES:
+        return None
+    pos1 = int(pos)
+    chrom2 = info.get("CHR2")
+    chrom2 = str(chrom2) if chrom2 is not None else None
+    end = info.get("END")
+    pos2 = int(end) if isinstance(end, int) else None
+    if svtype in ("TRA", "BND") and chrom2 and chrom2 != chrom:
+        # CHR2_POS (dysgu) / END hold the mate position on the other chromosome
+        mate = info.get("CHR2_POS", pos2)
+        pos2 = int(mate) if isinstance(mate, int) else None
+    svlen = info.get("SVLEN")
+    if isinstance(svlen, list):
+        svlen = svlen[0]
+    if isinstance(svlen, (int, float)):
+        size = abs(int(svlen))
+    elif pos2 is not None and svtype not in ("TRA", "BND", "INS"):
+        size = abs(pos2 - pos1)
+    else:
+        size = None
+    features = {k: v for k, v in info.items() if k not in _CORE_INFO}
+    features.update(vcf_id=vcf_id, alt=alt, qual=_value(qual) if qual != "." else None, filter=flt)
+    if chrom2:
+        features["chr2"] = chrom2
+    start, stop = sv_span(chrom, pos1, pos2, svtype, chrom2)
+    return {
+        "id": sv_id(sample_id, chrom, pos1, svtype, pos2, chrom2, vcf_id),
+        "sample_id": sample_id,
+        "chrom": chrom,
+        "pos1": pos1,
+        "pos2": pos2,
+        "svtype": svtype,
+        "size": size,
+        "caller": caller,
+        "features_json": features,
+        "span_end": stop,
+        "bin": reg2bin(start, stop),
+    }
+
+
+def header_caller(path: str | Path) -> Optional[str]:
+    """Caller name from ``##source=`` (e.g. "dysgu"), if present."""
+    with _open(path) as fh:
+        for line in fh:
+            if not line.startswith("##"):
+                break
+            if line.startswith("##source="):
+                return line.split("=", 1)[1].strip().split()[0].lower() or None
+    return None
+
+
+def iter_records(lines: Iterable[str], sample_id: str, caller: Optional[str]) -> Iterator[dict]:
+    for line in lines:
+        if line.startswith("#") or not line.strip():
+            continue
+        row = parse_record(line, sample_id, caller)
+        if row is not None:
+            yield row
+
+
+def upsert_batch(db: Session, rows: List[dict]) -> None:
+    """Insert-or-update one batch (multi-row executemany). Caller commits.
+    ``evidence_paths`` of existing rows is left alone."""
+    if not rows:
+        return
+    insert = dialect_insert(db.get_bind().dialect.name)
+    stmt = insert(models.SVCandidate)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.SVCandidate.id],
+        set_={**{c: stmt.excluded[c] for c in _UPSERT_COLS}, "updated_at": datetime.utcnow()},
+    )
+    db.execute(stmt, rows)
+
+
+def enqueue_batch(db: Session, ids: List[str]) -> int:
+    """Queue pre-render jobs for the SVs of one upserted batch (new calls, and
+    existing ones whose panels moved or were evicted). Caller commits."""
+    if not ids:
+        return 0
+    sv = models.SVCandidate
+    rows = db.execute(
+        select(sv.id, sv.sample_id, sv.chrom, sv.pos1, sv.pos2, sv.svtype, sv.features_json, sv.evidence_paths)
+        .where(sv.id.in_(ids))
+    ).all()
+    return render_queue.enqueue_svs(db, rows)
+
+
+def load_lines(db: Session, lines: Iterable[str], sample_id: str, caller: Optional[str],
+               batch_size: int = BATCH_SIZE, prerender: bool = True) -> int:
+    """Stream ``lines`` into the DB, committing every ``batch_size`` rows
+    (with their pre-render jobs unless ``prerender`` is off)."""
+    n = 0
+    batch: Dict[str, dict] = {}
+
+    def flush() -> None:
+        upsert_batch(db, list(batch.values()))
+        if prerender:
+            enqueue_batch(db, list(batch))
+        db.commit()
+        QUEUE.on_svs(batch)  # other processes pick them up on their next refresh
+
+    for row in iter_records(lines, sample_id, caller):
+        batch[row["id"]] = row  # the same record twice in one batch would fail ON CONFLICT
+        if len(batch) >= batch_size:
+            flush()
+            n += len(batch)
+            batch.clear()
+    flush()
+    return n + len(batch)
+
+
+def _init_worker() -> None:
+    engine.dispose(close=False)
+
+
+def _load_contig(path: str, contig: str, sample_id: str, caller: Optional[str],
+                 batch_size: int, prerender: bool) -> int:
+    import pysam
+
+    db = SessionLocal()
+    try:
+        with pysam.TabixFile(path) as tbx:
+            return load_lines(db, (f"{ln}\n" for ln in tbx.fetch(contig)), sample_id, caller, batch_size,
+                              prerender)
+    finally:
+        db.close()
+
+
+def _indexed_contigs(path: str) -> Optional[List[str]]:
+    try:
+        import pysam
+    except ImportError:
+        return None
+    if not any(os.path.exists(path + ext) for ext in (".tbi", ".csi")):
+        return None
+    with pysam.TabixFile(path) as tbx:
+        return list(tbx.contigs)
+
+
+def load_vcf(path: str | Path, sample_id: str, *, caller: Optional[str] = None,
+             processes: int = 1, batch_size: int = BATCH_SIZE, prerender: bool = True) -> int:
+    """
+    Load every SV record of ``path`` for ``sample_id``; returns the number of
+    rows written. With ``processes > 1`` and an indexed VCF (and pysam), each
+    chromosome is parsed and written by its own worker process. ``prerender``
+    queues panel renders for the render worker as batches are committed.
+    """
+    path = str(path)
+    caller = caller or header_caller(path)
+    db = SessionLocal()
+    try:
+        if db.get(models.Sample, sample_id) is None:
+            raise LookupError(f"Sample {sample_id} not found")
+        contigs = _indexed_contigs(path) if processes > 1 else None
+        if not contigs:
+            if processes > 1:
+                log.info("No tabix index or pysam for %s; loading sequentially", path)
+            with _open(path) as fh:
+                return load_lines(db, fh, sample_id, caller, batch_size, prerender)
+    finally:
+        db.close()
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+        futs = {c: pool.submit(_load_contig, path, c, sample_id, caller, batch_size, prerender) for c in contigs}
+        total = 0
+        for contig, fut in futs.items():
+            n = fut.result()
+            log.info("Loaded %d SVs from %s", n, contig)
+            total += n
+    return total
@@ -0,0 +1,64 @@
+"""
+Shared test fixtures: a client for a few routers with the JWT user overridden,
+and sample/SV seeding.
+
+Each run gets a throwaway SQLite database (TEST_DATABASE_URL points the suite
+at a real server instead), so tests may assert on what they wrote. Seeding
+merges, so modules in one run can seed the same rows.
+"""
+import os
+import tempfile
+
+# Must happen before anything imports genomewiz (settings are read at import time).
+_TMP = tempfile.mkdtemp(prefix="gw-test-")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{_TMP}/test.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)  # derived from DATABASE_URL
+os.environ["GW_FIGURES_DIR"] = os.path.join(_TMP, "figures")
+os.environ["AUTH_EPOCH_FILE"] = os.path.join(_TMP, "auth_epoch")
+os.environ.setdefault("JWT_SECRET", "test-secret")  # test_auth_role signs real tokens
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from genomewiz.core import auth
+from genomewiz.db.base import Base, SessionLocal, engine
+from genomewiz.db import models
+
+
+@pytest.fixture
+def route_client():
+    """route_client(*routers, user_id=..., roles=...) -> TestClient for an app
+    mounting just those router modules, authenticated as that user."""
+    def make(*routers, user_id="cur_test", roles=("curator",)):
+        app = FastAPI()
+        for r in routers:
+            app.include_router(r.router)
+        app.dependency_overrides[auth.get_current_user] = lambda: {"id": user_id, "roles": list(roles)}
+        return TestClient(app)
+    return make
+
+
+@pytest.fixture
+def seed_svs():
+    """seed_svs(sample_id, sv_ids, chrom=..., db=None, **columns): merge a sample
+    and 500 bp deletions for ``sv_ids``, then commit. Goes to the run's database
+    unless a session is given; ``columns`` apply to every SV."""
+    def seed(sample_id, sv_ids, chrom="chr1", db=None, **columns):
+        own = db is None
+        if own:
+            Base.metadata.create_all(engine)
+            db = SessionLocal()
+        try:
+            db.merge(models.Sample(id=sample_id, name=sample_id, tumor_normal="tumor", platform="ONT",
+                                   source="x", license="x", consent_url="x"))
+            for i, sv_id in enumerate(sv_ids):
+                pos1 = 1000 * (i + 1)
+                db.merge(models.SVCandidate(**{"id": sv_id, "sample_id": sample_id, "chrom": chrom,
+                                               "pos1": pos1, "pos2": pos1 + 500, "svtype": "DEL",
+                                               "size": 500, **columns}))
+            db.commit()
+        finally:
+            if own:
+                db.close()
+    return seed
@@ -0,0 +1,61 @@
+import uuid
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from genomewiz.config import settings
+from genomewiz.db.base import Base, SessionLocal, engine
+from genomewiz.models.base import Base as EvidenceBase
+from genomewiz.models.evidence import Evidence
+from genomewiz.models.evidence_consensus import EvidenceConsensus
+from genomewiz.models.annotation import Annotation
+from genomewiz.models.render_artifact import RenderArtifact  # noqa: F401  (Evidence.artifacts)
+from genomewiz.routers import annotation
+from genomewiz.services import consensus
+
+EV = uuid.uuid4()
+
+def setup_module():
+    Base.metadata.create_all(engine)
+    EvidenceBase.metadata.create_all(engine)
+    db = SessionLocal()
+    db.add(Evidence(id=EV, etype="sv", payload={"chrom1": "chr1", "pos1": 10}, created_by="t"))
+    db.commit(); db.close()
+
+def _client(monkeypatch, **kw):
+    monkeypatch.setattr(settings, "API_TOKEN", "tok")
+    app = FastAPI()
+    app.include_router(annotation.router)
+    return TestClient(app, headers={"Authorization": "Bearer tok"}, **kw)
+
+def test_annotations_update_evidence_consensus(monkeypatch):
+    c = _client(monkeypatch)
+    for user, label in (("u1", "LIKELY_TRUE"), ("u2", "LIKELY_TRUE"), ("u3", "LIKELY_FALSE")):
+        r = c.post("/annotation/", json={"evidence_id": str(EV), "user_id": user, "label": label})
+        assert r.status_code == 200, r.text
+    assert c.post("/annotation/", json={"evidence_id": str(EV), "user_id": "u1",
+                                        "label": "UNCERTAIN"}).status_code == 409
+    assert c.post("/annotation/", json={"evidence_id": str(uuid.uuid4()), "user_id": "u1",
+                                        "label": "UNCERTAIN"}).status_code == 404
+    db = SessionLocal()
+    try:
+        row = db.get(EvidenceConsensus, EV)
+        assert (row.label, row.n_curators, row.counts) == ("LIKELY_TRUE", 3, {"LIKELY_TRUE": 2, "LIKELY_FALSE": 1})
+        assert db.query(Annotation).filter_by(evidence_id=EV).count() == 3
+
+        consensus.rebuild_all(db)
+        db.expire_all()
+        assert db.get(EvidenceConsensus, EV).counts == {"LIKELY_TRUE": 2, "LIKELY_FALSE": 1}
+    finally:
+        db.close()
+
+def test_consensus_failure_is_not_reported_as_duplicate(monkeypatch):
+    def broken(db, evidence_id, label):
+        raise RuntimeError("consensus write failed")
+    monkeypatch.setattr(annotation, "record_annotation", broken)
+    c = _client(monkeypatch, raise_server_exceptions=False)
+    r = c.post("/annotation/", json={"evidence_id": str(EV), "user_id": "u_fail", "label": "UNCERTAIN"})
+    assert r.status_code == 500
+    db = SessionLocal()
+    try:
+        assert db.query(Annotation).filter_by(evidence_id=EV, user_id="u_fail").count() == 0
+    finally:
+        db.close()
@@ -0,0 +1,52 @@
+import asyncio
+import uuid
+import httpx
+from genomewiz.config import settings
+from genomewiz.core import auth
+from genomewiz.db.base import SessionLocal, async_engine
+from genomewiz.db import models
+from genomewiz.main import app
+
+RUN = uuid.uuid4().hex[:8]  # the app database outlives a run
+SVS = [f"sv_A{i}_{RUN}" for i in range(5)]
+
+def setup_module():
+    app.dependency_overrides[auth.get_current_user] = lambda: {"id": "cur_async", "roles": ["curator"]}
+    db = SessionLocal()
+    db.merge(models.Sample(id="samp_A", name="A", tumor_normal="tumor", platform="ONT", source="x",
+                           license="x", consent_url="x"))
+    for i, sv_id in enumerate(SVS):
+        db.merge(models.SVCandidate(id=sv_id, sample_id="samp_A", chrom="chr5", pos1=1000 * (i + 1),
+                                    pos2=1000 * (i + 1) + 300, svtype="DEL", size=300))
+    db.commit(); db.close()
+
+def teardown_module():
+    app.dependency_overrides.pop(auth.get_current_user, None)
+
+def test_concurrent_async_writes_and_reads(monkeypatch):
+    """The label/consensus/SV routes run on AsyncSession (aiosqlite here), several
+    requests in flight on one event loop."""
+    assert async_engine.dialect.driver == "aiosqlite"
+    monkeypatch.setattr(settings, "API_TOKEN", "tok")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t",
+                                     headers={"Authorization": "Bearer tok"}) as c:
+            posted = await asyncio.gather(*(c.post(f"/sv/{sv_id}/label",
+                                                   json={"outcome": "Artifact", "confidence": 4})
+                                            for sv_id in SVS))
+            read = await asyncio.gather(*(c.get(f"/consensus/sv/{sv_id}") for sv_id in SVS),
+                                        c.get(f"/sv/{SVS[0]}"), c.get("/sv/sv_missing"))
+            return posted, read
+
+    posted, read = asyncio.run(run())
+    assert [r.status_code for r in posted] == [200] * 5
+    assert {r.json()["sv_id"] for r in posted} == set(SVS)  # ORM rows usable after commit
+    *cons, sv, missing = read
+    assert all(r.json()["label"] == "Artifact" and r.json()["scores"] == {"Artifact": 1} for r in cons)
+    assert sv.json()["id"] == SVS[0] and missing.status_code == 404
+
+    db = SessionLocal()  # committed, and visible to the sync engine
+    assert db.query(models.Label).filter(models.Label.sv_id.in_(SVS)).count() == 5
+    db.close()
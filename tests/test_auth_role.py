@@ -3,6 +3,8 @@ from datetime import datetime, timedelta
 from fastapi.testclient import TestClient
 from genomewiz.main import app
 from genomewiz.core.config import get_settings
+from genomewiz.db.base import SessionLocal
+from genomewiz.db import models
 
 def make_token(sub="user1", email="u@example.org", roles=("curator",)):
     s = get_settings()
@@ -18,6 +20,12 @@ def test_requires_auth():
     assert r.status_code in (401, 403)
 
 def test_access_with_curator_role(monkeypatch):
+    db = SessionLocal()
+    if db.get(models.Curator, "user1") is None:
+        db.add(models.Curator(id="user1", name="u", email="u@example.org"))
+        db.add(models.UserRole(user_id="user1", role="curator"))
+        db.commit()
+    db.close()
     c = TestClient(app)
     token = make_token()
     r = c.get("/health")
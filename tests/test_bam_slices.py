@@ -0,0 +1,97 @@
+import os
+import pytest
+from genomewiz.db.base import Base, SessionLocal, engine
+from genomewiz.db import models
+from genomewiz.services import bam_slices
+
+pysam = pytest.importorskip("pysam")
+
+SAMPLE = "samp_slice"
+
+def _write_bam(path):
+    header = {"HD": {"VN": "1.6", "SO": "coordinate"},
+              "SQ": [{"SN": "chr1", "LN": 200_000}, {"SN": "chr2", "LN": 200_000}]}
+    with pysam.AlignmentFile(str(path), "wb", header=header) as out:
+        for tid in (0, 1):
+            for i, pos in enumerate(range(0, 200_000 - 500, 250)):
+                r = pysam.AlignedSegment(out.header)
+                r.query_name = f"r{tid}_{i}"
+                r.reference_id, r.reference_start = tid, pos
+                r.cigartuples = [(0, 100 if i % 7 else 400)]  # some long spanning reads
+                r.query_sequence = "A" * (100 if i % 7 else 400)
+                r.mapping_quality = 60
+                out.write(r)
+    pysam.index(str(path))
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    (tmp_path / "data" / SAMPLE).mkdir(parents=True)
+    _write_bam(tmp_path / "data" / SAMPLE / f"{SAMPLE}.bam")
+    monkeypatch.setenv("GW_DATA_ROOT", str(tmp_path / "data"))
+    monkeypatch.setenv("GW_SLICE_DIR", str(tmp_path / "slices"))
+    monkeypatch.setenv("GW_SLICE_ALIGN", "1000")
+    monkeypatch.setenv("GW_SV_PAD", "500")
+    return tmp_path
+
+def _names(path, chrom=None, start=None, end=None):
+    with pysam.AlignmentFile(str(path)) as f:
+        return [r.query_name for r in (f.fetch(chrom, start, end) if chrom else f.fetch(until_eof=True))]
+
+def test_slice_holds_window_reads_and_is_reused(cache):
+    src = cache / "data" / SAMPLE / f"{SAMPLE}.bam"
+    path = bam_slices.ensure_slice(SAMPLE, [("chr1", 10_200, 12_300)])
+    assert path.name == "chr1_10000_13000.bam" and os.path.exists(str(path) + ".bai")
+    assert _names(path) == _names(src, "chr1", 10_000, 13_000)
+    mtime = path.stat().st_mtime_ns
+    assert bam_slices.ensure_slice(SAMPLE, [("chr1", 10_500, 12_100)]) == path
+    assert path.stat().st_size and path.stat().st_mtime_ns >= mtime
+
+def test_composite_slice_merges_both_breakpoints(cache):
+    src = cache / "data" / SAMPLE / f"{SAMPLE}.bam"
+    path = bam_slices.ensure_slice(SAMPLE, [("chr2", 50_100, 50_900), ("chr1", 5_100, 5_900)])
+    assert path.name.startswith("multi_")
+    names = _names(path)
+    assert names == _names(src, "chr1", 5_000, 6_000) + _names(src, "chr2", 50_000, 51_000)
+    assert len(names) == len(set(names))
+    assert bam_slices.ensure_slice(SAMPLE, [("chr1", 1, 2_000_000_000)]) is None  # too wide
+
+def test_bulk_build_matches_on_demand_slices(cache):
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    db.merge(models.Sample(id=SAMPLE, name="slice", tumor_normal="tumor", platform="ONT", source="x",
+                           license="x", consent_url="x"))
+    for i, (chrom, p1, p2) in enumerate([("chr1", 20_000, 21_000), ("chr1", 20_700, 22_400),
+                                         ("chr1", 90_000, 90_100), ("chr2", 150_000, 151_000)]):
+        db.merge(models.SVCandidate(id=f"sv_slice{i}", sample_id=SAMPLE, chrom=chrom, pos1=p1, pos2=p2,
+                                    svtype="DEL", size=p2 - p1))
+    db.commit(); db.close()
+
+    assert bam_slices.build_sample_slices(SAMPLE) == 4
+    assert bam_slices.build_sample_slices(SAMPLE) == 0
+    src = cache / "data" / SAMPLE / f"{SAMPLE}.bam"
+    built = sorted((cache / "slices").rglob("*.bam"))
+    assert [p.name for p in built] == ["chr1_19000_22000.bam", "chr1_20000_23000.bam",
+                                       "chr1_89000_91000.bam", "chr2_149000_152000.bam"]
+    for p in built:
+        chrom, start, end = p.stem.split("_")
+        assert _names(p) == _names(src, chrom, int(start), int(end))
+
+def test_budget_evicts_least_recently_used(cache):
+    old = bam_slices.ensure_slice(SAMPLE, [("chr1", 1_000, 2_000)])
+    new = bam_slices.ensure_slice(SAMPLE, [("chr1", 3_000, 4_000)])
+    os.utime(old, (1, 1))
+    size = new.stat().st_size + os.path.getsize(str(new) + ".bai")
+    assert bam_slices.enforce_budget(size) > 0
+    assert new.exists() and not old.exists() and not os.path.exists(str(old) + ".bai")
+
+def test_budget_spares_recently_handed_out_slices(cache, monkeypatch):
+    path = bam_slices.render_paths(SAMPLE, [("chr1", 7_000, 8_000)])["bam"]
+    assert bam_slices.enforce_budget(1) == 0 and os.path.exists(path)  # a render may not have opened it yet
+    monkeypatch.setenv("GW_SLICE_GRACE_S", "0")
+    assert bam_slices.enforce_budget(1) > 0 and not os.path.exists(path)
+    assert not list((cache / "slices" / "locks").iterdir())
+
+def test_render_paths_falls_back_to_full_bam(cache, monkeypatch):
+    assert bam_slices.render_paths(SAMPLE, [("chr1", 1_000, 2_000)])["bam"].endswith("chr1_1000_2000.bam")
+    monkeypatch.delenv("GW_SLICE_DIR")
+    assert bam_slices.render_paths(SAMPLE, [("chr1", 1_000, 2_000)])["bam"].endswith(f"{SAMPLE}.bam")
@@ -0,0 +1,96 @@
+import json
+import uuid
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from genomewiz.config import settings
+from genomewiz.db.base import Base, SessionLocal, engine
+from genomewiz.models.base import Base as EvidenceBase
+from genomewiz.models.evidence import Evidence
+from genomewiz.models.render_artifact import RenderArtifact  # noqa: F401  (Evidence.artifacts)
+from genomewiz.routers import annotation, changes as changes_router, labels
+from genomewiz.services import changes, consensus
+
+RUN = uuid.uuid4().hex[:8]  # the app database outlives a run
+F0, F1 = SVS = [f"sv_F0_{RUN}", f"sv_F1_{RUN}"]
+
+def _feed(c, since):
+    lines = [json.loads(x) for x in c.get("/changes", params={"since": since}).text.splitlines()]
+    return lines[:-1], lines[-1]
+
+def test_feed_returns_label_and_consensus_rows_once(route_client, seed_svs):
+    seed_svs("samp_F", SVS, chrom="chr3")
+    c = route_client(labels, changes_router, user_id="cur_feed")
+    db = SessionLocal()
+    start = changes.latest_seq(db); db.close()
+    r = c.post("/sv/labels:batch", json={"labels": [
+        {"sv_id": F0, "outcome": "True", "confidence": 4},
+        {"sv_id": F0, "outcome": "Likely", "confidence": 3},
+        {"sv_id": F1, "outcome": "Artifact", "confidence": 5},
+    ]})
+    assert r.status_code == 200
+    rows, trailer = _feed(c, start)
+    seqs = [x["seq"] for x in rows]
+    assert seqs == sorted(seqs) and trailer == {"cursor": seqs[-1], "more": False}
+    assert sorted(x["id"] for x in rows if x["table"] == "consensus") == SVS
+    labs = [x for x in rows if x["table"] == "labels"]
+    assert len(labs) == 3 and {x["row"]["curator_id"] for x in labs} == {"cur_feed"}
+    f1 = next(x for x in rows if x["id"] == F1)
+    assert f1["op"] == "upsert" and f1["row"]["label"] == "Artifact"
+
+    c.post(f"/sv/{F1}/label", json={"outcome": "Artifact", "confidence": 5})
+    rows, trailer = _feed(c, trailer["cursor"])
+    assert [(x["table"], x["op"]) for x in rows] == [("labels", "upsert"), ("consensus", "upsert")]
+    assert rows[1]["row"]["counts_json"] == {"Artifact": 2}
+    assert _feed(c, trailer["cursor"]) == ([], {"cursor": trailer["cursor"], "more": False})
+
+def test_feed_includes_annotations(route_client, monkeypatch):
+    monkeypatch.setattr(settings, "API_TOKEN", "tok")
+    EvidenceBase.metadata.create_all(engine)
+    db = SessionLocal()
+    ev = Evidence(etype="sv", payload={"chrom1": "chr3", "pos1": 10}, created_by="t")
+    db.add(ev); db.commit()
+    ev_id, start = str(ev.id), changes.latest_seq(db)
+    db.close()
+    c = route_client(annotation, changes_router)
+    r = c.post("/annotation/", json={"evidence_id": ev_id, "user_id": "u1", "label": "LIKELY_TRUE"},
+               headers={"Authorization": "Bearer tok"})
+    assert r.status_code == 200
+    rows, _ = _feed(c, start)
+    assert [(x["table"], x["id"]) for x in rows] == [("evidence_consensus", ev_id), ("annotation", r.json()["id"])]
+    assert rows[1]["row"]["evidence_id"] == ev_id and rows[1]["row"]["label"] == "LIKELY_TRUE"
+
+def test_paging_and_deletes(seed_svs):
+    seed_svs("samp_F", SVS, chrom="chr3")
+    db = SessionLocal()
+    try:
+        start = changes.latest_seq(db)
+        changes.log_changes(db, "consensus", [F0, F1, "sv_gone"])
+        changes.log_changes(db, "consensus", [F0])
+        db.commit()
+        page, cursor, more = changes.read_changes(db, start, limit=2)
+        assert [x["id"] for x in page] == [F0, F1] and more
+        page, cursor, more = changes.read_changes(db, cursor, limit=10)
+        assert [(x["id"], x["op"], x["row"]) for x in page] == [("sv_gone", "delete", None), (F0, "upsert", page[1]["row"])]
+        assert not more and cursor == changes.latest_seq(db)
+        consensus.rebuild_sv_consensus(db)
+        db.commit()
+        page, _, _ = changes.read_changes(db, cursor)
+        assert {F0, F1} <= {x["id"] for x in page}
+        assert changes.prune(db, cursor) >= 4
+        assert changes.read_changes(db, 0, limit=1)[0][0]["seq"] > cursor
+    finally:
+        db.close()
+
+def test_seq_not_reused_after_pruning_everything():
+    eng = create_engine("sqlite://")
+    Base.metadata.create_all(eng)
+    db = Session(eng)
+    changes.log_changes(db, "labels", ["a", "b"])
+    db.commit()
+    last = changes.latest_seq(db)
+    assert changes.prune(db, last) == 2 and changes.latest_seq(db) == 0
+    changes.log_changes(db, "labels", ["c"])
+    db.commit()
+    page, cursor, _ = changes.read_changes(db, last)
+    assert [x["id"] for x in page] == ["c"] and cursor > last
+    db.close()
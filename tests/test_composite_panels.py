@@ -0,0 +1,31 @@
+from genomewiz.db import models
+from genomewiz.services.render_queue import (breakpoint_panels, evidence_panels, panels_hash,
+                                             sv_hash, sv_panels)
+from genomewiz.services.utils.hashing import stable_hash
+
+def test_nearby_breakpoints_share_one_window():
+    assert breakpoint_panels("chr1", 5000, None, 7000, 100) == [("chr1", 4900, 7100)]
+    assert breakpoint_panels("chr1", 50, None, None, 100) == [("chr1", 0, 150)]
+
+def test_translocation_and_large_sv_are_composite(monkeypatch):
+    assert breakpoint_panels("chr1", 5000, "chr8", 9000, 100) == [("chr1", 4900, 5100), ("chr8", 8900, 9100)]
+    monkeypatch.setenv("GW_COMPOSITE_MIN_BP", "1000")
+    assert len(breakpoint_panels("chr1", 5000, "chr1", 7000, 100)) == 2
+
+def test_sv_panels_uses_mate_chromosome():
+    sv = models.SVCandidate(id="x", sample_id="s", chrom="chr2", pos1=1000, pos2=3000, svtype="BND",
+                            features_json={"chr2": "chr5"})
+    assert [p[0] for p in sv_panels(sv, pad=10)] == ["chr2", "chr5"]
+
+def test_single_panel_hash_unchanged():
+    sv = models.SVCandidate(id="x", sample_id="s", chrom="chr2", pos1=1000, pos2=3000, svtype="DEL")
+    (chrom, start, end), = sv_panels(sv)
+    assert sv_hash(sv, "png") == stable_hash({"sample_id": "s", "chrom": chrom, "start": start, "end": end},
+                                             fmt="png", width=None, height=None, dpi=None)
+    assert panels_hash("s", [("chr1", 0, 10), ("chr2", 0, 10)], "png") != panels_hash("s", [("chr1", 0, 10)], "png")
+
+def test_evidence_breakpoint_pair():
+    sample_id, panels = evidence_panels({"sample_id": "s", "chrom1": "chr1", "pos1": 500,
+                                         "chrom2": "chr3", "pos2": 800})
+    assert sample_id == "s" and [p[0] for p in panels] == ["chr1", "chr3"]
+    assert evidence_panels({"sample_id": "s", "chrom": "chr1", "start": 1, "end": 9}) == ("s", [("chr1", 1, 9)])
@@ -0,0 +1,52 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from genomewiz.db.base import Base
+from genomewiz.db import models
+from genomewiz.services import consensus
+
+def _db():
+    eng = create_engine("sqlite://")
+    Base.metadata.create_all(eng)
+    db = Session(eng)
+    db.add(models.Sample(id="s", name="S", tumor_normal="tumor", platform="ONT", source="x", license="x", consent_url="u"))
+    db.add(models.SVCandidate(id="sv1", sample_id="s", chrom="chr1", pos1=10, pos2=20, svtype="DEL", size=10))
+    for c in ("c1", "c2"):
+        db.add(models.Curator(id=c, name=c, email=f"{c}@x.org", score=0))
+    db.commit()
+    return db
+
+def _label(db, i, curator, outcome):
+    lab = models.Label(id=f"lab{i}", sv_id="sv1", curator_id=curator, outcome=outcome, confidence=3)
+    db.add(lab); db.flush()
+    consensus.record_label(db, lab)
+    db.commit()
+
+def test_majority_tie_prefers_earlier_label():
+    assert consensus.majority({"Artifact": 1, "True": 1}, consensus.OUTCOMES, "Unclear") == ("True", 0.5)
+    assert consensus.majority({}, consensus.OUTCOMES, "Unclear") == ("Unclear", 0.0)
+
+def test_incremental_matches_rebuild():
+    db = _db()
+    _label(db, 1, "c1", "True")
+    _label(db, 2, "c2", "Artifact")
+    _label(db, 3, "c2", "Artifact")
+    row = db.get(models.Consensus, "sv1")
+    assert (row.label, row.n_curators, row.counts_json) == ("Artifact", 2, {"True": 1, "Artifact": 2})
+    incremental = (row.label, row.prob, row.n_curators, row.counts_json)
+
+    consensus.rebuild_sv_consensus(db); db.commit()
+    db.expire_all()
+    row = db.get(models.Consensus, "sv1")
+    assert (row.label, row.prob, row.n_curators, row.counts_json) == incremental
+
+def test_dawid_skene_writes_posteriors(tmp_path):
+    db = _db()
+    _label(db, 1, "c1", "True")
+    _label(db, 2, "c2", "True")
+    out = consensus.run_dawid_skene(db, state_path=tmp_path / "ds.npz")
+    assert out["items"] == 1 and (tmp_path / "ds.npz").exists()
+    db.expire_all()
+    row = db.get(models.Consensus, "sv1")
+    assert (row.label, row.method, row.n_curators) == ("True", "dawid-skene", 2)
+    assert 0.5 < row.prob <= 1.0
+    assert consensus.run_dawid_skene(db, state_path=tmp_path / "ds.npz")["warm_start"]
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from genomewiz.db.base import Base
+from genomewiz.db import models
+from genomewiz.services.curation_queue import CurationQueue, ItemState
+
+@pytest.fixture
+def db(seed_svs):
+    db = Session(create_engine("sqlite://"))
+    Base.metadata.create_all(db.get_bind())
+    seed_svs("s", [f"sv{i}" for i in range(6)], db=db)
+    db.get(models.SVCandidate, "sv5").evidence_paths = {"png": "x"}
+    # sv0 settled, sv1 split 2-2, sv2 one vote
+    for sv_id, counts, label, prob in [("sv0", {"True": 6}, "True", 1.0),
+                                       ("sv1", {"True": 2, "Artifact": 2}, "True", 0.5),
+                                       ("sv2", {"Likely": 1}, "Likely", 1.0)]:
+        db.add(models.Consensus(sv_id=sv_id, label=label, prob=prob, n_curators=sum(counts.values()),
+                                method="majority", counts_json=counts, updated_at=datetime.utcnow()))
+    db.add(models.Label(id="l1", sv_id="sv3", curator_id="alice", outcome="True", confidence=3))
+    db.commit()
+    yield db
+    db.close()
+
+def test_priority_ordering():
+    q = CurationQueue(target_votes=5, settled_prob=0.9, render_bonus=0.25)
+    assert q.priority(ItemState(votes=6, prob=1.0)) is None
+    split = q.priority(ItemState(votes=4, prob=0.5))
+    unanimous = q.priority(ItemState(votes=4, prob=1.0))
+    assert split[0] == "contested" and unanimous[0] == "fresh"
+    assert split[1] > unanimous[1]
+    assert q.priority(ItemState(rendered=True))[1] > q.priority(ItemState())[1]
+
+def test_picks_are_exclusive_and_skip_own_votes(db):
+    q = CurationQueue(target_votes=5, settled_prob=0.9, lease_s=60)
+    got_a = [p.sv_id for p in q.next_batch(db, "alice", 3)]
+    got_b = [p.sv_id for p in q.next_batch(db, "bob", 10)]
+    assert "sv0" not in got_a + got_b           # settled
+    assert "sv3" not in got_a                   # alice already labelled it
+    assert not set(got_a) & set(got_b)
+    assert sorted(got_a + got_b) == ["sv1", "sv2", "sv3", "sv4", "sv5"]
+    assert db.query(models.QueueLease).count() == 5
+
+def test_release_and_other_process_leases(db):
+    q1 = CurationQueue(lease_s=60)
+    q2 = CurationQueue(lease_s=60)  # a second API process
+    first = [p.sv_id for p in q1.next_batch(db, "bob", 2)]
+    second = [p.sv_id for p in q2.next_batch(db, "carol", 5)]
+    assert not set(first) & set(second)
+    q1.give_back(db, "bob", first)
+    again = [p.sv_id for p in q1.next_batch(db, "dave", 5)]
+    assert set(first) <= set(again)
+
+def test_on_label_updates_priority(db):
+    q = CurationQueue(target_votes=1, settled_prob=0.9, lease_s=60)
+    q.rebuild(db)
+    (pick,) = q.pick("bob", 1)
+    row = models.Consensus(sv_id=pick.sv_id, label="True", prob=1.0, counts_json={"True": 1})
+    q.on_label(pick.sv_id, "bob", "True", row)
+    assert pick.sv_id not in [p.sv_id for p in q.pick("carol", 10)]
+    assert q.agreement("bob") > q.agreement("nobody")
+
+def test_new_svs_and_renders_arrive_without_a_rebuild(db, seed_svs):
+    q = CurationQueue(target_votes=5, settled_prob=0.9, lease_s=60, refresh_s=0)
+    q.rebuild(db)
+    built = q.stats()["built_at"]
+    later = datetime.utcnow() + timedelta(seconds=1)  # after the rebuild's updated_at mark
+    seed_svs("s", ["sv_new"], db=db, updated_at=later)  # e.g. the VCF loader in another process
+    db.get(models.SVCandidate, "sv4").evidence_paths = {"png": "y"}
+    db.commit()
+    picks = q.next_batch(db, "erin", 10)
+    assert "sv_new" in [p.sv_id for p in picks] and q.stats()["built_at"] == built
+    assert q._items["sv4"].rendered
+
+    q.on_svs(["sv_local"])  # written through this process
+    assert [p.sv_id for p in q.pick("frank", 10)] == ["sv_local"]
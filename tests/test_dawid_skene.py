@@ -0,0 +1,39 @@
+import numpy as np
+from genomewiz.services.dawid_skene import DSParams, fit
+
+CLASSES = ["True", "Likely", "Unclear", "Artifact"]
+
+def _synthetic(n_items=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    truth = rng.integers(0, 4, n_items)
+    accuracy = [0.9, 0.85, 0.8, 0.3, 0.3]  # two near-random curators
+    items, curators, labels = [], [], []
+    for c, acc in enumerate(accuracy):
+        ok = rng.random(n_items) < acc
+        noise = rng.integers(0, 4, n_items)
+        items.append(np.arange(n_items))
+        curators.append(np.full(n_items, c))
+        labels.append(np.where(ok, truth, noise))
+    return truth, np.concatenate(items), np.concatenate(curators), np.concatenate(labels)
+
+def test_recovers_truth_and_curator_quality():
+    truth, items, curators, labels = _synthetic()
+    res = fit(items, curators, labels, n_items=len(truth),
+              curator_ids=[f"c{i}" for i in range(5)], classes=CLASSES)
+    assert res.converged
+    assert (res.posterior.argmax(axis=1) == truth).mean() > 0.95
+    acc = np.einsum("ckk->ck", res.params.confusion).mean(axis=1)
+    assert acc[0] > acc[3] and acc[1] > acc[4]
+
+def test_warm_start_aligns_new_curators(tmp_path):
+    truth, items, curators, labels = _synthetic(500)
+    ids = [f"c{i}" for i in range(5)]
+    first = fit(items, curators, labels, n_items=len(truth), curator_ids=ids, classes=CLASSES)
+    first.params.save(tmp_path / "ds.npz")
+    loaded = DSParams.load(tmp_path / "ds.npz")
+    aligned = loaded.aligned(["new", *ids], CLASSES)
+    assert np.allclose(aligned.confusion[1:], first.params.confusion)
+    assert np.allclose(aligned.confusion[0].sum(axis=1), 1.0)
+    warm = fit(items, curators + 1, labels, n_items=len(truth), curator_ids=["new", *ids],
+               classes=CLASSES, init=aligned)
+    assert warm.iterations <= first.iterations
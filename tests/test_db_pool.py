@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from genomewiz.core.config import Settings
+from genomewiz.db.base import PoolStats, TimedQueuePool, _connect_args, engine_kwargs, pool_stats
+
+
+def test_timed_pool_records_waits_and_timeouts(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'p.db'}", poolclass=TimedQueuePool,
+                        pool_size=1, max_overflow=0, pool_timeout=0.05)
+    eng.pool.stats = PoolStats()
+    with eng.connect() as c:
+        c.execute(text("select 1"))
+        assert pool_stats(eng)["checkedout"] == 1
+        with pytest.raises(PoolTimeout):
+            eng.connect()
+    s = pool_stats(eng)
+    assert (s["checkouts"], s["timeouts"], s["checkedout"]) == (1, 1, 0)
+    eng.dispose()
+    assert eng.pool.stats.checkouts == 1  # survives pool recreation
+
+
+def test_engine_settings():
+    cfg = Settings(DATABASE_URL="postgresql+psycopg://u:p@h/db", DB_POOL_SIZE=7)
+    kw = engine_kwargs(cfg.database_uri, cfg, is_async=False)
+    assert kw["pool_size"] == 7 and kw["connect_args"] == {"prepare_threshold": 5}
+    bouncer = Settings(DATABASE_URL="postgresql+asyncpg://u:p@h/db", DB_PGBOUNCER=True)
+    assert _connect_args(bouncer.database_uri, bouncer) == {
+        "prepared_statement_cache_size": 0, "statement_cache_size": 0}
+    assert engine_kwargs("sqlite://", cfg, is_async=False) == {}
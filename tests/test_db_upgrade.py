@@ -0,0 +1,49 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+from genomewiz.db import models, upgrade
+from genomewiz.services.intervals import reg2bin
+
+# sv_candidates/consensus as created before span_end, bin, updated_at and counts_json
+OLD_SCHEMA = [
+    "CREATE TABLE samples (id VARCHAR PRIMARY KEY, name VARCHAR UNIQUE, tumor_normal VARCHAR, platform VARCHAR,"
+    " source VARCHAR, license VARCHAR, consent_url VARCHAR)",
+    "CREATE TABLE sv_candidates (id VARCHAR PRIMARY KEY, sample_id VARCHAR REFERENCES samples(id), chrom VARCHAR,"
+    " pos1 INTEGER, pos2 INTEGER, svtype VARCHAR, size INTEGER, caller VARCHAR, features_json JSON,"
+    " evidence_paths JSON)",
+    "CREATE TABLE consensus (sv_id VARCHAR PRIMARY KEY REFERENCES sv_candidates(id), label VARCHAR, prob FLOAT,"
+    " n_curators INTEGER, method VARCHAR, updated_at DATETIME)",
+    "CREATE TABLE labels (id VARCHAR PRIMARY KEY, sv_id VARCHAR, curator_id VARCHAR, outcome VARCHAR,"
+    " confidence INTEGER, zygosity VARCHAR, clonality_bin VARCHAR, evidence_flags_json JSON, notes TEXT,"
+    " created_at DATETIME)",
+]
+
+def test_upgrade_adds_columns_and_backfills(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with eng.begin() as conn:
+        for ddl in OLD_SCHEMA:
+            conn.execute(text(ddl))
+        conn.execute(text("INSERT INTO samples VALUES ('s', 's', 'tumor', 'ONT', 'x', 'x', 'x')"))
+        conn.execute(text("INSERT INTO sv_candidates (id, sample_id, chrom, pos1, pos2, svtype) VALUES"
+                          " ('sv1', 's', 'chr1', 1000, 90000, 'DEL'), ('sv2', 's', 'chr1', 5000, NULL, 'BND')"))
+        conn.execute(text("INSERT INTO labels (id, sv_id, curator_id, outcome, confidence) VALUES"
+                          " ('l1', 'sv1', 'a', 'True', 3), ('l2', 'sv1', 'b', 'Artifact', 2),"
+                          " ('l3', 'sv1', 'c', 'True', 4)"))
+        conn.execute(text("INSERT INTO consensus VALUES ('sv1', 'True', 0.67, 3, 'dawid-skene', NULL)"))
+
+    out = upgrade.upgrade(eng, batch_size=1)
+    assert {"sv_candidates.span_end", "sv_candidates.bin", "sv_candidates.updated_at",
+            "consensus.counts_json", "sv_candidates:ix_sv_chrom_bin_pos1"} <= set(out["added"])
+    assert "change_log" in inspect(eng).get_table_names()
+    assert out["sv_bins"] == 2 and out["sv_updated_at"] == 2 and out["consensus_counts"] == 1
+
+    db = Session(eng)
+    sv1, sv2 = db.get(models.SVCandidate, "sv1"), db.get(models.SVCandidate, "sv2")
+    assert (sv1.span_end, sv1.bin) == (90000, reg2bin(1000, 90000))
+    assert (sv2.span_end, sv2.bin) == (5001, reg2bin(5000, 5001))
+    assert sv1.updated_at is not None
+    cons = db.get(models.Consensus, "sv1")
+    assert cons.counts_json == {"True": 2, "Artifact": 1} and cons.method == "dawid-skene"
+    db.close()
+
+    again = upgrade.upgrade(eng)
+    assert again == {"added": [], "sv_bins": 0, "sv_updated_at": 0, "consensus_counts": 0}
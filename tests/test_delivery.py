@@ -0,0 +1,57 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from genomewiz.services import delivery, storage
+from genomewiz.services.delivery import ArtifactIndex, ArtifactRef
+
+H = "ab" + "0" * 62
+
+def _client(path):
+    app = FastAPI()
+
+    @app.get("/blob")
+    def blob(request: Request):
+        return delivery.blob_response(request, path, H)
+
+    return TestClient(app)
+
+def _blob(tmp_path, monkeypatch, body=b"<svg>" + b"x" * 1000 + b"</svg>"):
+    monkeypatch.setattr(storage, "BASE", tmp_path)
+    monkeypatch.setattr(delivery, "BASE", tmp_path)
+    p = tmp_path / "blobs" / H[:2] / f"{H}.svg"
+    p.parent.mkdir(parents=True)
+    p.write_bytes(body)
+    return p
+
+def test_etag_immutable_and_304(tmp_path, monkeypatch):
+    c = _client(_blob(tmp_path, monkeypatch))
+    r = c.get("/blob")
+    assert r.status_code == 200
+    assert r.headers["etag"] == f'"{H}"'
+    assert "immutable" in r.headers["cache-control"]
+    assert r.headers["content-type"].startswith("image/svg+xml")
+    r = c.get("/blob", headers={"If-None-Match": f'"other", "{H}"'})
+    assert r.status_code == 304 and r.content == b""
+
+def test_304_does_not_need_the_file(tmp_path, monkeypatch):
+    c = _client(tmp_path / "gone.svg")
+    assert c.get("/blob", headers={"If-None-Match": f'"{H}"'}).status_code == 304
+
+def test_range(tmp_path, monkeypatch):
+    c = _client(_blob(tmp_path, monkeypatch))
+    r = c.get("/blob", headers={"Range": "bytes=0-4"})
+    assert r.status_code == 206 and r.content == b"<svg>"
+
+def test_x_accel_redirect(tmp_path, monkeypatch):
+    c = _client(_blob(tmp_path, monkeypatch))
+    monkeypatch.setattr(delivery.settings, "GW_SENDFILE", "x-accel")
+    r = c.get("/blob")
+    assert r.headers["x-accel-redirect"] == f"/_figures/blobs/{H[:2]}/{H}.svg"
+    assert r.content == b""
+
+def test_artifact_index_lru():
+    idx = ArtifactIndex(max_size=2)
+    for i in range(3):
+        idx.put(str(i), ArtifactRef("e", f"h{i}", f"/p{i}", "png"))
+    assert idx.get("0") is None and idx.get("2").content_hash == "h2"
+    idx.discard("2")
+    assert len(idx) == 1
@@ -0,0 +1,68 @@
+import json
+import uuid
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from genomewiz.config import settings
+from genomewiz.db.base import SessionLocal, engine
+from genomewiz.models.base import Base as EvidenceBase
+from genomewiz.models.evidence import Evidence
+from genomewiz.models.annotation import Annotation
+from genomewiz.models.render_artifact import RenderArtifact  # noqa: F401  (Evidence.artifacts)
+from genomewiz.routers import export
+
+IDS = sorted(uuid.uuid4() for _ in range(5))
+
+def setup_module():
+    EvidenceBase.metadata.create_all(engine)
+    db = SessionLocal()
+    for i, ev in enumerate(IDS):
+        db.add(Evidence(id=ev, etype="sv", payload={"chrom1": "chr7", "pos1": 1000 + i, "svtype": "DEL"},
+                        created_by="t"))
+        db.flush()
+        for user, label in (("u1", "LIKELY_TRUE"), ("u2", "LIKELY_FALSE" if i % 2 else "LIKELY_TRUE")):
+            db.add(Annotation(evidence_id=ev, user_id=user, label=label))
+    db.add(Evidence(id=uuid.uuid4(), etype="other", payload={}, created_by="t"))
+    db.commit(); db.close()
+
+def _client(monkeypatch):
+    monkeypatch.setattr(settings, "API_TOKEN", "tok")
+    monkeypatch.setattr(export, "PAGE_SIZE", 2)  # force several keyset pages
+    app = FastAPI()
+    app.include_router(export.router)
+    return TestClient(app, headers={"Authorization": "Bearer tok"})
+
+def _mine(rows):
+    return [r for r in rows if r["evidence_id"] in {str(i) for i in IDS}]
+
+def test_streams_every_page_in_id_order(monkeypatch):
+    r = _client(monkeypatch).get("/export/dysgu")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("application/x-ndjson")
+    rows = _mine([json.loads(line) for line in r.text.splitlines()])
+    assert [row["evidence_id"] for row in rows] == [str(i) for i in IDS]
+    assert [row["n_votes"] for row in rows] == [2] * 5
+    assert rows[0]["consensus_label"] == "LIKELY_TRUE" and rows[0]["LIKELY_TRUE"] == 2
+    assert rows[0]["pos1"] == 1000
+
+def test_limit_and_after_resume(monkeypatch):
+    c = _client(monkeypatch)
+    first = [json.loads(x) for x in c.get("/export/dysgu", params={"limit": 3}).text.splitlines()]
+    assert len(first) == 3
+    rest = [json.loads(x) for x in c.get("/export/dysgu", params={"after": first[-1]["evidence_id"]}).text.splitlines()]
+    assert _mine(first + rest) == _mine([json.loads(x) for x in c.get("/export/dysgu").text.splitlines()])
+
+def test_min_votes_zero_keeps_unvoted_evidence(monkeypatch):
+    ev = uuid.uuid4()
+    db = SessionLocal()
+    db.add(Evidence(id=ev, etype="sv", payload={"chrom1": "chr8", "pos1": 5}, created_by="t"))
+    db.commit(); db.close()
+    c = _client(monkeypatch)
+    rows = {x["evidence_id"]: x for x in map(json.loads, c.get("/export/dysgu", params={"min_votes": 0}).text.splitlines())}
+    assert rows[str(ev)]["n_votes"] == 0 and rows[str(ev)]["LIKELY_TRUE"] == 0
+    assert {str(i) for i in IDS} <= set(rows)
+    assert str(ev) not in c.get("/export/dysgu").text
+
+def test_csv_and_auth(monkeypatch):
+    c = _client(monkeypatch)
+    lines = c.get("/export/dysgu", params={"format": "csv"}).text.splitlines()
+    assert lines[0].startswith("evidence_id,chrom1") and len(_mine([{"evidence_id": x.split(",")[0]} for x in lines[1:]])) == 5
+    assert c.get("/export/dysgu", headers={"Authorization": "Bearer nope"}).status_code == 403
@@ -0,0 +1,42 @@
+import os
+from genomewiz.services.gw_pool import GwPool
+
+def test_pool_reuses_instance_per_key():
+    built = []
+    pool = GwPool(lambda key: built.append(key) or object(), max_idle=4)
+    with pool.checkout("a") as first:
+        pass
+    with pool.checkout("a") as second:
+        pass
+    assert first is second
+    assert built == ["a"]
+    assert pool.stats()["hits"] == 1
+
+def test_pool_lru_cap():
+    pool = GwPool(lambda key: object(), max_idle=2)
+    for key in ("a", "b", "c"):
+        with pool.checkout(key):
+            pass
+    assert pool.idle_keys() == ["b", "c"]
+
+def test_pool_drops_instance_on_error():
+    pool = GwPool(lambda key: object(), max_idle=2)
+    try:
+        with pool.checkout("a"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert pool.idle_keys() == []
+
+def test_pool_invalidates_on_mtime_change(tmp_path):
+    bam = tmp_path / "s.bam"
+    bam.write_bytes(b"x")
+    pool = GwPool(lambda key: object(), max_idle=2)
+    with pool.checkout("s", [str(bam)]) as first:
+        pass
+    st = os.stat(bam)
+    os.utime(bam, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    with pool.checkout("s", [str(bam)]) as second:
+        pass
+    assert first is not second
+    assert pool.stats()["invalidations"] == 1
@@ -0,0 +1,23 @@
+import time
+
+from genomewiz.core.identity_cache import IdentityCache
+
+
+def test_ttl_lru_and_token_exp():
+    c = IdentityCache(ttl_s=60, max_size=2)
+    c.put("a", {"id": "u1"}); c.put("b", {"id": "u2"})
+    assert c.get("a") == {"id": "u1"}
+    c.put("c", {"id": "u3"})          # evicts b (least recently used)
+    assert c.get("b") is None and c.get("a") is not None
+    c.put("d", {"id": "u4"}, token_exp=time.time() - 1)
+    assert c.get("d") is None
+
+
+def test_invalidation_crosses_processes_via_epoch_file(tmp_path):
+    epoch = tmp_path / "epoch"
+    api = IdentityCache(ttl_s=60, max_size=10, epoch_file=epoch)
+    cli = IdentityCache(ttl_s=60, max_size=10, epoch_file=epoch)
+    api.put("tok", {"id": "u1", "roles": ["viewer"]})
+    cli.invalidate_user("u1")
+    api._epoch_checked -= 2           # skip the once-per-second throttle
+    assert api.get("tok") is None
@@ -0,0 +1,27 @@
+import random
+
+from genomewiz.services.intervals import parse_region, reg2bin, reg2bins, sv_span
+
+
+def test_reg2bin_levels():
+    assert reg2bin(0, 1) == 4681
+    assert reg2bin(0, 1 << 14) == 4681
+    assert reg2bin(0, (1 << 14) + 1) == 585
+    assert reg2bin(0, 1 << 29) == 0
+
+
+def test_overlapping_intervals_are_in_query_bins():
+    rng = random.Random(1)
+    for _ in range(2000):
+        s = rng.randrange(0, 250_000_000); e = s + rng.choice([1, 300, 20_000, 3_000_000])
+        qs = max(0, s - rng.randrange(0, 50_000)); qe = qs + rng.randrange(1, 100_000)
+        if s < qe and e > qs:
+            assert reg2bin(s, e) in reg2bins(qs, qe)
+
+
+def test_sv_span_and_parse_region():
+    assert sv_span("chr1", 100, 500, "DEL") == (100, 500)
+    assert sv_span("chr1", 100, 500, "BND") == (100, 101)
+    assert sv_span("chr1", 100, 500, "DEL", chrom2="chr2") == (100, 101)
+    assert parse_region("chr1:1,000-2,000") == ("chr1", 1000, 2000)
+    assert parse_region("chrX") == ("chrX", None, None)
@@ -0,0 +1,31 @@
+import uuid
+from genomewiz.db.base import SessionLocal
+from genomewiz.db import models
+from genomewiz.routers import labels
+
+RUN = uuid.uuid4().hex[:8]  # the app database outlives a run
+B0, B1, CURATOR = f"sv_B0_{RUN}", f"sv_B1_{RUN}", f"cur_batch_{RUN}"
+
+def test_batch_reports_per_item_and_counts_once(route_client, seed_svs):
+    seed_svs("samp_B", [B0, B1], chrom="chr2")
+    c = route_client(labels, user_id=CURATOR)
+    r = c.post("/sv/labels:batch", json={"labels": [
+        {"sv_id": B0, "outcome": "True", "confidence": 4},
+        {"sv_id": B0, "outcome": "Artifact", "confidence": 2},
+        {"sv_id": "sv_missing", "outcome": "True", "confidence": 4},
+        {"sv_id": B1, "outcome": "Maybe", "confidence": 4},
+        {"sv_id": B1, "outcome": "Likely", "confidence": 5},
+    ]})
+    assert r.status_code == 200
+    body = r.json()
+    assert (body["created"], body["failed"]) == (3, 2)
+    assert [x["ok"] for x in body["results"]] == [True, True, False, False, True]
+    assert body["results"][2]["error"] == "SV not found"
+    assert body["results"][3]["error"].startswith("outcome")
+    db = SessionLocal()
+    try:
+        row = db.get(models.Consensus, B0)
+        assert row.counts_json == {"True": 1, "Artifact": 1} and row.n_curators == 1
+        assert db.query(models.Label).filter(models.Label.curator_id == CURATOR).count() == 3
+    finally:
+        db.close()
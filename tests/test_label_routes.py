@@ -1,5 +1,18 @@
 from fastapi.testclient import TestClient
 from genomewiz.main import app
+from genomewiz.core import auth
+from genomewiz.db.base import SessionLocal
+from genomewiz.db import models
+
+def setup_module():
+    app.dependency_overrides[auth.get_current_user] = lambda: {"id": "cur_T", "roles": ["curator"]}
+    db = SessionLocal()
+    db.merge(models.Sample(id="samp_T", name="T", tumor_normal="tumor", platform="ONT", source="Public", license="CC", consent_url="u"))
+    db.merge(models.SVCandidate(id="sv_T1", sample_id="samp_T", chrom="chr1", pos1=1000, pos2=2000, svtype="DEL", size=1000, caller="dysgu"))
+    db.commit(); db.close()
+
+def teardown_module():
+    app.dependency_overrides.pop(auth.get_current_user, None)
 
 def test_label_create_and_return():
     c = TestClient(app)
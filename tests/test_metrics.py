@@ -0,0 +1,33 @@
+import threading
+
+from genomewiz.core.metrics import Counter, Histogram, Registry, end_trace, stage, start_trace
+
+
+def test_exposition_format():
+    reg = Registry()
+    h = reg.register(Histogram("lat_seconds", "Latency.", ("route",), buckets=(0.1, 1.0)))
+    c = reg.register(Counter("hits_total", "Hits.", ("layer",)))
+    h.observe(0.05, "/a"); h.observe(0.5, "/a"); h.observe(3, "/a")
+    c.inc("db"); c.inc("db")
+    reg.collector(lambda: [("depth", "gauge", "Queue depth.", [({"status": "queued"}, 4)])])
+    text = reg.render()
+    assert 'lat_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'lat_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'lat_seconds_count{route="/a"} 3' in text
+    assert 'hits_total{layer="db"} 2' in text
+    assert 'depth{status="queued"} 4' in text
+
+
+def test_stage_trace_follows_copied_context():
+    import contextvars
+    token = start_trace()
+    with stage("open"):
+        pass
+    ctx = contextvars.copy_context()
+
+    def work():
+        with stage("draw"):
+            pass
+    t = threading.Thread(target=ctx.run, args=(work,))
+    t.start(); t.join()
+    assert [name for name, _ in end_trace(token)] == ["open", "draw"]
@@ -0,0 +1,82 @@
+import json
+from datetime import datetime
+import pytest
+from sqlalchemy import update
+from genomewiz.db.base import Base, SessionLocal, engine
+from genomewiz.db import models
+from genomewiz.services import parquet_export
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+def setup_module():
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    db.merge(models.Sample(id="samp_P", name="P", tumor_normal="tumor", platform="ONT", source="x",
+                           license="x", consent_url="x"))
+    feats = [{"qual": 30, "pe": 4, "filt": "PASS"}, {"qual": 12.5, "pe": 0, "tags": ["a"]}, None]
+    for i, f in enumerate(feats):
+        db.merge(models.SVCandidate(id=f"sv_P{i}", sample_id="samp_P", chrom="chr1" if i < 2 else "chr2",
+                                    pos1=100 * (i + 1), pos2=5000, svtype="DEL", size=4000, features_json=f))
+    db.merge(models.Curator(id="cur_P", name="P", email="p@example.org", score=0))
+    db.flush()
+    db.merge(models.Label(id="lab_P0", sv_id="sv_P0", curator_id="cur_P", outcome="True", confidence=4,
+                          created_at=datetime(2024, 1, 1)))
+    db.merge(models.Consensus(sv_id="sv_P0", label="True", prob=0.9, n_curators=1, method="majority",
+                              counts_json={"True": 1}))
+    db.commit(); db.close()
+
+def _mine(table):
+    return {r["sv_id"]: r for r in table.to_pylist() if r["sample_id"] == "samp_P"}
+
+def test_feature_columns_and_votes(tmp_path):
+    db = SessionLocal()
+    try:
+        entry = parquet_export.export_dataset(db, tmp_path, incremental=False, row_group_size=2)
+    finally:
+        db.close()
+    snap = tmp_path / entry["snapshot"]
+    assert (snap / "sample_id=samp_P" / "chrom=chr1" / "part-0.parquet").exists()
+    assert (snap / "sample_id=samp_P" / "chrom=chr2" / "part-0.parquet").exists()
+    table = pq.read_table(snap / "sample_id=samp_P" / "chrom=chr1" / "part-0.parquet")
+    assert table.schema.field("feat_qual").type == pa.float64()
+    assert table.schema.field("feat_pe").type == pa.int64()
+    assert table.schema.field("feat_tags").type == pa.string()
+    rows = _mine(table)
+    assert rows["sv_P0"]["feat_filt"] == "PASS" and rows["sv_P1"]["feat_tags"] == '["a"]'
+    assert rows["sv_P0"]["consensus_label"] == "True" and rows["sv_P0"]["consensus_prob"] == 0.9
+    assert [v["outcome"] for v in rows["sv_P0"]["votes"]] == ["True"]
+    assert rows["sv_P1"]["votes"] == [] and rows["sv_P1"]["consensus_label"] is None
+    assert parquet_export.read_manifest(tmp_path)["snapshots"][0]["rows"] == entry["rows"]
+
+def test_incremental_only_writes_changes(tmp_path):
+    db = SessionLocal()
+    try:
+        parquet_export.export_dataset(db, tmp_path, incremental=False)
+        old = datetime(2000, 1, 1)
+        db.execute(update(models.SVCandidate).values(updated_at=old))
+        db.execute(update(models.Consensus).values(updated_at=old))
+        db.commit()
+        manifest = json.loads((tmp_path / parquet_export.MANIFEST).read_text())
+        manifest["snapshots"][-1]["watermark"] = datetime(2001, 1, 1).isoformat()
+        (tmp_path / parquet_export.MANIFEST).write_text(json.dumps(manifest))
+
+        db.get(models.SVCandidate, "sv_P2").size = 4100
+        db.commit()
+        entry = parquet_export.export_dataset(db, tmp_path)
+    finally:
+        db.close()
+    assert entry["incremental"] and entry["rows"] == 1 and entry["files"] == 1
+    table = pq.read_table(tmp_path / entry["snapshot"] / "sample_id=samp_P" / "chrom=chr2" / "part-0.parquet")
+    assert table.column("size").to_pylist() == [4100]
+    assert len(parquet_export.read_manifest(tmp_path)["snapshots"]) == 2
+
+def test_stream_is_one_readable_file():
+    db = SessionLocal()
+    try:
+        data = b"".join(parquet_export.stream_parquet(db, row_group_size=2))
+    finally:
+        db.close()
+    table = pq.read_table(pa.BufferReader(data))
+    assert set(_mine(table)) == {"sv_P0", "sv_P1", "sv_P2"}
+    assert pq.ParquetFile(pa.BufferReader(data)).num_row_groups >= 2
@@ -0,0 +1,58 @@
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from genomewiz.db.base import Base
+from genomewiz.db import models
+from genomewiz.services import read_evidence
+
+class Read:
+    def __init__(self, name, start, end, *, cigar=((0, 1),), sa=False, paired=False, proper=True, mapq=60):
+        self.query_name, self.reference_start, self.reference_end = name, start, end
+        self.cigartuples = cigar
+        self.mapping_quality = mapq
+        self.is_unmapped = self.is_secondary = self.is_duplicate = self.is_qcfail = False
+        self.is_paired, self.is_proper_pair, self.mate_is_unmapped = paired, proper, False
+        self._sa = sa
+
+    def has_tag(self, tag):
+        return tag == "SA" and self._sa
+
+def _deletion_reads():
+    # depth 10 on the flanks, 2 inside the deleted 1000-2000 interval
+    reads = [Read(f"f{i}", 0, 3000) for i in range(2)]
+    reads += [Read(f"l{i}", 0, 1000, cigar=((0, 1), (4, 30)), sa=i < 3) for i in range(8)]
+    reads += [Read(f"r{i}", 2000, 3000) for i in range(8)]
+    reads += [Read("disc", 950, 1000, paired=True, proper=False), Read("lowq", 0, 3000, mapq=1)]
+    return reads
+
+def _sv(**kw):
+    return models.SVCandidate(**{"id": "sv1", "sample_id": "s", "chrom": "chr1", "pos1": 1000,
+                                 "pos2": 2000, "svtype": "DEL", **kw})
+
+def test_deletion_summary():
+    reads = _deletion_reads()
+    row = read_evidence.summarize(lambda c, s, e: reads, _sv(), pad=1000, bin_size=500, slop=10, min_mapq=20)
+    assert row["split_reads"] == 3 and row["discordant_pairs"] == 1
+    assert abs(row["coverage_drop"] - 0.8) < 1e-2
+    assert row["panels_json"] == [["chr1", 0, 3000]]
+    assert np.frombuffer(row["coverage"], dtype="<u2").tolist() == [10, 10, 2, 2, 10, 10]
+
+def test_translocation_has_two_panels_and_no_drop():
+    sv = _sv(svtype="BND", pos2=500, features_json={"chr2": "chr9"})
+    row = read_evidence.summarize(lambda c, s, e: [Read("x", s, e)], sv, pad=100, bin_size=100)
+    assert row["panels_json"] == [["chr1", 900, 1100], ["chr9", 400, 600]]
+    assert row["coverage_drop"] is None
+
+def test_upsert_and_decode():
+    eng = create_engine("sqlite://")
+    Base.metadata.create_all(eng, tables=[models.Sample.__table__, models.SVCandidate.__table__,
+                                          models.SVReadSummary.__table__])
+    reads = _deletion_reads()
+    with Session(eng) as db:
+        for split in (0, 1):
+            row = read_evidence.summarize(lambda c, s, e: reads[split:], _sv(), pad=1000, bin_size=700)
+            read_evidence.upsert_batch(db, [{**row, "bam_mtime": 1.0}])
+        db.commit()
+        saved = db.get(models.SVReadSummary, "sv1")
+        assert saved.split_reads == 3
+        assert [len(p) for p in read_evidence.decode_coverage(saved)] == [5]
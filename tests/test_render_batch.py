@@ -0,0 +1,108 @@
+import asyncio
+import importlib
+import importlib.util
+import json
+import sys
+import types
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from genomewiz.core import security
+from genomewiz.db.base import Base, SessionLocal, engine
+from genomewiz.db import models
+from genomewiz.models.artifact_blob import ArtifactBlob
+from genomewiz.models.base import Base as EvidenceBase
+from genomewiz.routers import sv as sv_router
+from genomewiz.services import storage
+from genomewiz.services.render_executor import RenderExecutor
+
+RENDERER = "genomewiz.services.gwplot_renderer"
+
+@pytest.fixture
+def renderer(monkeypatch, tmp_path):
+    """gwplot_renderer with its render function replaced (gwplot itself is not needed);
+    renders of sample "bad" fail like a missing BAM."""
+    if importlib.util.find_spec("gwplot") is None:
+        fake = types.ModuleType("gwplot")
+        fake.Gw = object
+        monkeypatch.setitem(sys.modules, "gwplot", fake)
+    had = RENDERER in sys.modules
+    mod = importlib.import_module(RENDERER)
+    monkeypatch.setattr(storage, "BASE", tmp_path)
+
+    def render(sample_id, panels, fmt, content_hash):
+        if sample_id == "bad":
+            raise FileNotFoundError(f"BAM not found for {sample_id}")
+        return str(storage.materialize(content_hash, fmt, lambda tmp: open(tmp, "w").write(repr(panels))))
+
+    ex = RenderExecutor("thread", workers=2)
+    monkeypatch.setattr(mod, "_render_panels_file", render)
+    monkeypatch.setattr(mod, "get_executor", lambda: ex)
+    yield mod
+    ex.shutdown()
+    if not had:
+        sys.modules.pop(RENDERER, None)
+
+def _collect(mod, regions, content_hash):
+    async def run():
+        return [x async for x in mod.render_batch(regions, content_hash=content_hash)]
+    return asyncio.run(asyncio.wait_for(run(), timeout=10))  # a lost item would hang here
+
+def test_batch_reports_each_item_including_failures(renderer):
+    R = renderer.Region
+    regions = [R("a1", "s1", "chr1", 0, 100), R("b1", "bad", "chr1", 0, 100),
+               R("a2", "s1", "chr1", 200, 300), R("b2", "bad", "chr2", 0, 100)]
+    out = {r.key: (path, err) for r, path, err in _collect(renderer, regions, lambda r: f"h{r.key}")}
+    assert set(out) == {"a1", "a2", "b1", "b2"}
+    assert out["a1"][0].endswith("ha1.png") and out["a1"][1] is None
+    assert out["b1"][0] is None and isinstance(out["b1"][1], FileNotFoundError)
+
+def test_failing_content_hash_does_not_hang_the_batch(renderer):
+    R = renderer.Region
+    regions = [R(f"r{i}", "s1", "chr1", i * 100, i * 100 + 50) for i in range(4)]
+
+    def content_hash(r):
+        if r.key == "r1":
+            raise ValueError("cannot hash r1")
+        return f"h{r.key}"
+
+    out = {r.key: (path, err) for r, path, err in _collect(renderer, regions, content_hash)}
+    assert isinstance(out["r1"][1], ValueError) and out["r1"][0] is None
+    assert all(out[k][0] and out[k][1] is None for k in ("r0", "r2", "r3"))
+
+def test_sv_batch_route_streams_every_item(renderer, monkeypatch):
+    Base.metadata.create_all(engine)
+    EvidenceBase.metadata.create_all(engine)
+    db = SessionLocal()
+    db.merge(models.Sample(id="samp_B", name="B", tumor_normal="tumor", platform="ONT", source="x",
+                           license="x", consent_url="x"))
+    db.merge(models.SVCandidate(id="sv_B1", sample_id="samp_B", chrom="chr4", pos1=1000, pos2=2000, svtype="DEL"))
+    db.merge(models.SVCandidate(id="sv_B2", sample_id="samp_B", chrom="chr4", pos1=5000, pos2=6000, svtype="DEL"))
+    db.commit(); db.close()
+
+    real_record = storage.record_blob
+    def record_blob(db, content_hash, fmt, path):
+        if "4000" in open(path).read():  # sv_B2's padded panel, chr4:4000-7000
+            raise RuntimeError("blob table unavailable")
+        return real_record(db, content_hash, fmt, path)
+    monkeypatch.setattr(storage, "record_blob", record_blob)
+
+    app = FastAPI()
+    app.include_router(sv_router.router)
+    app.dependency_overrides[security.get_current_user] = lambda: {"id": "u"}
+    r = TestClient(app).post("/sv/render:batch", json={
+        "sv_ids": ["sv_B1", "sv_B2"],
+        "regions": [{"sample_id": "bad", "chrom": "chr1", "start": 0, "end": 100}],
+    })
+    assert r.status_code == 200
+    items = {x["key"]: x for x in map(json.loads, r.text.splitlines())}
+    assert set(items) == {"sv_B1", "sv_B2", "bad:chr1:0-100"}
+    assert items["sv_B1"]["path"] and items["sv_B1"]["error"] is None
+    assert items["sv_B2"]["path"] is None and "blob table unavailable" in items["sv_B2"]["error"]
+    assert items["bad:chr1:0-100"]["path"] is None and "BAM not found" in items["bad:chr1:0-100"]["error"]
+
+    db = SessionLocal()
+    assert db.get(ArtifactBlob, items["sv_B1"]["content_hash"]) is not None
+    assert db.get(models.SVCandidate, "sv_B1").evidence_paths["png"] == items["sv_B1"]["path"]
+    assert not (db.get(models.SVCandidate, "sv_B2").evidence_paths or {})
+    db.close()
@@ -0,0 +1,28 @@
+import threading
+import pytest
+from genomewiz.services.render_executor import RenderBusy, RenderExecutor, gw_threads
+
+def test_inline_executor_runs_in_caller():
+    ex = RenderExecutor(mode="inline", workers=1)
+    assert ex.submit(lambda a, b: a + b, 2, 3).result() == 5
+    assert ex.depth == 0
+
+def test_queue_limit_raises_busy():
+    gate = threading.Event()
+    ex = RenderExecutor(mode="thread", workers=1, queue_limit=2, retry_after=7)
+    futs = [ex.submit(gate.wait), ex.submit(gate.wait)]
+    with pytest.raises(RenderBusy) as e:
+        ex.submit(gate.wait)
+    assert e.value.retry_after == 7
+    gate.set()
+    for f in futs:
+        f.result(timeout=5)
+    ex.shutdown()
+
+def test_gw_threads_budget(monkeypatch):
+    monkeypatch.setattr("genomewiz.services.render_executor.available_cpus", lambda: 8)
+    monkeypatch.setenv("GW_RENDER_WORKERS", "4")
+    monkeypatch.delenv("GW_RENDER_THREADS", raising=False)
+    assert gw_threads() == 2
+    monkeypatch.setenv("GW_RENDER_THREADS", "16")
+    assert gw_threads() == 2
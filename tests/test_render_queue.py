@@ -0,0 +1,146 @@
+import uuid
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from fastapi.testclient import TestClient
+from genomewiz.config import settings
+from genomewiz.core import auth
+from genomewiz.db.base import Base, SessionLocal, engine
+from genomewiz.db import models
+from genomewiz.main import app
+from genomewiz.models.base import Base as EvidenceBase
+from genomewiz.models.artifact_blob import ArtifactBlob
+from genomewiz.models.evidence import Evidence
+from genomewiz.models.render_artifact import RenderArtifact
+from genomewiz.services import render_queue, storage
+
+def setup_module():
+    EvidenceBase.metadata.create_all(engine)
+    app.dependency_overrides[auth.get_current_user] = lambda: {"id": "cur_R", "roles": ["curator"]}
+
+def teardown_module():
+    app.dependency_overrides.pop(auth.get_current_user, None)
+
+def _fake_renderer(monkeypatch, tmp_path, fail=False):
+    monkeypatch.setattr(storage, "BASE", tmp_path)
+    def render_to(fmt, sample_id, panels, content_hash):
+        if fail:
+            raise FileNotFoundError(f"BAM for {sample_id} not found")
+        return storage.materialize(content_hash, fmt, lambda tmp: open(tmp, "wb").write(f"{panels}".encode()))
+    monkeypatch.setattr(render_queue, "_render_to", render_to)
+
+def _queue_db(monkeypatch, tmp_path):
+    """A private database for the worker side, so claim() only sees this test's jobs."""
+    eng = create_engine(f"sqlite:///{tmp_path / 'queue.db'}")
+    Base.metadata.create_all(eng)
+    EvidenceBase.metadata.create_all(eng)
+    Session = sessionmaker(bind=eng, autoflush=False)
+    monkeypatch.setattr(render_queue, "SessionLocal", Session)
+    db = Session()
+    db.add(models.Sample(id="s", name="s", tumor_normal="tumor", platform="ONT", source="x",
+                         license="x", consent_url="x"))
+    db.add(models.SVCandidate(id="sv1", sample_id="s", chrom="chr1", pos1=10_000, pos2=12_000, svtype="DEL"))
+    db.commit()
+    return db
+
+def test_enqueue_claim_run_records_artifact(monkeypatch, tmp_path):
+    _fake_renderer(monkeypatch, tmp_path)
+    monkeypatch.setenv("GW_PRERENDER_FORMATS", "png,svg")
+    db = _queue_db(monkeypatch, tmp_path)
+    sv = db.get(models.SVCandidate, "sv1")
+    jobs = render_queue.enqueue_sv(db, sv)
+    assert [j.format for j in jobs] == ["png", "svg"]
+    assert [j.id for j in render_queue.enqueue_sv(db, sv)] == [j.id for j in jobs]  # coalesced
+    db.commit()
+
+    claimed = render_queue.claim(db, 10)
+    assert sorted(claimed) == sorted(j.id for j in jobs)
+    assert render_queue.claim(db, 10) == []
+    assert [render_queue.run_job(i) for i in claimed] == ["done", "done"]
+
+    db.expire_all()
+    sv = db.get(models.SVCandidate, "sv1")
+    assert set(sv.evidence_paths) == {"png", "svg"}
+    for job in jobs:
+        job = db.get(models.RenderJob, job.id)
+        assert job.status == "done" and job.attempts == 1 and job.result_path == sv.evidence_paths[job.format]
+        blob = db.get(ArtifactBlob, job.content_hash)
+        assert blob.size_bytes == storage.artifact_path(job.content_hash, job.format).stat().st_size
+    assert render_queue.enqueue_sv(db, sv) == []
+    db.close()
+
+def test_evidence_job_and_failure(monkeypatch, tmp_path):
+    _fake_renderer(monkeypatch, tmp_path)
+    db = _queue_db(monkeypatch, tmp_path)
+    ev = Evidence(etype="sv", payload={"sample_id": "s", "chrom": "chr1", "start": 100, "end": 900}, created_by="t")
+    db.add(ev)
+    db.flush()
+    (job,) = render_queue.enqueue_evidence(db, ev, formats=["png"])
+    db.commit()
+    assert render_queue.run_job(job.id) == "done"
+    db.expire_all()
+    art = db.query(RenderArtifact).filter_by(evidence_id=ev.id).one()
+    assert art.content_hash == job.content_hash and db.get(Evidence, ev.id).status == "rendered"
+
+    _fake_renderer(monkeypatch, tmp_path, fail=True)
+    (job,) = render_queue.enqueue_evidence(db, db.get(Evidence, ev.id), formats=["svg"])
+    db.commit()
+    assert render_queue.run_job(job.id) == "failed"
+    db.expire_all()
+    assert "not found" in db.get(models.RenderJob, job.id).error
+    assert db.get(Evidence, ev.id).status == "failed"
+    db.close()
+
+def test_existing_artifact_row_still_completes_the_render(monkeypatch, tmp_path):
+    _fake_renderer(monkeypatch, tmp_path)
+    db = _queue_db(monkeypatch, tmp_path)
+    ev = Evidence(etype="sv", payload={"sample_id": "s", "chrom": "chr1", "start": 100, "end": 900}, created_by="t")
+    db.add(ev)
+    db.flush()
+    (job,) = render_queue.enqueue_evidence(db, ev, formats=["png"])
+    db.add(RenderArtifact(evidence_id=ev.id, format="png", content_hash=job.content_hash, path="elsewhere"))
+    db.commit()
+    assert render_queue.run_job(job.id) == "done"
+    db.expire_all()
+    assert db.get(Evidence, ev.id).status == "rendered"
+    assert db.get(ArtifactBlob, job.content_hash) is not None  # counted against the store budget
+    assert db.query(RenderArtifact).filter_by(evidence_id=ev.id).count() == 1
+    db.close()
+
+def test_render_route_202_then_job_status_then_artifact(monkeypatch, tmp_path):
+    _fake_renderer(monkeypatch, tmp_path)
+    monkeypatch.setattr(settings, "API_TOKEN", "tok")
+    db = SessionLocal()
+    ev = Evidence(etype="sv", payload={"sample_id": "s", "chrom": "chr2", "start": 100, "end": 900}, created_by="t")
+    db.add(ev); db.commit()
+    ev_id = ev.id
+    db.close()
+    c = TestClient(app, headers={"Authorization": "Bearer tok"})
+
+    r = c.post(f"/evidence/{ev_id}/render", json={"format": "png"})
+    assert r.status_code == 202
+    job = r.json()
+    assert r.headers["Location"] == f"/evidence/jobs/{job['id']}" and job["status"] == "queued"
+    assert c.post(f"/evidence/{ev_id}/render", json={"format": "png"}).json()["id"] == job["id"]
+
+    assert render_queue.run_job(job["id"]) == "done"
+    r = c.get(f"/evidence/jobs/{job['id']}")
+    assert r.status_code == 200 and r.json()["status"] == "done" and r.json()["result_path"]
+    r = c.post(f"/evidence/{ev_id}/render", json={"format": "png"})
+    assert r.status_code == 200 and r.json()["content_hash"] == job["content_hash"]
+    assert c.get(f"/evidence/jobs/{uuid.uuid4().hex}").status_code == 404
+
+def test_full_queue_is_rejected_with_503(monkeypatch):
+    monkeypatch.setattr(settings, "API_TOKEN", "tok")
+    monkeypatch.setenv("GW_RENDER_JOB_LIMIT", "0")
+    monkeypatch.setenv("GW_RENDER_RETRY_AFTER", "7")
+    db = SessionLocal()
+    ev = Evidence(etype="sv", payload={"sample_id": "s", "chrom": "chr3", "start": 5}, created_by="t")
+    db.add(ev); db.commit()
+    ev_id = ev.id
+    db.close()
+    c = TestClient(app, headers={"Authorization": "Bearer tok"})
+    r = c.post(f"/evidence/{ev_id}/render", json={"format": "svg"})
+    assert r.status_code == 503 and r.headers["Retry-After"] == "7"
+    db = SessionLocal()
+    assert db.query(models.RenderJob).filter_by(target_id=str(ev_id)).count() == 0
+    db.close()
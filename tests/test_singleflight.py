@@ -0,0 +1,35 @@
+import threading
+import time
+import pytest
+from genomewiz.services.singleflight import SingleFlight
+
+def test_concurrent_callers_share_one_call():
+    sf = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def render():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return b"png"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(sf.do("h", render)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(sf.do("h", render))) for _ in range(4)]
+    for t in followers:
+        t.start()
+    for t in [leader, *followers]:
+        t.join()
+    assert calls == [1]
+    assert results == [b"png"] * 5
+    assert sf.stats()["coalesced_inproc"] == 4
+    assert sf.stats()["in_flight"] == 0
+
+def test_leader_error_propagates_and_clears():
+    sf = SingleFlight()
+    with pytest.raises(ValueError):
+        sf.do("h", lambda: (_ for _ in ()).throw(ValueError("bad")))
+    assert sf.do("h", lambda: 1) == 1
@@ -0,0 +1,91 @@
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from genomewiz.db.base import Base as DbBase
+from genomewiz.db import models
+from genomewiz.models.base import Base
+from genomewiz.models.evidence import Evidence  # noqa: F401  (mapper registry)
+from genomewiz.models.artifact_blob import ArtifactBlob
+from genomewiz.models.render_artifact import RenderArtifact
+from genomewiz.services import render_queue, storage
+
+def _db():
+    eng = create_engine("sqlite://")
+    Base.metadata.create_all(eng, tables=[ArtifactBlob.__table__, RenderArtifact.__table__])
+    DbBase.metadata.create_all(eng)
+    return Session(eng)
+
+def test_artifact_path_is_content_addressed():
+    assert storage.artifact_path("abcd", "png") == storage.artifact_path("abcd", "png")
+    assert storage.artifact_path("abcd", "png").name == "abcd.png"
+
+def test_atomic_write_leaves_no_partial_file(tmp_path):
+    target = tmp_path / "x.png"
+    try:
+        with storage.atomic_write(target) as tmp:
+            open(tmp, "wb").write(b"half")
+            raise RuntimeError("render crashed")
+    except RuntimeError:
+        pass
+    assert not target.exists()
+    assert os.listdir(tmp_path) == []
+    with storage.atomic_write(target) as tmp:
+        open(tmp, "wb").write(b"png")
+    assert target.read_bytes() == b"png"
+
+def test_enforce_budget_evicts_lru(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "BASE", tmp_path)
+    db = _db()
+    now = datetime.utcnow()
+    for i, h in enumerate(["old", "mid", "new"]):
+        p = storage.artifact_path(h, "png")
+        p.write_bytes(b"x" * 100)
+        db.add(ArtifactBlob(content_hash=h, format="png", size_bytes=100, hits=0,
+                            last_access=now + timedelta(seconds=i)))
+    db.commit()
+    freed = storage.enforce_budget(db, max_bytes=150)
+    assert freed == 200
+    assert [b.content_hash for b in db.query(ArtifactBlob)] == ["new"]
+    assert not storage.artifact_path("old", "png").exists()
+    assert storage.artifact_path("new", "png").exists()
+
+def test_eviction_forgets_paths_and_sv_is_requeued(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "BASE", tmp_path)
+    monkeypatch.setenv("GW_PRERENDER_FORMATS", "png")
+    db = _db()
+    db.add(models.Sample(id="s", name="s", tumor_normal="tumor", platform="ONT", source="x",
+                         license="x", consent_url="x"))
+    sv = models.SVCandidate(id="sv1", sample_id="s", chrom="chr1", pos1=1000, pos2=2000, svtype="DEL")
+    db.add(sv)
+    db.flush()
+    h = render_queue.sv_hash(sv, "png")
+    p = storage.artifact_path(h, "png")
+    p.write_bytes(b"x" * 100)
+    sv.evidence_paths = {"png": str(p)}
+    db.add(models.RenderJob(id="job1", kind="sv", target_id="sv1", format="png", content_hash=h,
+                            status="done", result_path=str(p)))
+    db.add(ArtifactBlob(content_hash=h, format="png", size_bytes=100, hits=0, last_access=datetime.utcnow()))
+    db.commit()
+    assert render_queue.enqueue_sv(db, sv) == []
+
+    assert storage.enforce_budget(db, max_bytes=1) == 100
+    db.expire_all()
+    assert db.get(models.SVCandidate, "sv1").evidence_paths is None
+    assert db.get(models.RenderJob, "job1").result_path is None
+    assert [j.content_hash for j in render_queue.enqueue_sv(db, db.get(models.SVCandidate, "sv1"))] == [h]
+
+def test_enqueue_sv_rerenders_missing_batch_panel(monkeypatch, tmp_path):
+    monkeypatch.setenv("GW_PRERENDER_FORMATS", "png")
+    db = _db()
+    sv = models.SVCandidate(id="sv2", sample_id="s", chrom="chr1", pos1=1000, pos2=2000, svtype="DEL",
+                            evidence_paths={"png": str(tmp_path / "gone.png")})
+    db.add(sv)
+    db.flush()
+    assert [j.format for j in render_queue.enqueue_sv(db, sv)] == ["png"]
+
+def test_materialize_removes_its_lock_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "BASE", tmp_path)
+    p = storage.materialize("cafebabe", "png", lambda tmp: open(tmp, "wb").write(b"png"))
+    assert p.read_bytes() == b"png"
+    assert list((tmp_path / "locks").iterdir()) == []
@@ -1,14 +1,19 @@
 from fastapi.testclient import TestClient
 from genomewiz.main import app
+from genomewiz.core import auth
 from genomewiz.db.base import SessionLocal
 from genomewiz.db import models
 
 def setup_module():
+    app.dependency_overrides[auth.get_current_user] = lambda: {"id": "cur_T", "roles": ["curator"]}
     db = SessionLocal()
-    db.add(models.Sample(id="samp_T", name="T", tumor_normal="tumor", platform="ONT", source="Public", license="CC", consent_url="u"))
-    db.add(models.SVCandidate(id="sv_T1", sample_id="samp_T", chrom="chr1", pos1=1000, pos2=2000, svtype="DEL", size=1000, caller="dysgu"))
+    db.merge(models.Sample(id="samp_T", name="T", tumor_normal="tumor", platform="ONT", source="Public", license="CC", consent_url="u"))
+    db.merge(models.SVCandidate(id="sv_T1", sample_id="samp_T", chrom="chr1", pos1=1000, pos2=2000, svtype="DEL", size=1000, caller="dysgu"))
     db.commit(); db.close()
 
+def teardown_module():
+    app.dependency_overrides.pop(auth.get_current_user, None)
+
 def test_get_sv_ok():
     c = TestClient(app)
     r = c.get("/sv/sv_T1")
@@ -20,3 +25,22 @@ def test_list_sv_filter():
     r = c.get("/sv", params={"svtype":"DEL"})
     assert r.status_code == 200
     assert any(sv["id"]=="sv_T1" for sv in r.json())
+
+def test_list_sv_region_and_cursor():
+    db = SessionLocal()
+    for sv in (
+        models.SVCandidate(id="sv_R1", sample_id="samp_T", chrom="chrR", pos1=100, pos2=5000, svtype="DEL", size=4900),
+        models.SVCandidate(id="sv_R2", sample_id="samp_T", chrom="chrR", pos1=3000, pos2=3500, svtype="DEL", size=500),
+        models.SVCandidate(id="sv_R3", sample_id="samp_T", chrom="chrR", pos1=9000, pos2=None, svtype="BND"),
+    ):
+        db.merge(sv)  # re-runs share the database
+    db.commit(); db.close()
+    c = TestClient(app)
+    r = c.get("/sv", params={"region": "chrR:2,000-4,000"})
+    assert [sv["id"] for sv in r.json()] == ["sv_R1", "sv_R2"]
+    r = c.get("/sv", params={"region": "chrR:2000-4000", "mode": "contained"})
+    assert [sv["id"] for sv in r.json()] == ["sv_R2"]
+    r = c.get("/sv", params={"region": "chrR", "limit": 2})
+    assert [sv["id"] for sv in r.json()] == ["sv_R1", "sv_R2"]
+    r = c.get("/sv", params={"region": "chrR", "limit": 2, "after": r.headers["X-Next-Cursor"]})
+    assert [sv["id"] for sv in r.json()] == ["sv_R3"] and "X-Next-Cursor" not in r.headers
@@ -0,0 +1,65 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from genomewiz.core import security
+from genomewiz.db.base import SessionLocal, engine
+from genomewiz.models.artifact_blob import ArtifactBlob
+from genomewiz.models.base import Base as EvidenceBase
+from genomewiz.routers import tiles as tiles_router
+from genomewiz.services import storage
+from genomewiz.services.tiles import Tile, neighbours, tile_hash, tile_region
+
+def test_tile_region_doubles_per_zoom(monkeypatch):
+    monkeypatch.setenv("GW_TILE_BP", "1000")
+    assert tile_region(Tile("s", "chr1", 0, 3)) == (3000, 4000)
+    assert tile_region(Tile("s", "chr1", 2, 3)) == (12000, 16000)
+
+def test_tile_hash_tracks_geometry(monkeypatch):
+    t = Tile("s", "chr1", 0, 0)
+    h = tile_hash(t)
+    assert h == tile_hash(t) and h != tile_hash(t._replace(index=1))
+    monkeypatch.setenv("GW_TILE_PX", "256")
+    assert tile_hash(t) != h
+
+def test_neighbours_nearest_first_and_clipped():
+    t = Tile("s", "chr1", 0, 1)
+    assert [n.index for n in neighbours(t, 2)] == [2, 0, 3]
+
+def test_cached_tile_and_etag(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "BASE", tmp_path)
+    monkeypatch.setenv("GW_TILE_PREFETCH", "0")
+    tile = Tile("s", "chr1", 0, 5)
+    path = storage.artifact_path(tile_hash(tile), "png")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\x89PNG")
+    app = FastAPI()
+    app.include_router(tiles_router.router)
+    app.dependency_overrides[security.get_current_user] = lambda: {"id": "u"}
+    c = TestClient(app)
+    r = c.get("/tiles/s/chr1/0/5.png")
+    assert r.status_code == 200 and r.content == b"\x89PNG"
+    r2 = c.get("/tiles/s/chr1/0/5.png", headers={"If-None-Match": r.headers["etag"]})
+    assert r2.status_code == 304
+    assert c.get("/tiles/s/chr1/99/0.png").status_code == 422
+
+def test_served_tiles_count_against_budget(monkeypatch, tmp_path):
+    EvidenceBase.metadata.create_all(engine)
+    monkeypatch.setattr(storage, "BASE", tmp_path)
+    monkeypatch.setenv("GW_TILE_PREFETCH", "0")
+    tile = Tile("s", "chr2", 0, 7)
+    h = tile_hash(tile)
+    path = storage.artifact_path(h, "png")
+    path.write_bytes(b"\x89PNG" * 10)
+    app = FastAPI()
+    app.include_router(tiles_router.router)
+    app.dependency_overrides[security.get_current_user] = lambda: {"id": "u"}
+    c = TestClient(app)
+    etag = c.get("/tiles/s/chr2/0/7.png").headers["etag"]
+    db = SessionLocal()
+    blob = db.get(ArtifactBlob, h)
+    assert blob.size_bytes == 40 and blob.hits == 0
+    c.get("/tiles/s/chr2/0/7.png", headers={"If-None-Match": etag})
+    db.refresh(blob)
+    assert blob.hits == 1
+    assert storage.enforce_budget(db, 1) >= 40
+    assert not path.exists() and db.get(ArtifactBlob, h) is None
+    db.close()
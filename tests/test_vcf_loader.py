@@ -0,0 +1,65 @@
+import gzip
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from genomewiz.db.base import Base
+from genomewiz.db import models
+from genomewiz.services import vcf_loader
+
+VCF = """##fileformat=VCFv4.2
+##source=DYSGU v1.6
+#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO
+chr1\t1000\t1\tN\t<DEL>\t45\tPASS\tSVTYPE=DEL;END=3000;SVLEN=-2000;SU=12;PRECISE
+chr1\t5000\t2\tN\t<INS>\t.\tlowProb\tSVTYPE=INS;END=5001;SVLEN=350
+chr1\t9000\t3\tN\tN]chr5:200]\t30\tPASS\tSVTYPE=TRA;CHR2=chr5;CHR2_POS=200
+chr2\t10\t4\tA\tT\t50\tPASS\tDP=3
+"""
+
+
+def test_parse_record():
+    rows = list(vcf_loader.iter_records(VCF.splitlines(True), "s1", "dysgu"))
+    assert [r["svtype"] for r in rows] == ["DEL", "INS", "TRA"]
+    d, i, t = rows
+    assert (d["pos2"], d["size"], d["span_end"]) == (3000, 2000, 3000)
+    assert d["features_json"]["SU"] == 12 and d["features_json"]["PRECISE"] is True
+    assert i["size"] == 350 and i["features_json"]["qual"] is None
+    assert (t["pos2"], t["span_end"], t["features_json"]["chr2"]) == (200, 9001, "chr5")
+    assert d["id"] == vcf_loader.iter_records(VCF.splitlines(True), "s1", "x").__next__()["id"]
+
+
+def test_load_is_idempotent(tmp_path):
+    path = tmp_path / "calls.vcf.gz"
+    with gzip.open(path, "wt") as fh:
+        fh.write(VCF)
+    assert vcf_loader.header_caller(path) == "dysgu"
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(models.Sample(id="s1", name="S", tumor_normal="tumor", platform="ONT",
+                             source="x", license="CC", consent_url="u"))
+        db.commit()
+        for _ in range(2):
+            with vcf_loader._open(path) as fh:
+                assert vcf_loader.load_lines(db, fh, "s1", "dysgu", batch_size=2) == 3
+        assert db.query(models.SVCandidate).count() == 3
+
+
+def test_load_queues_prerender_jobs_once(monkeypatch):
+    monkeypatch.setenv("GW_PRERENDER_FORMATS", "png,svg")
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(models.Sample(id="s1", name="S", tumor_normal="tumor", platform="ONT",
+                             source="x", license="CC", consent_url="u"))
+        db.commit()
+        vcf_loader.load_lines(db, VCF.splitlines(True), "s1", "dysgu", batch_size=2)
+        jobs = db.query(models.RenderJob).all()
+        assert {(j.target_id, j.format) for j in jobs} == {
+            (sv_id, fmt) for (sv_id,) in db.query(models.SVCandidate.id) for fmt in ("png", "svg")}
+        assert {j.status for j in jobs} == {"queued"}
+
+        vcf_loader.load_lines(db, VCF.splitlines(True), "s1", "dysgu", batch_size=2)
+        assert db.query(models.RenderJob).count() == 6  # still queued ones are not duplicated
+        vcf_loader.load_lines(db, VCF.splitlines(True), "s1", "dysgu", prerender=False)
+        assert db.query(models.RenderJob).count() == 6